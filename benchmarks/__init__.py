@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""
+Benchmarks reproductibles de l'api bolero.
+
+Un catalogue synthétique (auteurs, ouvrages, recensions et leurs relations) est généré dans une
+base sqlite ou MySQL locale (`catalogue.generate_catalogue`), puis chaque scénario
+(`scenarios.SCENARIOS`) interroge la vraie application Flask par son client de test. Les
+latences, le nombre de requêtes SQL par requête HTTP et le pic de mémoire sont enregistrés dans
+un fichier JSON, comparable à un fichier précédent pour détecter les régressions.
+
+    python -m benchmarks generate --books 20000
+    python -m benchmarks run --output baseline.json
+    python -m benchmarks run --compare baseline.json
+
+La configuration de l'api est lue au premier import de `core` ou de `bolero` : `configure` doit
+être appelée avant.
+"""
+# Import from stdlib
+import os
+import tempfile
+
+# Imports from external libraries
+
+# Import from local code
+
+
+#: Base par défaut des benchmarks
+DEFAULT_DATABASE_URI = f"sqlite:///{tempfile.gettempdir()}/bolero-benchmarks.sqlite"
+
+
+def configure(database_uri=DEFAULT_DATABASE_URI, response_cache=False):
+    """
+    Configuration de l'api pour les benchmarks, par variables d'environnement Dynaconf :
+    environnement de production (sans DEBUG ni logs SQL), base `database_uri`, module bolero
+    chargé et cache des réponses désactivé (sauf `response_cache`), pour mesurer le travail
+    réel de chaque route. L'environnement, les modules et la clé secrète déjà définis sont
+    conservés.
+    """
+    os.environ.setdefault("ENV_FOR_DYNACONF", "production")
+    os.environ["DYNACONF_SQL__binds__bolero__database_uri"] = database_uri
+    os.environ["DYNACONF_RESPONSE_CACHE__enabled"] = str(response_cache).lower()
+    os.environ.setdefault("DYNACONF_MODULES", '["bolero"]')
+    os.environ.setdefault("DYNACONF_SECRET_KEY", "benchmarks")
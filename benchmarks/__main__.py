@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+"""
+Commandes des benchmarks : `python -m benchmarks --help`.
+"""
+# Import from stdlib
+import json
+import sys
+import tempfile
+
+# Imports from external libraries
+import click
+
+# Import from local code
+from benchmarks import DEFAULT_DATABASE_URI, configure
+from benchmarks.catalogue import Catalogue, generate_catalogue
+from benchmarks.load import MIXES, enable_wal, run_load, write_curves
+from benchmarks.runner import compare, run
+from benchmarks.scenarios import SCENARIOS
+
+
+database_uri_option = click.option(
+    "--database-uri",
+    default=DEFAULT_DATABASE_URI,
+    show_default=True,
+    help="Base du catalogue (sqlite ou MySQL locale)",
+)
+seed_option = click.option("--seed", default=0, show_default=True, help="Graine")
+
+
+def _comma_list(ctx, param, value):
+    # Pas de core.services.click.COMMA_LIST : importer core charge la configuration avant
+    # `configure`
+    return [item for item in value.split(",") if item]
+
+
+def catalogue_options(function):
+    options = [
+        click.option(
+            "--authors", default=1000, show_default=True, help="Nombre d'auteurs"
+        ),
+        click.option(
+            "--books", default=5000, show_default=True, help="Nombre d'ouvrages"
+        ),
+        click.option(
+            "--reviews", default=5000, show_default=True, help="Nombre de recensions"
+        ),
+        click.option(
+            "--authors-per-book",
+            default=2.0,
+            show_default=True,
+            help="Auteurs par ouvrage",
+        ),
+        click.option(
+            "--authors-per-review",
+            default=1.0,
+            show_default=True,
+            help="Auteurs par recension",
+        ),
+        click.option(
+            "--books-per-review",
+            default=1.0,
+            show_default=True,
+            help="Ouvrages par recension",
+        ),
+        seed_option,
+    ]
+    for option in reversed(options):
+        function = option(function)
+    return function
+
+
+@click.group()
+def cli():
+    """Benchmarks reproductibles de l'api bolero."""
+
+
+@cli.command("generate")
+@database_uri_option
+@catalogue_options
+def generate(database_uri, **dimensions):
+    """
+    Recrée la base et y génère un catalogue synthétique.
+    """
+    configure(database_uri)
+    generate_catalogue(Catalogue(**dimensions), echo=click.echo)
+
+
+@cli.command("run")
+@database_uri_option
+@click.option(
+    "--scenario",
+    "names",
+    multiple=True,
+    type=click.Choice([scenario.name for scenario in SCENARIOS]),
+    help="Scénario à jouer (plusieurs possibles, tous par défaut)",
+)
+@click.option(
+    "--iterations",
+    type=int,
+    help="Itérations par scénario (propres à chacun par défaut)",
+)
+@click.option("--warmup", default=3, show_default=True, help="Itérations non mesurées")
+@click.option(
+    "--response-cache/--no-response-cache",
+    default=False,
+    show_default=True,
+    help="Cache des réponses des GET",
+)
+@click.option(
+    "--output", type=click.Path(dir_okay=False), help="Fichier JSON des mesures"
+)
+@click.option(
+    "--compare",
+    "baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Campagne de référence à comparer",
+)
+@click.option(
+    "--tolerance",
+    default=0.2,
+    show_default=True,
+    help="Dégradation tolérée (0.2 : 20 %)",
+)
+@seed_option
+def run_command(
+    database_uri,
+    names,
+    iterations,
+    warmup,
+    response_cache,
+    output,
+    baseline,
+    tolerance,
+    seed,
+):
+    """
+    Joue les scénarios contre l'application, sur un catalogue généré par `generate`.
+    """
+    configure(database_uri, response_cache)
+    scenarios = [s for s in SCENARIOS if not names or s.name in names]
+    campaign = run(scenarios, iterations, warmup, seed, echo=click.echo)
+    if output:
+        with open(output, "w") as file:
+            json.dump(campaign, file, indent=2, ensure_ascii=False)
+    if baseline:
+        with open(baseline) as file:
+            _report(campaign, json.load(file), tolerance)
+
+
+@cli.command("compare")
+@click.argument("current", type=click.Path(exists=True, dir_okay=False))
+@click.argument("baseline", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--tolerance",
+    default=0.2,
+    show_default=True,
+    help="Dégradation tolérée (0.2 : 20 %)",
+)
+def compare_command(current, baseline, tolerance):
+    """
+    Compare deux campagnes enregistrées par `run --output`.
+    """
+    with open(current) as file, open(baseline) as baseline_file:
+        _report(json.load(file), json.load(baseline_file), tolerance)
+
+
+@cli.command("load")
+@click.option(
+    "--database-uri",
+    default=f"sqlite:///{tempfile.gettempdir()}/bolero-load.sqlite",
+    show_default=True,
+    help="Base sqlite de l'api",
+)
+@click.option(
+    "--generate/--no-generate",
+    default=True,
+    show_default=True,
+    help="Recrée le catalogue avant les mesures",
+)
+@catalogue_options
+@click.option(
+    "--mix",
+    default="mixte",
+    show_default=True,
+    type=click.Choice(list(MIXES)),
+    help="Mélange de trafic",
+)
+@click.option(
+    "--workers",
+    default="1,2,4",
+    show_default=True,
+    callback=_comma_list,
+    help="Nombres de workers gunicorn",
+)
+@click.option(
+    "--worker-class",
+    "worker_classes",
+    default="sync,gthread",
+    show_default=True,
+    callback=_comma_list,
+    help="Classes de workers gunicorn",
+)
+@click.option(
+    "--threads", default=4, show_default=True, help="Threads par worker (gthread)"
+)
+@click.option(
+    "--users",
+    default="10,50,100",
+    show_default=True,
+    callback=_comma_list,
+    help="Nombres d'utilisateurs simultanés",
+)
+@click.option(
+    "--spawn-rate",
+    default=10,
+    show_default=True,
+    help="Utilisateurs lancés par seconde",
+)
+@click.option(
+    "--duration", default=30, show_default=True, help="Durée de chaque mesure (s)"
+)
+@click.option("--port", default=8765, show_default=True, help="Port de gunicorn")
+@click.option(
+    "--output-dir",
+    default=f"{tempfile.gettempdir()}/bolero-load",
+    show_default=True,
+    help="Dossier des statistiques et des logs",
+)
+def load_command(database_uri, generate, mix, workers, users, output_dir, **options):
+    """
+    Tests de charge de l'api servie par gunicorn (Locust doit être installé).
+    """
+    dimensions = {
+        name: options.pop(name)
+        for name in (
+            "authors",
+            "books",
+            "reviews",
+            "authors_per_book",
+            "authors_per_review",
+            "books_per_review",
+            "seed",
+        )
+    }
+    configure(database_uri)
+    if generate:
+        generate_catalogue(Catalogue(**dimensions), echo=click.echo)
+    enable_wal(database_uri)
+    results = run_load(
+        mix,
+        [int(count) for count in workers],
+        users=[int(level) for level in users],
+        output_dir=output_dir,
+        echo=click.echo,
+        **options,
+    )
+    path = f"{output_dir}/courbes-{mix}.csv"
+    write_curves(results, path)
+    click.echo(f"Courbes : {path}")
+
+
+@cli.command("check-serializers")
+@click.option(
+    "--database-uri",
+    default=f"sqlite:///{tempfile.gettempdir()}/bolero-serializers.sqlite",
+    show_default=True,
+    help="Base du catalogue",
+)
+@click.option(
+    "--generate/--no-generate",
+    default=True,
+    show_default=True,
+    help="Recrée le catalogue avant la vérification",
+)
+@click.option("--limit", default=500, show_default=True, help="Lignes par schéma")
+@catalogue_options
+def check_serializers_command(database_uri, generate, limit, **dimensions):
+    """
+    Vérifie que les sérialiseurs précompilés produisent la même sortie que marshmallow, sur
+    un catalogue synthétique (code de sortie 1 à la moindre différence).
+    """
+    configure(database_uri)
+    if generate:
+        generate_catalogue(Catalogue(**dimensions), echo=click.echo)
+    from bolero.cli.db import check_serializer_parity
+    from bolero.models import databases
+    from bolero.server import app
+
+    with app.app_context():
+        check_serializer_parity(databases.bolero.session, limit)
+
+
+def _report(current, baseline, tolerance):
+    lines, regressions = compare(current, baseline, tolerance)
+    click.echo(f"Comparaison à la campagne du {baseline['meta']['date']}")
+    for line in lines:
+        click.echo(line)
+    if regressions:
+        click.echo(f"{len(regressions)} scénario(s) en régression", err=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
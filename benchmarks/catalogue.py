@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+"""
+Génération d'un catalogue synthétique reproductible (même graine, même catalogue).
+
+Les mots des titres et des noms suivent une distribution de Zipf, comme dans un vrai
+catalogue : quelques mots très fréquents et une longue traîne, ce qui donne aux filtres et à la
+recherche des sélectivités réalistes. Quelques auteurs, éditeurs et revues sont de même très
+représentés. Les lignes sont écrites par INSERT multi-lignes, sans passer par l'ORM, puis les
+clés de recherche (cle_recherche) sont reconstruites.
+"""
+# Import from stdlib
+from datetime import date
+from itertools import accumulate
+import random
+
+# Imports from external libraries
+from sqlalchemy import insert
+
+# Import from local code
+
+
+SYLLABLES = (
+    "ba be bi bo bu ca ce ci co cu da de di do du fa fe fi fo ga ge gi go la le li lo lu "
+    "ma me mi mo mu na ne ni no nu pa pe pi po pu ra re ri ro ru sa se si so su ta te ti "
+    "to tu va ve vi vo an en in on ar er ir or al el il ol"
+).split()
+LANGUAGES = ("fr", "fr", "fr", "en", "en", "de", "it", "es")
+
+
+class Catalogue:
+    """Dimensions du catalogue et densité des relations (nombre moyen par ligne)."""
+
+    def __init__(
+        self,
+        authors=1000,
+        books=5000,
+        reviews=5000,
+        authors_per_book=2.0,
+        authors_per_review=1.0,
+        books_per_review=1.0,
+        seed=0,
+    ):
+        self.authors = authors
+        self.books = books
+        self.reviews = reviews
+        self.authors_per_book = authors_per_book
+        self.authors_per_review = authors_per_review
+        self.books_per_review = books_per_review
+        self.seed = seed
+
+    def describe(self):
+        return dict(vars(self))
+
+    ################################################################################################
+    #   Valeurs
+    ################################################################################################
+    def _words(self, rng, size):
+        words = set()
+        while len(words) < size:
+            words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+        words = sorted(words)
+        rng.shuffle(words)
+        return words
+
+    @staticmethod
+    def _zipf(size):
+        """Poids cumulés d'une distribution de Zipf sur `size` rangs."""
+        return list(accumulate(1 / rank for rank in range(1, size + 1)))
+
+    def _pick(self, rng, population, weights, k=1):
+        return rng.choices(population, cum_weights=weights, k=k)
+
+    def _count(self, rng, mean):
+        """Nombre de relations d'une ligne, de moyenne `mean`."""
+        count = int(mean)
+        return count + (rng.random() < mean - count)
+
+    def _related(self, rng, size, weights, mean):
+        """Ids (de 1 à `size`) liés à une ligne, sans doublon."""
+        return sorted(
+            set(self._pick(rng, range(1, size + 1), weights, self._count(rng, mean)))
+        )
+
+    ################################################################################################
+    #   Lignes
+    ################################################################################################
+    def rows(self):
+        """
+        Les lignes du catalogue, table par table : [(nom du modèle, [lignes]), ...]. Les ids
+        sont fixés, de 1 à N, pour écrire les relations sans relire la base.
+        """
+        rng = random.Random(self.seed)
+        vocabulary = self._words(rng, 5000)
+        vocabulary_weights = self._zipf(len(vocabulary))
+        names = [word.capitalize() for word in self._words(rng, 2000)]
+        names_weights = self._zipf(len(names))
+        editors = [f"Éditions {name}" for name in names[:200]]
+        editors_weights = self._zipf(len(editors))
+        journals = [f"Revue {name}" for name in names[200:400]]
+        journals_weights = self._zipf(len(journals))
+
+        def title(low, high):
+            words = self._pick(
+                rng, vocabulary, vocabulary_weights, rng.randint(low, high)
+            )
+            return " ".join(words).capitalize()
+
+        yield "Editor", [{"id": i, "nom": nom} for i, nom in enumerate(editors, 1)]
+        yield "Journal", [{"id": i, "titre": t} for i, t in enumerate(journals, 1)]
+        yield "Author", [
+            {
+                "id": i,
+                "id_proprio": f"AUT-{i}",
+                "id_ref": f"{i:09d}" if rng.random() < 0.5 else None,
+                "nom": self._pick(rng, names, names_weights)[0],
+                "prenom": rng.choice(names),
+            }
+            for i in range(1, self.authors + 1)
+        ]
+        yield "Book", [
+            {
+                "id": i,
+                "id_proprio": f"OUV-{i}",
+                "doi": f"10.9999/ouv.{i}" if rng.random() < 0.3 else None,
+                "titre": title(2, 8),
+                "sous_titre": title(3, 10) if rng.random() < 0.4 else None,
+                "langue": rng.choice(LANGUAGES),
+                "annee_parution": str(rng.randint(1950, 2024)),
+                "editeur": self._pick(rng, editors, editors_weights)[0],
+                "ean": f"978{i:010d}",
+                "portail": "cairn",
+                "url": f"https://example.org/ouvrages/{i}",
+            }
+            for i in range(1, self.books + 1)
+        ]
+        reviews = []
+        for i in range(1, self.reviews + 1):
+            published = date(
+                rng.randint(1950, 2024), rng.randint(1, 12), rng.randint(1, 28)
+            )
+            reviews.append(
+                {
+                    "id": i,
+                    "id_proprio": f"REC-{i}",
+                    "titre": title(3, 10),
+                    "langue": rng.choice(LANGUAGES),
+                    "titre_revue": self._pick(rng, journals, journals_weights)[0],
+                    "annee": str(published.year),
+                    "numero": str(rng.randint(1, 12)),
+                    "date_parution": published,
+                    "doi": f"10.9999/rec.{i}" if rng.random() < 0.3 else None,
+                    "url": f"https://example.org/recensions/{i}",
+                }
+            )
+        yield "Review", reviews
+
+        # Quelques auteurs prolifiques, beaucoup d'auteurs d'un seul ouvrage
+        authors_weights = self._zipf(self.authors)
+        books_weights = self._zipf(self.books)
+        yield "AuthorBook", [
+            {"id_auteur": author, "id_ouvrage": book}
+            for book in range(1, self.books + 1)
+            for author in self._related(
+                rng, self.authors, authors_weights, self.authors_per_book
+            )
+        ]
+        yield "AuthorReview", [
+            {"id_auteur": author, "id_recension": review}
+            for review in range(1, self.reviews + 1)
+            for author in self._related(
+                rng, self.authors, authors_weights, self.authors_per_review
+            )
+        ]
+        yield "BookReview", [
+            {"id_ouvrage": book, "id_recension": review}
+            for review in range(1, self.reviews + 1)
+            for book in self._related(
+                rng, self.books, books_weights, self.books_per_review
+            )
+        ]
+
+
+def generate_catalogue(
+    catalogue, username="benchmarks", password="benchmarks", batch_size=5000, echo=print
+):
+    """
+    Recrée les tables de la base de l'api et y écrit `catalogue`, ainsi qu'un utilisateur
+    `username` pour les routes authentifiées.
+    """
+    from bolero.models import databases
+
+    db = databases.bolero
+    db.drop_all()
+    db.create_all()
+    session = db.session
+    try:
+        for model_name, rows in catalogue.rows():
+            model = getattr(db.models, model_name)
+            for start in range(0, len(rows), batch_size):
+                session.execute(insert(model), rows[start : start + batch_size])
+            echo(f"{model.__tablename__} : {len(rows)} lignes")
+        session.add(
+            db.models.User(username=username, password=password, id_portail="1")
+        )
+        session.commit()
+        db.models.SearchKey.rebuild(session)
+    finally:
+        session.close()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+"""
+Tests de charge pour dimensionner le déploiement gunicorn.
+
+Pour chaque classe de workers et chaque nombre de workers, l'api est lancée par gunicorn sur
+une base sqlite locale (catalogue de `catalogue.generate_catalogue`, aucun service externe),
+puis Locust (`locustfile.py`, à installer à part : pip install locust) y rejoue un mélange de
+trafic pour chaque nombre d'utilisateurs simultanés. Le débit et les latences obtenus forment
+une courbe par configuration de gunicorn.
+
+Les processus Locust et gunicorn sont lancés à part : ce module n'importe ni l'un ni l'autre.
+"""
+# Import from stdlib
+from time import monotonic, sleep
+import csv
+import subprocess
+import sys
+
+# Imports from external libraries
+from path import Path
+from sqlalchemy import create_engine
+import requests
+
+# Import from local code
+
+
+#: Mélanges de trafic : classes d'utilisateurs de `locustfile.py` lancées ensemble, au prorata
+#: de leur poids
+MIXES = {
+    "lecture": ["Lecteur", "RechercheEan", "Recherche"],
+    "mixte": ["Lecteur", "RechercheEan", "Recherche", "Contributeur"],
+    "ecriture": ["Contributeur"],
+}
+#: Colonnes relevées dans la ligne « Aggregated » des statistiques de Locust
+STATS_COLUMNS = {
+    "requetes": "Request Count",
+    "echecs": "Failure Count",
+    "requetes_par_s": "Requests/s",
+    "moyenne_ms": "Average Response Time",
+    "p50_ms": "50%",
+    "p95_ms": "95%",
+    "p99_ms": "99%",
+    "max_ms": "Max Response Time",
+}
+ROOT = Path(__file__).absolute().parent.parent
+
+
+def enable_wal(database_uri):
+    """
+    Journal WAL pour une base sqlite : les lectures des workers ne sont plus bloquées par les
+    écritures. Le mode est enregistré dans le fichier de la base.
+    """
+    engine = create_engine(database_uri)
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+    engine.dispose()
+
+
+class Gunicorn:
+    """L'api servie par gunicorn, le temps d'un bloc `with`."""
+
+    def __init__(self, workers, worker_class, threads, port, log_path):
+        # Avec plusieurs threads, gunicorn remplace les workers sync par des workers gthread
+        self.threads = threads if worker_class == "gthread" else 1
+        self.url = f"http://127.0.0.1:{port}"
+        self.command = [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--workers",
+            str(workers),
+            "--worker-class",
+            worker_class,
+            "--threads",
+            str(self.threads),
+            "--bind",
+            f"127.0.0.1:{port}",
+            "app:app",
+        ]
+        self.log_path = log_path
+        self._process = None
+
+    def __enter__(self):
+        log = open(self.log_path, "w")
+        self._process = subprocess.Popen(
+            self.command, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT
+        )
+        log.close()
+        try:
+            self._wait_ready()
+        except BaseException:
+            self.__exit__()
+            raise
+        return self
+
+    def _wait_ready(self, timeout=60):
+        deadline = monotonic() + timeout
+        while monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"Arrêt de gunicorn, voir {self.log_path}")
+            try:
+                if requests.get(f"{self.url}/ping", timeout=5).ok:
+                    return
+            except requests.RequestException:
+                pass
+            sleep(0.5)
+        raise RuntimeError(f"gunicorn ne répond pas, voir {self.log_path}")
+
+    def __exit__(self, *exc_info):
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+
+
+def run_locust(url, users, spawn_rate, duration, classes, csv_prefix):
+    """Joue les classes d'utilisateurs `classes` contre `url` et renvoie les statistiques."""
+    log = open(f"{csv_prefix}.log", "w")
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "locust",
+            "--locustfile",
+            ROOT / "benchmarks" / "locustfile.py",
+            "--headless",
+            "--users",
+            str(users),
+            "--spawn-rate",
+            str(spawn_rate),
+            "--run-time",
+            f"{duration}s",
+            "--host",
+            url,
+            "--csv",
+            csv_prefix,
+            "--only-summary",
+            "--loglevel",
+            "WARNING",
+            *classes,
+        ],
+        cwd=ROOT,
+        stdout=log,
+        stderr=subprocess.STDOUT,
+        check=False,
+    )
+    log.close()
+    with open(f"{csv_prefix}_stats.csv", newline="") as file:
+        for row in csv.DictReader(file):
+            if row["Name"] == "Aggregated":
+                # N/A : aucune requête
+                return {
+                    name: round(float(row[column]), 2) if row[column] != "N/A" else None
+                    for name, column in STATS_COLUMNS.items()
+                }
+    raise RuntimeError(f"Statistiques absentes de {csv_prefix}_stats.csv")
+
+
+def run_load(
+    mix,
+    workers,
+    worker_classes,
+    threads,
+    users,
+    spawn_rate,
+    duration,
+    port,
+    output_dir,
+    echo=print,
+):
+    """
+    Mesure chaque combinaison de `worker_classes`, `workers` (nombres de workers) et `users`
+    (nombres d'utilisateurs simultanés). Renvoie une ligne de résultats par combinaison.
+    """
+    output_dir = Path(output_dir)
+    output_dir.makedirs_p()
+    results = []
+    for worker_class in worker_classes:
+        for count in workers:
+            name = f"{worker_class}-{count}"
+            log_path = output_dir / f"gunicorn-{name}.log"
+            with Gunicorn(count, worker_class, threads, port, log_path) as server:
+                for level in users:
+                    stats = run_locust(
+                        server.url,
+                        level,
+                        spawn_rate,
+                        duration,
+                        MIXES[mix],
+                        output_dir / f"{name}-{level}",
+                    )
+                    result = {
+                        "worker_class": worker_class,
+                        "workers": count,
+                        "threads": server.threads,
+                        "utilisateurs": level,
+                        **stats,
+                    }
+                    results.append(result)
+                    echo(format_result(result))
+    return results
+
+
+def format_result(result):
+    result = {name: value or 0 for name, value in result.items()}
+    return (
+        f"{result['worker_class']:<8} {result['workers']:>3} workers "
+        f"{result['utilisateurs']:>5} utilisateurs  "
+        f"{result['requetes_par_s']:>8.1f} req/s  "
+        f"p50 {result['p50_ms']:>7.0f} ms  p95 {result['p95_ms']:>7.0f} ms  "
+        f"p99 {result['p99_ms']:>7.0f} ms  "
+        f"{int(result['echecs'])}/{int(result['requetes'])} échecs"
+    )
+
+
+def write_curves(results, path):
+    """Les résultats en CSV, une ligne par point des courbes."""
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+"""
+Trafic réaliste de l'api bolero pour Locust (https://locust.io) :
+
+    locust -f benchmarks/locustfile.py --host http://localhost:8000 Lecteur Contributeur
+
+Pour une api servie derrière un préfixe (/api), le préfixe fait partie de `--host`
+(http://serveur/api). Chaque classe d'utilisateurs est un type de trafic ; `load.MIXES` regroupe
+les classes des mélanges proposés par `python -m benchmarks load`. Les valeurs des filtres (noms,
+éditeurs, EAN, mots des titres...) sont relevées dans l'api au démarrage des premiers
+utilisateurs. Le compte des contributeurs est lu dans BOLERO_LOAD_USERNAME et
+BOLERO_LOAD_PASSWORD (par défaut celui créé par `python -m benchmarks generate`).
+"""
+# Import from stdlib
+from itertools import count
+import os
+import random
+import threading
+
+# Imports from external libraries
+from locust import HttpUser, between, task
+import requests
+
+# Import from local code
+
+
+#: Nombre de lignes écrites par requête /batch
+BATCH_SIZE = 20
+#: Pages relevées pour les valeurs des filtres
+SAMPLE_PAGES = 5
+
+
+class Sample:
+    """Valeurs présentes dans l'api, partagées par tous les utilisateurs du processus."""
+
+    _lock = threading.Lock()
+    _loaded = None
+
+    @classmethod
+    def get(cls, host):
+        with cls._lock:
+            if cls._loaded is None:
+                cls._loaded = cls(host)
+        return cls._loaded
+
+    def __init__(self, host):
+        books, total = self._pages(host, "/bolero/ouvrages", "ouvrages")
+        reviews, _ = self._pages(host, "/bolero/recensions", "recensions")
+        authors = {
+            relation["auteur"]["id"]: relation["auteur"]["nom"]
+            for book in books
+            for relation in book.get("ouvrage_auteurs") or []
+        }
+        self.book_ids = [book["id"] for book in books]
+        self.book_pages = max(total // 50, 1)
+        self.eans = [book["ean"] for book in books]
+        self.editors = sorted({book["editeur"] for book in books})
+        self.years = sorted({book["annee_parution"] for book in books})
+        self.words = sorted(
+            {word.lower() for book in books for word in book["titre"].split()}
+        )
+        self.journals = sorted({review["titre_revue"] for review in reviews})
+        self.author_ids = sorted(authors) or [1]
+        self.author_names = sorted(set(authors.values())) or ["a"]
+
+    @staticmethod
+    def _pages(host, path, key):
+        limit = 100
+        total = requests.get(f"{host}{path}", params={"limit": 1}).json()["total"]
+        pages = max(total // limit, 1)
+        rows = []
+        for page in random.sample(range(1, pages + 1), min(SAMPLE_PAGES, pages)):
+            response = requests.get(
+                f"{host}{path}", params={"limit": limit, "page": page}
+            )
+            rows.extend(response.json()[key])
+        return rows, total
+
+
+class BoleroUser(HttpUser):
+    abstract = True
+    wait_time = between(0.1, 1)
+
+    def on_start(self):
+        self.sample = Sample.get(self.host)
+
+    def get(self, path, name=None, **params):
+        return self.client.get(path, params=params, name=name or path)
+
+
+class Lecteur(BoleroUser):
+    """Navigation dans le catalogue : listes filtrées, pages profondes et fiches."""
+
+    weight = 6
+
+    @task(3)
+    def books_by_editor(self):
+        self.get(
+            "/bolero/ouvrages",
+            editeur=random.choice(self.sample.editors),
+            annee_parution=random.choice(self.sample.years),
+            limit=20,
+        )
+
+    @task(2)
+    def books_by_title(self):
+        self.get("/bolero/ouvrages", titre=random.choice(self.sample.words), limit=20)
+
+    @task(1)
+    def books_by_author(self):
+        name = random.choice(self.sample.author_names)
+        self.get("/bolero/ouvrages", auteur_nom=name, limit=20)
+
+    @task(2)
+    def reviews_by_journal(self):
+        self.get(
+            "/bolero/recensions",
+            titre_revue=random.choice(self.sample.journals),
+            limit=20,
+        )
+
+    @task(1)
+    def authors_by_name(self):
+        self.get("/bolero/auteurs", nom=random.choice(self.sample.author_names))
+
+    @task(1)
+    def deep_page(self):
+        # Une des pages de 50 ouvrages du dernier dixième du catalogue
+        pages = self.sample.book_pages
+        page = random.randint(max(pages - pages // 10, 1), pages)
+        self.get("/bolero/ouvrages", limit=50, page=page)
+
+    @task(3)
+    def book(self):
+        book_id = random.choice(self.sample.book_ids)
+        self.get(f"/bolero/ouvrages/{book_id}", name="/bolero/ouvrages/<id>")
+
+
+class RechercheEan(BoleroUser):
+    """Résolution d'EAN, typiquement par les portails."""
+
+    weight = 3
+
+    @task
+    def by_ean(self):
+        ean = random.choice(self.sample.eans)
+        self.get(f"/bolero/ouvrages/by-ean/{ean}", name="/bolero/ouvrages/by-ean/<ean>")
+
+
+class Recherche(BoleroUser):
+    """Recherche plein texte."""
+
+    weight = 2
+
+    @task
+    def search(self):
+        words = random.sample(self.sample.words, random.randint(1, 2))
+        self.get("/bolero/recherche", q=" ".join(words))
+
+
+class Contributeur(BoleroUser):
+    """Écritures authentifiées : ouvrages et relations par lot."""
+
+    weight = 1
+    _ids = count()
+
+    def on_start(self):
+        super().on_start()
+        response = self.client.post(
+            "/auth/login",
+            json={
+                "identifier": os.environ.get("BOLERO_LOAD_USERNAME", "benchmarks"),
+                "type": "username",
+                "password": os.environ.get("BOLERO_LOAD_PASSWORD", "benchmarks"),
+            },
+        )
+        token = response.json()["data"]["token"]
+        self.client.headers["Authorization"] = f"Bearer {token}"
+
+    @task(2)
+    def books_batch(self):
+        rows = []
+        for _ in range(BATCH_SIZE):
+            number = next(self._ids)
+            rows.append(
+                {
+                    "id_proprio": f"CHARGE-{os.getpid()}-{number}",
+                    "titre": " ".join(random.sample(self.sample.words, 4)),
+                    "annee_parution": random.choice(self.sample.years),
+                    "editeur": random.choice(self.sample.editors),
+                    "ean": f"979{os.getpid() % 1000:03d}{number:07d}",
+                }
+            )
+        self.client.post("/bolero/ouvrages/batch", json=rows)
+
+    @task(1)
+    def relations_batch(self):
+        relations = [
+            {
+                "id_auteur": random.choice(self.sample.author_ids),
+                "id_ouvrage": random.choice(self.sample.book_ids),
+            }
+            for _ in range(BATCH_SIZE)
+        ]
+        with self.client.post(
+            "/bolero/relations/batch",
+            json={"relations": relations},
+            catch_response=True,
+        ) as response:
+            # 207 / 409 : une partie ou toutes les relations existaient déjà
+            if response.status_code in (201, 207, 409):
+                response.success()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""
+Exécution des scénarios et comparaison à une campagne de référence.
+
+Chaque scénario est d'abord joué `warmup` fois sans mesure (caches, requêtes compilées), puis
+`iterations` fois. Une mesure couvre la requête complète, lecture du corps de la réponse
+comprise (exports en flux). Le pic de mémoire est celui du processus (ru_maxrss) à la fin du
+scénario : il ne peut que croître d'un scénario à l'autre.
+"""
+# Import from stdlib
+from datetime import datetime, timezone
+from time import perf_counter
+import platform
+import resource
+import subprocess
+import sys
+
+# Imports from external libraries
+from sqlalchemy.event import listen
+
+# Import from local code
+
+
+#: Percentiles enregistrés pour chaque scénario
+PERCENTILES = (50, 90, 95, 99)
+#: Écart absolu en dessous duquel une variation de latence est du bruit, en millisecondes
+NOISE_MS = 1.0
+
+
+def percentile(values, rank):
+    """Percentile `rank` de `values` (triées), au rang le plus proche."""
+    index = max(round(rank / 100 * len(values)) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+def _peak_rss_kib():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # En octets sous macOS, en Kio ailleurs
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _summary(durations, queries, statuses):
+    durations = sorted(durations)
+    summary = {"requetes": len(durations), "statuts": statuses}
+    if not durations:
+        return summary
+    for rank in PERCENTILES:
+        summary[f"p{rank}_ms"] = round(percentile(durations, rank) * 1000, 3)
+    summary["max_ms"] = round(durations[-1] * 1000, 3)
+    summary["moyenne_ms"] = round(sum(durations) / len(durations) * 1000, 3)
+    summary["sql_par_requete"] = round(sum(queries) / len(queries), 2)
+    summary["sql_max"] = max(queries)
+    return summary
+
+
+def run(scenarios, iterations=None, warmup=3, seed=0, echo=print):
+    """
+    Joue `scenarios` contre l'application et renvoie la campagne (métadonnées et mesures par
+    scénario). `iterations` remplace le nombre d'itérations propre à chaque scénario.
+    """
+    from bolero.models import databases
+    from bolero.server import app
+    from bolero.server.modules.bolero._search import catalogue_search
+
+    from .scenarios import Context, login_request
+
+    db = databases.bolero
+    context = Context(db, seed=seed)
+    queries = [0]
+
+    def count_query(*args):
+        queries[0] += 1
+
+    listen(db.engine, "before_cursor_execute", count_query)
+    client = app.test_client()
+    # L'index de recherche est construit avant toute mesure
+    with app.app_context():
+        catalogue_search.index
+
+    if any(scenario.authenticated for scenario in scenarios):
+        response = client.open(**login_request(context))
+        if response.status_code != 200:
+            raise RuntimeError(f"Authentification impossible : {response.get_json()}")
+        context.token = response.get_json()["data"]["token"]
+
+    results = {}
+    for scenario in scenarios:
+        durations, counts, statuses = [], [], {}
+        total = warmup + (iterations or scenario.iterations)
+        for iteration in range(total):
+            request = scenario.build(context)
+            if scenario.authenticated:
+                request["headers"] = {
+                    **request.get("headers", {}),
+                    **context.auth_headers(),
+                }
+            queries[0] = 0
+            started = perf_counter()
+            response = client.open(**request)
+            response.get_data()
+            elapsed = perf_counter() - started
+            if scenario.on_response:
+                scenario.on_response(context, response)
+            if iteration < warmup:
+                continue
+            durations.append(elapsed)
+            counts.append(queries[0])
+            status = str(response.status_code)
+            statuses[status] = statuses.get(status, 0) + 1
+        if scenario.teardown:
+            scenario.teardown(context)
+        summary = _summary(durations, counts, statuses)
+        summary["rss_max_kio"] = _peak_rss_kib()
+        results[scenario.name] = summary
+        echo(
+            f"{scenario.name:<26} p50 {summary['p50_ms']:>9.2f} ms  "
+            f"p95 {summary['p95_ms']:>9.2f} ms  "
+            f"{summary['sql_par_requete']:>6.1f} SQL  {statuses}"
+        )
+
+    return {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "plateforme": platform.platform(),
+            "base": db.engine.dialect.name,
+            "catalogue": context.counts,
+            "graine": seed,
+            "cache_reponses": bool(app.config.response_cache.enabled),
+            "echauffement": warmup,
+        },
+        "scenarios": results,
+    }
+
+
+def compare(current, baseline, tolerance=0.2):
+    """
+    Compare la campagne `current` à `baseline` et renvoie (lignes du rapport, régressions).
+    Régressions : p50 ou p95 plus lent de plus de `tolerance` (et de plus de NOISE_MS), plus
+    de requêtes SQL par requête HTTP ou pic de mémoire plus élevé de plus de `tolerance`.
+    """
+    lines, regressions = [], []
+    for name, now in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None or "p50_ms" not in now or "p50_ms" not in before:
+            lines.append(f"{name:<26} pas de référence")
+            continue
+        problems = []
+        for key in ("p50_ms", "p95_ms"):
+            if (
+                now[key] > before[key] * (1 + tolerance)
+                and now[key] - before[key] > NOISE_MS
+            ):
+                problems.append(f"{key} {before[key]:.2f} -> {now[key]:.2f}")
+        if now["sql_par_requete"] > before["sql_par_requete"]:
+            problems.append(
+                f"SQL {before['sql_par_requete']} -> {now['sql_par_requete']}"
+            )
+        if now["rss_max_kio"] > before["rss_max_kio"] * (1 + tolerance):
+            problems.append(f"RSS {before['rss_max_kio']} -> {now['rss_max_kio']} Kio")
+        ratio = now["p50_ms"] / before["p50_ms"] if before["p50_ms"] else 1
+        line = f"{name:<26} p50 x{ratio:.2f}"
+        if problems:
+            regressions.append(name)
+            line += "  RÉGRESSION : " + ", ".join(problems)
+        lines.append(line)
+    return lines, regressions
@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+"""
+Scénarios des benchmarks : une route de l'api et la façon d'en varier les paramètres.
+
+Les valeurs des filtres sont tirées (avec la graine de la campagne) parmi les valeurs
+présentes dans la base, relevées une fois par `Context`.
+"""
+# Import from stdlib
+from urllib.parse import urlencode
+import random
+
+# Imports from external libraries
+from sqlalchemy import delete, func, select
+
+# Import from local code
+
+
+class Context:
+    """Valeurs de la base et état partagés par les scénarios d'une campagne."""
+
+    def __init__(self, db, seed=0, username="benchmarks", password="benchmarks"):
+        self.db = db
+        self.rng = random.Random(seed)
+        self.username = username
+        self.password = password
+        self.token = None
+        models = db.models
+        with db.engine.connect() as connection:
+
+            def values(column, limit=500):
+                query = select(column).distinct().where(column.isnot(None)).limit(limit)
+                return connection.execute(query).scalars().all()
+
+            def count(model):
+                return connection.execute(select(func.count(model.id))).scalar()
+
+            self.counts = {
+                "auteurs": count(models.Author),
+                "ouvrages": count(models.Book),
+                "recensions": count(models.Review),
+            }
+            self.author_names = values(models.Author.nom)
+            self.editors = values(models.Book.editeur)
+            self.years = values(models.Book.annee_parution)
+            self.journals = values(models.Review.titre_revue)
+            self.eans = values(models.Book.ean, limit=5000)
+            titles = values(models.Book.titre, limit=2000)
+        # Les mots des titres, pour les filtres et la recherche
+        self.words = sorted(
+            {word.lower() for title in titles for word in title.split()}
+        )
+        self.cursor = None
+        self.created_relations = []
+
+    def choice(self, values):
+        return self.rng.choice(values)
+
+    def random_id(self, entity):
+        return self.rng.randint(1, max(self.counts[entity], 1))
+
+    def auth_headers(self):
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+class Scenario:
+    """
+    `build(context)` renvoie les paramètres d'une requête du client de test (method, path,
+    json, headers...) ; `on_response(context, response)` est appelée après chaque requête et
+    `teardown(context)` à la fin du scénario (remise en état de la base après des écritures).
+    """
+
+    def __init__(
+        self,
+        name,
+        description,
+        build,
+        iterations=50,
+        authenticated=False,
+        on_response=None,
+        teardown=None,
+    ):
+        self.name = name
+        self.description = description
+        self.build = build
+        self.iterations = iterations
+        self.authenticated = authenticated
+        self.on_response = on_response
+        self.teardown = teardown
+
+
+def _get(path, **params):
+    params = {name: value for name, value in params.items() if value is not None}
+    return {"method": "GET", "path": f"{path}?{urlencode(params)}" if params else path}
+
+
+################################################################################################
+#   Pagination
+################################################################################################
+PAGE_SIZE = 50
+
+
+def _deep_page(context):
+    # Une des pages du dernier dixième du catalogue
+    pages = max(context.counts["ouvrages"] // PAGE_SIZE, 1)
+    page = context.rng.randint(max(pages - pages // 10, 1), pages)
+    return _get("/bolero/ouvrages", limit=PAGE_SIZE, page=page)
+
+
+def _next_cursor_page(context):
+    return _get("/bolero/ouvrages", limit=PAGE_SIZE, cursor=context.cursor)
+
+
+def _follow_cursor(context, response):
+    # Parcours de tout le catalogue, puis reprise au début
+    context.cursor = (response.get_json() or {}).get("next_cursor")
+
+
+################################################################################################
+#   Écritures
+################################################################################################
+RELATIONS_PER_BATCH = 100
+
+
+def _relations_batch(context):
+    relations = [
+        {
+            "id_auteur": context.random_id("auteurs"),
+            "id_ouvrage": context.random_id("ouvrages"),
+        }
+        for _ in range(RELATIONS_PER_BATCH)
+    ]
+    return {
+        "method": "POST",
+        "path": "/bolero/relations/batch",
+        "json": {"relations": relations},
+    }
+
+
+def _collect_relations(context, response):
+    for result in (response.get_json() or {}).get("results", []):
+        if result.get("status") == 201:
+            context.created_relations.append(result["result"]["id"])
+
+
+def _delete_relations(context):
+    model = context.db.models.AuthorBook
+    session = context.db.session
+    try:
+        session.execute(delete(model).where(model.id.in_(context.created_relations)))
+        session.commit()
+    finally:
+        session.close()
+    context.created_relations = []
+
+
+def login_request(context):
+    return {
+        "method": "POST",
+        "path": "/auth/login",
+        "json": {
+            "identifier": context.username,
+            "type": "username",
+            "password": context.password,
+        },
+    }
+
+
+SCENARIOS = [
+    Scenario(
+        "auteurs-liste",
+        "Première page des auteurs",
+        lambda context: _get("/bolero/auteurs", limit=20),
+    ),
+    Scenario(
+        "auteurs-filtre-nom",
+        "Auteurs filtrés par nom",
+        lambda context: _get(
+            "/bolero/auteurs", nom=context.choice(context.author_names), limit=20
+        ),
+    ),
+    Scenario(
+        "ouvrages-filtres",
+        "Ouvrages filtrés par éditeur et année de parution",
+        lambda context: _get(
+            "/bolero/ouvrages",
+            editeur=context.choice(context.editors),
+            annee_parution=context.choice(context.years),
+            limit=20,
+        ),
+    ),
+    Scenario(
+        "ouvrages-filtre-titre",
+        "Ouvrages filtrés par un mot du titre",
+        lambda context: _get(
+            "/bolero/ouvrages", titre=context.choice(context.words), limit=20
+        ),
+    ),
+    Scenario(
+        "ouvrages-filtre-auteur",
+        "Ouvrages filtrés par nom d'auteur (jointure)",
+        lambda context: _get(
+            "/bolero/ouvrages",
+            auteur_nom=context.choice(context.author_names),
+            limit=20,
+        ),
+    ),
+    Scenario(
+        "recensions-filtres",
+        "Recensions filtrées par revue et année",
+        lambda context: _get(
+            "/bolero/recensions",
+            titre_revue=context.choice(context.journals),
+            annee=context.choice(context.years),
+            limit=20,
+        ),
+    ),
+    Scenario(
+        "ouvrages-page-profonde",
+        f"Une page de {PAGE_SIZE} ouvrages du dernier dixième (LIMIT/OFFSET)",
+        _deep_page,
+    ),
+    Scenario(
+        "ouvrages-curseur",
+        f"Pages successives de {PAGE_SIZE} ouvrages par curseur",
+        _next_cursor_page,
+        iterations=100,
+        on_response=_follow_cursor,
+    ),
+    Scenario(
+        "ouvrage-detail",
+        "Un ouvrage par id",
+        lambda context: _get(f"/bolero/ouvrages/{context.random_id('ouvrages')}"),
+    ),
+    Scenario(
+        "ouvrage-par-ean",
+        "Un ouvrage par EAN",
+        lambda context: _get(f"/bolero/ouvrages/by-ean/{context.choice(context.eans)}"),
+        iterations=100,
+    ),
+    Scenario(
+        "recherche",
+        "Recherche plein texte d'un mot des titres",
+        lambda context: _get("/bolero/recherche", q=context.choice(context.words)),
+    ),
+    Scenario(
+        "ouvrages-export-filtre",
+        "Export CSV des ouvrages d'un éditeur",
+        lambda context: _get(
+            "/bolero/ouvrages/export", editeur=context.choice(context.editors)
+        ),
+        iterations=10,
+    ),
+    Scenario(
+        "auteurs-export",
+        "Export CSV de tous les auteurs",
+        lambda context: _get("/bolero/auteurs/export"),
+        iterations=5,
+    ),
+    Scenario(
+        "relations-batch",
+        f"Création de {RELATIONS_PER_BATCH} relations auteur-ouvrage par lot",
+        _relations_batch,
+        iterations=20,
+        authenticated=True,
+        on_response=_collect_relations,
+        teardown=_delete_relations,
+    ),
+    Scenario(
+        "login", "Authentification par mot de passe", login_request, iterations=20
+    ),
+]
@@ -6,11 +6,97 @@ DOC
 # Import from stdlib
 
 # Imports from external libraries
+from sqlalchemy import Index, UniqueConstraint, func, inspect, select
+from sqlalchemy.schema import AddConstraint, CreateIndex, CreateTable
 import click
 
 # Import from local code
 from bolero.models import databases
 from bolero.server import app
+from bolero.server.modules.bolero._cache import response_cache
+from bolero.server.modules.bolero._import import CatalogueImporter, file_type
+from bolero.server.modules.bolero._schema import (
+    RESPONSE_SCHEMAS,
+    load_options,
+    serializer,
+    sparse_fields,
+)
+from core.services.tools_belt import chunkinze
+
+
+def declared_indexes(table):
+    """Les index et contraintes d'unicité nommées déclarés sur `table`."""
+    constraints = [
+        constraint
+        for constraint in table.constraints
+        if isinstance(constraint, UniqueConstraint) and constraint.name
+    ]
+    return [*table.indexes, *constraints]
+
+
+def index_statement(engine, index):
+    """
+    La création de `index` ; pour MySQL, sans bloquer les écritures sur la table (InnoDB).
+    """
+    online = engine.dialect.name == "mysql"
+    if isinstance(index, Index):
+        statement = str(CreateIndex(index).compile(engine))
+        return f"{statement} ALGORITHM=INPLACE LOCK=NONE" if online else statement
+    if online:
+        statement = str(AddConstraint(index).compile(engine))
+        return f"{statement}, ALGORITHM=INPLACE, LOCK=NONE"
+    # Les autres bases (sqlite) n'ajoutent pas de contrainte à une table existante
+    quote = engine.dialect.identifier_preparer.quote
+    columns = ", ".join(quote(column.name) for column in index.columns)
+    return (
+        f"CREATE UNIQUE INDEX {quote(index.name)} "
+        f"ON {quote(index.table.name)} ({columns})"
+    )
+
+
+def duplicate_ids(connection, table, columns):
+    """Les id des lignes de `table` en doublon sur `columns` (sauf la première de chacune)."""
+    kept = select(func.min(table.c.id)).group_by(*columns)
+    query = select(table.c.id).where(table.c.id.notin_(kept.scalar_subquery()))
+    return connection.execute(query).scalars().all()
+
+
+def check_serializer_parity(session, limit=500, echo=click.echo):
+    """
+    Compare la sortie des sérialiseurs précompilés à celle de marshmallow sur les `limit`
+    premières lignes de chaque schéma de RESPONSE_SCHEMAS, en réponse complète et sans les
+    relations. Lève une ClickException à la moindre différence, ou si aucune ligne n'a été
+    vérifiée.
+    """
+    failed = False
+    checked = 0
+    for schema_class in RESPONSE_SCHEMAS:
+        variants = {None: "complet"}
+        without_relations = sparse_fields(schema_class, expand="")
+        if len(without_relations) < len(serializer(schema_class).schema.dump_fields):
+            variants[without_relations] = "sans relations"
+        for only, variant in variants.items():
+            item_serializer = serializer(schema_class, only)
+            query = session.query(item_serializer.schema.opts.model)
+            query = query.options(*load_options(item_serializer.schema))
+            items = query.limit(limit).all()
+            differences = item_serializer.check(items, many=True)
+            status = "compilé" if item_serializer.compiled else "marshmallow"
+            echo(
+                f"{schema_class.__name__} {variant} ({status}) : {len(items)} lignes, "
+                f"{len(differences)} différence(s)"
+            )
+            for path, expected, actual in differences[:10]:
+                echo(f"    {path} : attendu {expected!r}, obtenu {actual!r}")
+            failed = failed or bool(differences)
+            checked += len(items)
+
+    if failed:
+        raise click.ClickException(
+            "Les sérialiseurs précompilés diffèrent de marshmallow."
+        )
+    if not checked:
+        raise click.ClickException("Aucune ligne vérifiée : la base est vide.")
 
 
 def setup(app, cli_group):
@@ -27,3 +113,144 @@ def setup(app, cli_group):
             databases.bolero.create_all()
 
         print("Database and tables successfully created.")
+
+    @cli_group.command("reindex-search")
+    @click.option("--batch-size", default=1000, help="Nombre de lignes par insertion")
+    @click.option(
+        "--if-empty",
+        is_flag=True,
+        help="Ne reconstruire que si la table des clés est absente ou vide",
+    )
+    def reindex_search(batch_size, if_empty):
+        """Rebuild the accent and case insensitive search keys"""
+        with app.app_context():
+            session = databases.bolero.session
+            search_key = databases.bolero.models.SearchKey
+            if (
+                if_empty
+                and inspect(databases.bolero.engine).has_table(search_key.__tablename__)
+                and session.query(search_key.id).first() is not None
+            ):
+                click.echo("Clés de recherche déjà construites.")
+                return
+            search_key.rebuild(session, batch_size=batch_size)
+            count = session.query(search_key).count()
+
+        click.echo(f"{count} clés de recherche reconstruites.")
+
+    @cli_group.command("import")
+    @click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+    @click.option("--batch-size", default=1000, help="Nombre d'enregistrements par lot")
+    @click.option(
+        "--workers", default=0, help="Processus de décodage et validation (0 : aucun)"
+    )
+    @click.option(
+        "--resume/--restart",
+        default=True,
+        help="Reprendre un import interrompu (fichier .checkpoint)",
+    )
+    def import_files(paths, batch_size, workers, resume):
+        """Import NDJSON or CSV files (optionally gzipped) of authors, books, reviews
+        and relations, named after their content: auteurs, ouvrages, recensions,
+        auteurs-ouvrages, auteurs-recensions, ouvrages-recensions"""
+        try:
+            for path in paths:
+                file_type(path)
+        except ValueError as error:
+            raise click.BadParameter(str(error))
+        with app.app_context():
+            importer = CatalogueImporter(
+                databases.bolero.session,
+                batch_size=batch_size,
+                workers=workers,
+                resume=resume,
+                echo=click.echo,
+            )
+            stats = importer.run(paths)
+
+        if any(file_stats["erreurs"] for file_stats in stats):
+            raise click.ClickException("Des enregistrements n'ont pas été importés.")
+
+    @cli_group.command("migrate-indexes")
+    @click.option(
+        "--dry-run", is_flag=True, help="Afficher les requêtes sans les exécuter"
+    )
+    @click.option(
+        "--drop-duplicates",
+        is_flag=True,
+        help="Supprimer les doublons qui empêchent la création d'un index unique",
+    )
+    def migrate_indexes(dry_run, drop_duplicates):
+        """Create the tables and indexes declared on the models that are missing in the
+        database"""
+        with app.app_context():
+            engine = databases.bolero.engine
+            inspector = inspect(engine)
+            created = 0
+            created_tables = []
+            skipped = []
+            for table in databases.bolero.metadata.sorted_tables:
+                if not inspector.has_table(table.name, schema=table.schema):
+                    # Table ajoutée aux modèles (cle_recherche) : créée avec ses index
+                    click.echo(str(CreateTable(table).compile(engine)).strip())
+                    for index in table.indexes:
+                        click.echo(str(CreateIndex(index).compile(engine)))
+                    if not dry_run:
+                        table.create(engine)
+                        created_tables.append(table.name)
+                    continue
+                existing = {
+                    index["name"]
+                    for index in inspector.get_indexes(table.name, schema=table.schema)
+                }
+                existing.update(
+                    constraint["name"]
+                    for constraint in inspector.get_unique_constraints(
+                        table.name, schema=table.schema
+                    )
+                )
+                for index in declared_indexes(table):
+                    if index.name in existing:
+                        continue
+                    with engine.begin() as connection:
+                        if isinstance(index, UniqueConstraint) or index.unique:
+                            duplicates = duplicate_ids(
+                                connection, table, list(index.columns)
+                            )
+                            if duplicates and not drop_duplicates:
+                                skipped.append(index.name)
+                                click.echo(
+                                    f"{index.name} : {len(duplicates)} doublons dans "
+                                    f"{table.name} (voir --drop-duplicates)"
+                                )
+                                continue
+                            if duplicates:
+                                click.echo(
+                                    f"{table.name} : suppression de "
+                                    f"{len(duplicates)} doublons"
+                                )
+                                if not dry_run:
+                                    for chunk in chunkinze(duplicates, 1000):
+                                        connection.execute(
+                                            table.delete().where(table.c.id.in_(chunk))
+                                        )
+                        statement = index_statement(engine, index)
+                        click.echo(statement)
+                        if not dry_run:
+                            connection.exec_driver_sql(statement)
+                            created += 1
+            if created or created_tables:
+                response_cache.clear()
+
+        click.echo(f"{len(created_tables)} table(s) et {created} index créé(s).")
+        if databases.bolero.models.SearchKey.__tablename__ in created_tables:
+            click.echo("Clés de recherche à construire : flask db reindex-search")
+        if skipped:
+            raise click.ClickException(f"Index non créés : {', '.join(skipped)}")
+
+    @cli_group.command("check-serializers")
+    @click.option("--limit", default=500, help="Nombre de lignes vérifiées par schéma")
+    def check_serializers(limit):
+        """Compare the precompiled serializers output with marshmallow"""
+        with app.app_context():
+            check_serializer_parity(databases.bolero.session, limit)
@@ -12,16 +12,34 @@ from sqlalchemy import (
     String,
     ForeignKey,
     Date,
+    Index,
+    UniqueConstraint,
+    inspect,
 )
+from sqlalchemy.event import listen
 from sqlalchemy.orm import relationship
 
 # Import from local code
 from core.models.mixins import CommonMixin, PasswordMixin
+from core.services.tools_belt import search_tokens
+
+
+# Colonnes indexées pour la recherche insensible à la casse et aux accents, par modèle
+SEARCH_FIELDS = {
+    "Author": ("nom", "prenom"),
+    "Book": ("titre", "sous_titre"),
+    "Review": ("titre", "titre_revue"),
+}
+SEARCH_TOKEN_LENGTH = 64
 
 
 def setup(db):
     class Author(CommonMixin, db.Model):
         __tablename__ = "auteur"
+        __table_args__ = (
+            Index("ix_auteur_nom_prenom", "nom", "prenom"),
+            {"extend_existing": True},
+        )
 
         # Colonnes
         id_proprio = Column(
@@ -42,6 +60,15 @@ def setup(db):
 
     class Book(CommonMixin, db.Model):
         __tablename__ = "ouvrage"
+        __table_args__ = (
+            Index("ix_ouvrage_ean", "ean"),
+            Index("ix_ouvrage_annee_parution", "annee_parution"),
+            Index("ix_ouvrage_editeur", "editeur"),
+            Index("ix_ouvrage_doi", "doi"),
+            # Préfixe : une clé d'index InnoDB est limitée à 3072 octets
+            Index("ix_ouvrage_titre", "titre", mysql_length=255),
+            {"extend_existing": True},
+        )
 
         id_proprio = Column(
             String(128),
@@ -75,6 +102,19 @@ def setup(db):
 
     class Review(CommonMixin, db.Model):
         __tablename__ = "recension"
+        __table_args__ = (
+            Index(
+                "ix_recension_titre_revue_annee",
+                "titre_revue",
+                "annee",
+                mysql_length={"titre_revue": 255},
+            ),
+            Index("ix_recension_annee", "annee"),
+            Index("ix_recension_date_parution", "date_parution"),
+            Index("ix_recension_doi", "doi"),
+            Index("ix_recension_titre", "titre", mysql_length=255),
+            {"extend_existing": True},
+        )
 
         id_proprio = Column(
             String(128),
@@ -115,6 +155,12 @@ def setup(db):
 
     class AuthorBook(CommonMixin, db.Model):
         __tablename__ = "auteur_ouvrage"
+        __table_args__ = (
+            # Une relation par couple, et un index par sens de jointure
+            UniqueConstraint("id_auteur", "id_ouvrage", name="uq_auteur_ouvrage"),
+            Index("ix_auteur_ouvrage_id_ouvrage", "id_ouvrage", "id_auteur"),
+            {"extend_existing": True},
+        )
 
         id_auteur = Column(Integer, ForeignKey("auteur.id"), nullable=False)
         id_ouvrage = Column(Integer, ForeignKey("ouvrage.id"), nullable=False)
@@ -125,6 +171,12 @@ def setup(db):
 
     class AuthorReview(CommonMixin, db.Model):
         __tablename__ = "auteur_recension"
+        __table_args__ = (
+            # Une relation par couple, et un index par sens de jointure
+            UniqueConstraint("id_auteur", "id_recension", name="uq_auteur_recension"),
+            Index("ix_auteur_recension_id_recension", "id_recension", "id_auteur"),
+            {"extend_existing": True},
+        )
 
         id_auteur = Column(Integer, ForeignKey("auteur.id"), nullable=False)
         id_recension = Column(Integer, ForeignKey("recension.id"), nullable=False)
@@ -135,6 +187,12 @@ def setup(db):
 
     class BookReview(CommonMixin, db.Model):
         __tablename__ = "ouvrage_recension"
+        __table_args__ = (
+            # Une relation par couple, et un index par sens de jointure
+            UniqueConstraint("id_ouvrage", "id_recension", name="uq_ouvrage_recension"),
+            Index("ix_ouvrage_recension_id_recension", "id_recension", "id_ouvrage"),
+            {"extend_existing": True},
+        )
 
         id_ouvrage = Column(Integer, ForeignKey("ouvrage.id"), nullable=False)
         id_recension = Column(Integer, ForeignKey("recension.id"), nullable=False)
@@ -151,10 +209,120 @@ def setup(db):
 
     class Editor(CommonMixin, db.Model):
         __tablename__ = "editeur"
+        __table_args__ = (Index("ix_editeur_nom", "nom"), {"extend_existing": True})
 
         nom = Column(String(256), nullable=False)
 
     class Journal(CommonMixin, db.Model):
         __tablename__ = "revue"
+        __table_args__ = (Index("ix_revue_titre", "titre"), {"extend_existing": True})
 
         titre = Column(String(256), nullable=False)
+
+    class SearchKey(db.Model):
+        """
+        Mots normalisés (voir `search_tokens`) des colonnes de SEARCH_FIELDS.
+        Une recherche par préfixe de mot devient un parcours de l'index (entite, champ, jeton)
+        au lieu d'un LIKE '%...%' sur toute la table.
+        """
+
+        __tablename__ = "cle_recherche"
+        __table_args__ = (
+            Index("ix_cle_recherche_jeton", "entite", "champ", "jeton"),
+            Index("ix_cle_recherche_entite", "entite", "id_entite"),
+            {"extend_existing": True},
+        )
+
+        id = Column(Integer, primary_key=True)
+        entite = Column(String(32), nullable=False, comment="Table de l'entité")
+        id_entite = Column(Integer, nullable=False, comment="ID de l'entité")
+        champ = Column(String(32), nullable=False, comment="Colonne indexée")
+        jeton = Column(
+            String(SEARCH_TOKEN_LENGTH), nullable=False, comment="Mot normalisé"
+        )
+
+        @classmethod
+        def rebuild(cls, session, batch_size=1000):
+            """
+            Reconstruit entièrement la table à partir des données existantes, après l'avoir
+            créée si elle n'existe pas encore.
+            """
+            cls.__table__.create(session.get_bind(cls), checkfirst=True)
+            session.execute(cls.__table__.delete())
+            for model in (Author, Book, Review):
+                fields = SEARCH_FIELDS[model.__name__]
+                columns = [getattr(model, field) for field in fields]
+                rows = []
+                for target in session.query(model.id, *columns).yield_per(batch_size):
+                    rows.extend(search_key_rows(model, target))
+                    if len(rows) >= batch_size:
+                        session.execute(cls.__table__.insert(), rows)
+                        rows = []
+                if rows:
+                    session.execute(cls.__table__.insert(), rows)
+            session.commit()
+
+        @classmethod
+        def refresh(cls, session, model, targets):
+            """
+            Remplace les mots des entités `targets` de `model` (lignes avec l'id et les colonnes
+            de SEARCH_FIELDS) écrites sans passer par l'ORM, donc sans ses évènements.
+            """
+            table = cls.__table__
+            targets = list(targets)
+            if not targets:
+                return
+            session.execute(
+                table.delete()
+                .where(table.c.entite == model.__tablename__)
+                .where(table.c.id_entite.in_([target.id for target in targets]))
+            )
+            rows = [row for target in targets for row in search_key_rows(model, target)]
+            if rows:
+                session.execute(table.insert(), rows)
+
+    def search_key_rows(model, target):
+        rows = []
+        for field in SEARCH_FIELDS[model.__name__]:
+            for token in set(search_tokens(getattr(target, field))):
+                rows.append(
+                    {
+                        "entite": model.__tablename__,
+                        "id_entite": target.id,
+                        "champ": field,
+                        "jeton": token[:SEARCH_TOKEN_LENGTH],
+                    }
+                )
+        return rows
+
+    def delete_search_keys(connection, model, target):
+        table = SearchKey.__table__
+        connection.execute(
+            table.delete()
+            .where(table.c.entite == model.__tablename__)
+            .where(table.c.id_entite == target.id)
+        )
+
+    def make_listeners(model):
+        def after_insert(mapper, connection, target):
+            rows = search_key_rows(model, target)
+            if rows:
+                connection.execute(SearchKey.__table__.insert(), rows)
+
+        def after_update(mapper, connection, target):
+            state = inspect(target)
+            fields = SEARCH_FIELDS[model.__name__]
+            if not any(state.attrs[field].history.has_changes() for field in fields):
+                return
+            delete_search_keys(connection, model, target)
+            after_insert(mapper, connection, target)
+
+        def after_delete(mapper, connection, target):
+            delete_search_keys(connection, model, target)
+
+        listen(model, "after_insert", after_insert)
+        listen(model, "after_update", after_update)
+        listen(model, "after_delete", after_delete)
+
+    for model in (Author, Book, Review):
+        make_listeners(model)
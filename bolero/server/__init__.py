@@ -8,7 +8,6 @@ import pkgutil
 # Imports from external libraries
 from box import Box
 from flask import Flask, Response, g
-from flask_jwt_extended import current_user
 
 from path import Path
 from sentry_sdk import set_user as set_user_sentry
@@ -21,6 +20,7 @@ import sentry_sdk
 from bolero.models import databases
 from config import settings
 from core.server import CoreServer
+from core.server.metrics import metrics
 from core.server.flask_littledb import LittleDB
 from core.services.tools_belt import RemapWsgiEnvMiddleware
 
@@ -40,6 +40,7 @@ core = CoreServer(
 )
 
 littleDB = LittleDB(app)
+metrics.watch_engine(databases.bolero.engine, "bolero")
 
 # Chargement des modules
 core.init_modules(
@@ -79,13 +80,15 @@ def inject_services():
     Injection de différents services
     """
 
-    # Ajout des informations utilisateur à Sentry
-    if current_user:
+    # Ajout des informations utilisateur à Sentry (utilisateur déjà chargé par le module
+    # d'authentification, voir `inject_user`)
+    user = g.get("current_user")
+    if sentry_config.enabled and user:
         set_user_sentry(
             {
-                "id": current_user.id,
-                "username": f"{current_user.username}",
-                # "email": current_user.email,
+                "id": user.id,
+                "username": f"{user.username}",
+                # "email": user.email,
                 "ip": "{{auto}}",
             }
         )
@@ -93,8 +96,7 @@ def inject_services():
 
 @app.teardown_appcontext
 def teardown_sql(error=None):
-    databases.disconnect()
-    databases.close_all()
+    databases.teardown()
 
 
 @app.route("/ping")
@@ -14,6 +14,12 @@ from .reviews import Reviews
 from .relations import Relations
 from .editors import Editors
 from .journals import Journals
+from .search import Search
+from .exports import ExportStatus, ExportFile
+from ._common import export_spool
+from ._search import catalogue_search
+from ._cache import response_cache
+from core.services.serializers import CompiledSerializer
 from core.server.documentation.models import (
     ns_authors,
     ns_books,
@@ -21,6 +27,8 @@ from core.server.documentation.models import (
     ns_relations,
     ns_editors,
     ns_journals,
+    ns_search,
+    ns_exports,
 )
 
 
@@ -31,3 +39,9 @@ def setup_resources(api, app):
     api.add_namespace(ns_relations, path=f"/bolero")
     api.add_namespace(ns_editors, path=f"/bolero")
     api.add_namespace(ns_journals, path=f"/bolero")
+    api.add_namespace(ns_search, path=f"/bolero")
+    api.add_namespace(ns_exports, path=f"/bolero")
+    CompiledSerializer.enabled = app.config.COMPILED_SERIALIZERS
+    export_spool.init_app(app)
+    response_cache.init_app(app)
+    catalogue_search.init_app(app)
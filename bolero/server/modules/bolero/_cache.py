@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+"""
+Cache des réponses des GET du catalogue (RESPONSE_CACHE).
+
+Une réponse est identifiée par la route, ses paramètres et les en-têtes Attribute-Convention et
+X-Fields. Seules les réponses 200 sont mises en cache, avec leurs en-têtes (ETag... : une requête
+conditionnelle servie par le cache reçoit directement sa 304), et des étiquettes :
+    * détails : les lignes chargées pour les calculer ("ouvrage:3", "auteur_ouvrage:12"...) ;
+    * listes : les tables de la ressource ("ouvrage"...), une insertion pouvant changer une liste ;
+    * dans les deux cas "bulk:<table>" : un UPDATE ou DELETE en masse ne dit pas quelles lignes
+      il modifie.
+
+Les écritures sont relevées par les évènements SQLAlchemy (lignes modifiées, ainsi que les lignes
+référencées par une relation) et les étiquettes correspondantes invalidées au commit de la
+session (oubliées en cas de rollback).
+"""
+# Import from stdlib
+from contextvars import ContextVar
+from functools import wraps
+import json
+
+# Imports from external libraries
+from flask import current_app, request
+from sqlalchemy import inspect
+from sqlalchemy.event import listen
+from sqlalchemy.orm import Session, object_session
+
+# Import from local code
+from bolero.models import databases
+from core.server.conditional import not_modified
+from core.server.metrics import metrics
+from core.services.response_cache import MemoryCacheBackend, SqliteCacheBackend
+
+
+cache_requests = metrics.counter(
+    "cache_requests_total", "Consultations des caches", ("cache", "result")
+)
+
+
+#: Modèles dont les écritures invalident le cache
+MODELS = (
+    "Author",
+    "Book",
+    "Review",
+    "AuthorBook",
+    "AuthorReview",
+    "BookReview",
+    "Editor",
+    "Journal",
+)
+
+#: Tables dont dépendent les réponses des auteurs, ouvrages et recensions
+CATALOGUE_TABLES = (
+    "auteur",
+    "ouvrage",
+    "recension",
+    "auteur_ouvrage",
+    "auteur_recension",
+    "ouvrage_recension",
+)
+
+_SESSION_KEY = "response_cache"
+
+#: Étiquettes des lignes chargées pendant le calcul d'une réponse
+_loaded_tags = ContextVar("response_cache_loaded_tags", default=None)
+
+
+class ResponseCache:
+    def __init__(self):
+        self.enabled = False
+        self.backend = None
+
+    def init_app(self, app):
+        config = app.config["RESPONSE_CACHE"]
+        if config.backend == "memory":
+            self.backend = MemoryCacheBackend(maxsize=config.maxsize, ttl=config.ttl)
+        elif config.backend == "sqlite":
+            self.backend = SqliteCacheBackend(
+                config.path, maxsize=config.maxsize, ttl=config.ttl
+            )
+        else:
+            raise ValueError(f"Unknown response cache backend: {config.backend}")
+        self.enabled = config.enabled
+
+    @staticmethod
+    def request_key():
+        """La requête en cours : route, paramètres et en-têtes qui changent la réponse."""
+        mask_header = current_app.config.get("RESTX_MASK_HEADER", "X-Fields")
+        return json.dumps(
+            [
+                request.path,
+                sorted(request.args.items(multi=True)),
+                request.headers.get("Attribute-Convention"),
+                request.headers.get(mask_header),
+            ]
+        )
+
+    def cached(self, tables, detail=False):
+        """
+        Met en cache la réponse de la méthode GET décorée.
+        `tables` sont les tables dont dépend la réponse ; pour un détail (`detail`), seules les
+        lignes chargées et les écritures en masse sur ces tables l'invalident.
+        """
+        bulk_tags = {f"bulk:{table}" for table in tables}
+
+        def decorator(meth):
+            @wraps(meth)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return meth(*args, **kwargs)
+                key = self.request_key()
+                try:
+                    cached = self.backend.get(key)
+                    generation = self.backend.generation()
+                except Exception:
+                    current_app.logger.exception("Cache des réponses indisponible")
+                    return meth(*args, **kwargs)
+                cache_requests.inc(cache="reponses", result="hit" if cached else "miss")
+                if cached is not None:
+                    body, headers = cached
+                    return not_modified(headers) or (body, 200, headers)
+
+                loaded = set()
+                token = _loaded_tags.set(loaded)
+                try:
+                    response = meth(*args, **kwargs)
+                finally:
+                    _loaded_tags.reset(token)
+
+                if isinstance(response, tuple):
+                    body, status, headers = (*response, None)[:3]
+                else:
+                    body, status, headers = response, 200, None
+                if status != 200 or not isinstance(body, dict):
+                    return response
+                tags = (loaded if detail else set(tables)) | bulk_tags
+                try:
+                    self.backend.set(key, [body, headers or {}], tags, generation)
+                except Exception:
+                    current_app.logger.exception(
+                        "Mise en cache de la réponse impossible"
+                    )
+                return response
+
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, tags):
+        if self.backend is not None:
+            self.backend.invalidate(tags)
+
+    def clear(self):
+        """Vide le cache, pour les écritures faites sans passer par la session."""
+        if self.backend is not None:
+            self.backend.clear()
+
+
+response_cache = ResponseCache()
+
+
+####################################################################################################
+#   Évènements SQLAlchemy
+####################################################################################################
+def _pending(session):
+    return session.info.setdefault(_SESSION_KEY, set())
+
+
+def _row_tags(target):
+    """
+    L'étiquette de la ligne, de sa table et des lignes qu'elle référence (avant et après
+    modification, pour une relation dont on change une extrémité).
+    """
+    mapper = inspect(target).mapper
+    table = mapper.local_table.name
+    tags = {table, f"{table}:{target.id}"}
+    state = inspect(target)
+    for column in mapper.local_table.columns:
+        for foreign_key in column.foreign_keys:
+            history = state.attrs[mapper.get_property_by_column(column).key].history
+            referenced = foreign_key.column.table.name
+            for value in (*history.unchanged, *history.added, *history.deleted):
+                if value is not None:
+                    tags.add(f"{referenced}:{value}")
+    return tags
+
+
+def _listen_model(model):
+    table = model.__tablename__
+
+    def on_load(target, context):
+        loaded = _loaded_tags.get()
+        if loaded is not None:
+            loaded.add(f"{table}:{target.id}")
+
+    def on_write(mapper, connection, target):
+        _pending(object_session(target)).update(_row_tags(target))
+
+    listen(model, "load", on_load)
+    listen(model, "after_insert", on_write)
+    listen(model, "after_update", on_write)
+    listen(model, "after_delete", on_write)
+
+
+def _on_orm_execute(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        table = state.statement.table.name
+        if table in _tables:
+            _pending(state.session).update({table, f"bulk:{table}"})
+
+
+def _after_commit(session):
+    tags = session.info.pop(_SESSION_KEY, None)
+    if tags:
+        response_cache.invalidate(tags)
+
+
+def _after_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
+
+
+_tables = set()
+for _name in MODELS:
+    _model = getattr(databases.bolero.models, _name)
+    _tables.add(_model.__tablename__)
+    _listen_model(_model)
+listen(Session, "do_orm_execute", _on_orm_execute)
+listen(Session, "after_commit", _after_commit)
+listen(Session, "after_rollback", _after_rollback)
@@ -3,21 +3,47 @@
 DOC
 """
 # Import from stdlib
-from flask import Response, request
-from datetime import datetime
+from flask import (
+    Response,
+    current_app,
+    request,
+    send_file,
+    stream_with_context,
+    url_for,
+)
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
 from werkzeug.exceptions import BadRequest
-from collections import defaultdict
+from flask_restx.mask import Mask
+from collections import Counter, defaultdict
+from functools import partial
+from itertools import islice
 from math import ceil
+import json
 
 # Imports from external libraries
-from sqlalchemy import extract, func
-from sqlalchemy.orm import joinedload
+from sqlalchemy import (
+    and_,
+    delete,
+    extract,
+    func,
+    insert,
+    or_,
+    select,
+    text,
+    true,
+    tuple_,
+)
 from marshmallow import Schema
 
 # Import from local code
 from bolero.models import databases
+from bolero.models.bolero import SEARCH_TOKEN_LENGTH
+from core.models.utils import normalize_keys
+from core.server.conditional import not_modified, validators
 from core.server.modules.auth import auth_required
 from core.server.views import Resource
+from core.services.exports import ExportSpool
 from ._schema import (
     AuthorResponseSchema,
     BookResponseSchema,
@@ -27,11 +53,42 @@ from ._schema import (
     BookReviewResponseSchema,
     EditorResponseSchema,
     JournalResponseSchema,
+    load_options,
+    serializer,
+    sparse_fields,
+)
+from ._cache import CATALOGUE_TABLES, response_cache
+from ._import import IMPORT_KEYS, import_columns, upsert_rows, validate_row
+from ._search import ENTITIES as SEARCH_ENTITIES, catalogue_search
+from core.services.tools_belt import (
+    humps,
+    generate_csv_stream,
+    search_tokens,
+    chunkinze,
+    TTLCache,
 )
-from core.services.tools_belt import humps, generate_csv_stream
+
+
+#: Les paramètres qui ne filtrent pas les résultats d'une liste
+PAGINATION_PARAMS = ("limit", "page", "sort", "order", "cursor")
+
+#: Types des corps NDJSON acceptés par les imports par lot
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+#: Totaux des listes, par ressource et par jeu de filtres (stratégie "cached")
+_count_cache = TTLCache(maxsize=2048)
+
+#: Exports exécutés en tâche de fond (?asynchrone=true)
+export_spool = ExportSpool()
 
 
 class BaseResource(Resource):
+    #: Clé de la ressource dans la configuration LIST_TOTAL.resources
+    resource_name = None
+    #: Colonnes identifiant une ligne d'un import par lot, par ordre de priorité
+    import_keys = ("id_proprio",)
+    #: Nombre de lignes par requête des imports par lot
+    import_batch_size = 1000
 
     @property
     def db(self):
@@ -69,6 +126,10 @@ class BaseResource(Resource):
     def Journal(self):
         return self.db.models.Journal
 
+    @property
+    def SearchKey(self):
+        return self.db.models.SearchKey
+
     @property
     def query_author(self):
         return self.db.queries.Author
@@ -180,6 +241,7 @@ class BaseResource(Resource):
         new_item = model(**params)
         db.add(new_item)
         db.commit()
+        self._invalidate_counts()
         new_item_id = new_item.id
         return {"message": message, "id": new_item_id}, 201
 
@@ -192,6 +254,7 @@ class BaseResource(Resource):
                 setattr(existing_item, key, value)
             db.save(existing_item)
             db.commit()
+            self._invalidate_counts()
             return {
                 "message": f"{item} mis à jour avec succès",
                 "id": existing_item.id,
@@ -221,25 +284,424 @@ class BaseResource(Resource):
 
             db.delete(existing_item)
             db.commit()
+            self._invalidate_counts()
             return "", 204
         else:
             return {"message": f"{item} introuvable"}, 404
 
-    def _get_item_by_id(self, id: int, item_type, query_model, schema):
-        item = query_model.get(id)
+    ####################################################################################################
+    #   Imports par lot
+    ####################################################################################################
+    def _import_rows(self):
+        """
+        Les lignes envoyées à une route /batch : un tableau JSON, ou du NDJSON (un objet JSON par
+        ligne) lu au fil de l'eau. Une ligne NDJSON illisible est remplacée par son erreur.
+        """
+        if request.mimetype in NDJSON_MIMETYPES:
+            for line in request.stream:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as error:
+                    yield error
+            return
+        rows = request.get_json(silent=True)
+        if not isinstance(rows, list):
+            raise BadRequest(
+                "Le corps de la requête doit être un tableau JSON ou du NDJSON"
+            )
+        yield from rows
+
+    def _import_batch(self, model):
+        """
+        Crée ou met à jour (upsert) les lignes de `model` envoyées à une route /batch, par
+        INSERT ... ON DUPLICATE KEY UPDATE multi-lignes (`SQLQuery.upsert`) de
+        `import_batch_size` lignes au plus, dans une seule transaction.
+        Une ligne est identifiée par la première colonne de `import_keys` qu'elle renseigne ;
+        les lignes d'un même lot ayant la même clé sont fusionnées.
+        """
+        validation_schema = model.marshmallow()
+        columns = import_columns(model)
+        results = []
+        rows = self._import_rows()
+        try:
+            while chunk := list(islice(rows, self.import_batch_size)):
+                results.extend(
+                    self._import_chunk(
+                        model, validation_schema, columns, chunk, len(results)
+                    )
+                )
+            self.db.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+        if not results:
+            raise BadRequest("Aucune ligne à importer")
+        self._invalidate_counts()
+
+        statuses = Counter(result["status"] for result in results)
+        errors = len(results) - statuses[201] - statuses[200]
+        message = f"{statuses[201]} créations, {statuses[200]} mises à jour"
+        if errors:
+            message += f", erreurs sur {errors}"
+        return {"message": message, "results": results}, (207 if errors else 200)
+
+    def _import_chunk(self, model, validation_schema, columns, rows, start):
+        """
+        Importe un lot de lignes (voir `upsert_rows`) et renvoie le résultat de chacune :
+        201 créée, 200 mise à jour, 422 invalide ou 400 illisible.
+        """
+        results = []
+        merged = {}
+        members = defaultdict(list)
+        for offset, row in enumerate(rows):
+            result = {"index": start + offset}
+            results.append(result)
+            if isinstance(row, ValueError):
+                result.update(status=400, error=str(row))
+                continue
+            if not isinstance(row, dict):
+                result.update(status=400, error="Une ligne doit être un objet JSON")
+                continue
+            key, values, errors = validate_row(
+                validation_schema, columns, self.import_keys, humps.snakize(row)
+            )
+            if errors:
+                result.update(status=422, errors=errors)
+                continue
+            result[key[0]] = key[1]
+            merged.setdefault(key, {}).update(values)
+            members[key].append(result)
+        if not merged:
+            return results
+
+        written = upsert_rows(self.db.session, model, self.import_keys, merged)
+        for key, (id, created) in written.items():
+            for result in members[key]:
+                result.update(status=201 if created else 200, id=id)
+        return results
+
+    def _sparse_serializer(self, schema, params=None):
+        """
+        Le sérialiseur de `schema` réduit aux champs demandés par les paramètres fields= et
+        expand= (retirés de `params`) ou, à défaut de fields=, par l'en-tête X-Fields.
+        Les relations non demandées ne sont ni sérialisées ni chargées.
+        """
+        params = params if params is not None else {}
+        fields = params.pop("fields", None)
+        expand = params.pop("expand", None)
+        mask = request.headers.get(
+            current_app.config.get("RESTX_MASK_HEADER", "X-Fields")
+        )
+        if fields is None and mask:
+            # Seul le premier niveau du masque est pris en compte
+            fields = ",".join(key for key in Mask(mask) if key != "*") or None
+        try:
+            only = sparse_fields(schema, fields, expand)
+        except ValueError as error:
+            raise BadRequest(str(error))
+        return serializer(schema, only)
+
+    def _conditional(self, data):
+        """
+        Réponse 200 de `data` avec ses en-têtes ETag et Vary, ou 304 si le client en a déjà
+        la version courante (If-None-Match).
+        """
+        mask_header = current_app.config.get("RESTX_MASK_HEADER", "X-Fields")
+        headers = validators(data, vary=("Attribute-Convention", mask_header))
+        return not_modified(headers) or (data, 200, headers)
+
+    @response_cache.cached(CATALOGUE_TABLES, detail=True)
+    def _get_item_by_id(self, id: int, item_type, query_model, schema, params=None):
+        item_serializer = self._sparse_serializer(schema, params)
+        model = item_serializer.schema.opts.model
+        query = query_model.filter(model.id == id)
+        item = query.options(*load_options(item_serializer.schema)).first()
         if item:
-            item_schema = schema(many=False)
-            item_data = item_schema.dump(item)
-            return item_data
-        else:
-            return {"message": f"{item_type} introuvable"}, 404
+            return self._conditional(item_serializer.dump(item))
+        return {"message": f"{item_type} introuvable"}, 404
 
-    def _get_item_by_proprio_id(self, model, query, schema, id_proprio, item_type):
-        item = query.filter(model.id_proprio == id_proprio).first()
+    @response_cache.cached(CATALOGUE_TABLES, detail=True)
+    def _get_item_by_proprio_id(
+        self, model, query, schema, id_proprio, item_type, params=None
+    ):
+        item_serializer = self._sparse_serializer(schema, params)
+        query = query.filter(model.id_proprio == id_proprio)
+        item = query.options(*load_options(item_serializer.schema)).first()
         if item:
-            return schema().dump(item), 200
+            return self._conditional(item_serializer.dump(item))
         return {"message": f"{item_type} introuvable"}, 404
 
+    def _search_filter(self, model, field, value):
+        """
+        Chaque mot de `value` doit commencer un mot de la colonne `field`, sans tenir compte
+        de la casse ni des accents : "eli tour" trouve "Élise de La Tour-du-Pin".
+        La recherche passe par l'index de la table cle_recherche.
+        """
+        conditions = []
+        for token in search_tokens(value):
+            keys = select(self.SearchKey.id_entite).where(
+                self.SearchKey.entite == model.__tablename__,
+                self.SearchKey.champ == field,
+                self.SearchKey.jeton.startswith(
+                    token[:SEARCH_TOKEN_LENGTH], autoescape=True
+                ),
+            )
+            conditions.append(model.id.in_(keys))
+        return and_(true(), *conditions)
+
+    def _filter_on_authors(
+        self, query, params, filters_map, relationship, relation_model
+    ):
+        """
+        Les filtres sur les auteurs (auteur_nom, auteur_prenom, id_auteur) sont regroupés
+        dans un seul EXISTS : une jointure dupliquerait les lignes par auteur.
+        """
+        conditions = []
+        for param, value in params.items():
+            if param not in filters_map or filters_map[param].class_ is not self.Author:
+                continue
+            column = filters_map[param]
+            if param.startswith("auteur_"):
+                conditions.append(self._search_filter(self.Author, column.key, value))
+            else:
+                conditions.append(column == value)
+        if not conditions:
+            return query
+        return query.filter(
+            relationship.any(relation_model.author.has(and_(*conditions)))
+        )
+
+    ####################################################################################################
+    #   Pagination
+    ####################################################################################################
+    @staticmethod
+    def _invalidate_counts():
+        """
+        Une écriture peut modifier n'importe quel total filtré (un auteur renommé change les
+        ouvrages filtrés par auteur_nom), on vide donc tous les totaux mis en cache.
+        """
+        _count_cache.clear()
+
+    def _estimate_count(self, query):
+        """
+        Nombre de lignes de la table d'après les statistiques du moteur.
+        Renvoie None si le moteur n'en fournit pas.
+        """
+        if self.db.engine.dialect.name != "mysql":
+            return None
+        table = query.column_descriptions[0]["entity"].__table__
+        statement = text(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = COALESCE(:schema, DATABASE()) AND TABLE_NAME = :name"
+        )
+        return self.db.session.execute(
+            statement, {"schema": table.schema, "name": table.name}
+        ).scalar()
+
+    def _count(self, query, params):
+        """
+        Total d'une liste suivant la stratégie configurée pour la ressource dans LIST_TOTAL :
+          * exact : COUNT(*) sur la requête filtrée
+          * cached : COUNT(*) mis en cache par jeu de filtres, vidé à chaque écriture
+          * estimate : statistiques de la table sans filtre, COUNT(*) sinon
+          * none : pas de total
+        """
+        config = current_app.config["LIST_TOTAL"]
+        strategy = config.resources.get(self.resource_name, config.strategy)
+        filters = {k: v for k, v in params.items() if k not in PAGINATION_PARAMS}
+
+        if strategy == "none":
+            return None
+        if strategy == "exact":
+            return query.count()
+        if strategy == "estimate":
+            total = None if filters else self._estimate_count(query)
+            return query.count() if total is None else total
+        if strategy == "cached":
+            key = (self.resource_name, normalize_keys(filters))
+            total = _count_cache.get(key)
+            if total is None:
+                total = query.count()
+                _count_cache.set(key, total, config.cache_ttl)
+            return total
+        raise NotImplementedError(f"Stratégie de total inconnue : {strategy!r}")
+
+    @staticmethod
+    def _encode_cursor(sort, order, value, last_id):
+        """
+        Le curseur est opaque pour le client : il contient le tri demandé, la dernière valeur
+        de la colonne triée et le dernier id vu.
+        """
+        payload = json.dumps([sort, order, value, last_id], default=str)
+        payload = urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+        return payload.rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor, sort, order, sort_column):
+        """
+        La dernière valeur de la colonne triée (convertie dans le type de `sort_column`) et le
+        dernier id vu, contenus dans `cursor`. Lève BadRequest si le curseur est altéré ou ne
+        correspond pas au tri demandé.
+        """
+        try:
+            padding = "=" * (-len(cursor) % 4)
+            cursor_sort, cursor_order, value, last_id = json.loads(
+                urlsafe_b64decode(cursor + padding)
+            )
+            last_id = int(last_id)
+            if value is not None and sort_column is not None:
+                python_type = getattr(sort_column.type, "python_type", None)
+                if python_type is date:
+                    value = date.fromisoformat(value)
+                elif python_type in (int, str):
+                    if not isinstance(value, (int, float, str)):
+                        raise TypeError(value)
+                    value = python_type(value)
+        except (ValueError, TypeError, OverflowError):
+            raise BadRequest("Le paramètre 'cursor' est invalide")
+        if (cursor_sort, cursor_order) != (sort, order):
+            raise BadRequest("Le paramètre 'cursor' ne correspond pas au tri demandé")
+        return value, last_id
+
+    @staticmethod
+    def _keyset_filter(column, id_column, value, last_id, descending):
+        """
+        Condition "après la dernière ligne vue" pour un tri (column, id).
+        Les NULL sont placés en premier en tri ascendant et en dernier en tri descendant,
+        comme le fait MySQL.
+        """
+        if descending:
+            if value is None:
+                return and_(column.is_(None), id_column < last_id)
+            return or_(
+                column < value,
+                and_(column == value, id_column < last_id),
+                column.is_(None),
+            )
+        if value is None:
+            return or_(
+                and_(column.is_(None), id_column > last_id),
+                column.isnot(None),
+            )
+        return or_(column > value, and_(column == value, id_column > last_id))
+
+    def _paginate(self, query, id_column, sortable_columns):
+        """
+        Trie et pagine la requête.
+        Par défaut la pagination se fait par `page` (LIMIT/OFFSET). Si le paramètre `cursor`
+        est fourni, la pagination se fait par jeu de clés (tri + id) : le coût d'une page
+        profonde est alors le même que celui de la première.
+        """
+        limit = request.args.get("limit", default=100, type=int)
+        page = request.args.get("page", default=1, type=int)
+        sort = request.args.get("sort", default=None, type=str)
+        order = request.args.get("order", default="asc", type=str)
+        cursor = request.args.get("cursor", default=None, type=str)
+
+        if sort not in sortable_columns:
+            sort = None
+        descending = order == "desc"
+        order = "desc" if descending else "asc"
+        sort_column = sortable_columns.get(sort)
+
+        # L'id départage les égalités, ce qui rend l'ordre stable d'une page à l'autre
+        order_by = [sort_column] if sort_column is not None else []
+        order_by.append(id_column)
+        query = query.order_by(*[c.desc() if descending else c.asc() for c in order_by])
+
+        if cursor:
+            value, last_id = self._decode_cursor(cursor, sort, order, sort_column)
+            if sort_column is None:
+                condition = id_column < last_id if descending else id_column > last_id
+            else:
+                condition = self._keyset_filter(
+                    sort_column, id_column, value, last_id, descending
+                )
+            query = query.filter(condition)
+        else:
+            query = query.offset((page - 1) * limit)
+
+        items = query.limit(limit).all()
+
+        next_cursor = None
+        if items and len(items) == limit:
+            last = items[-1]
+            value = getattr(last, sort_column.key) if sort_column is not None else None
+            next_cursor = self._encode_cursor(sort, order, value, last.id)
+
+        return items, {"limit": limit, "page": page, "next_cursor": next_cursor}
+
+    ####################################################################################################
+    #   Export
+    ####################################################################################################
+    #: Nombre de lignes lues (et de relations chargées) à la fois pendant un export
+    export_batch_size = 500
+
+    def _iter_windows(self, query, id_column):
+        """
+        Parcourt `query` par fenêtres successives de `export_batch_size` lignes, dans l'ordre
+        des ids : chaque fenêtre est une requête indexée (id > dernier id lu) et la mémoire
+        utilisée ne dépend pas de la taille de l'export.
+        """
+        last_id = None
+        while True:
+            window = query if last_id is None else query.filter(id_column > last_id)
+            rows = window.order_by(id_column).limit(self.export_batch_size).all()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1].id
+
+    def _authors_by(self, key_column, ids):
+        """
+        Les auteurs ("nom,prenom") des entités `ids`, regroupés par la colonne `key_column`
+        d'une table de relation avec les auteurs.
+        """
+        relation = key_column.class_
+        rows = (
+            self.db.session.query(key_column, self.Author.nom, self.Author.prenom)
+            .join(self.Author, self.Author.id == relation.id_auteur)
+            .filter(key_column.in_(ids))
+            .order_by(relation.id)
+        )
+        authors = defaultdict(list)
+        for key, nom, prenom in rows:
+            authors[key].append(f"{nom},{prenom}")
+        return authors
+
+    def _export_rows(self, params):
+        """
+        Renvoie les en-têtes et les lignes (un itérable parcouru à la demande) de l'export.
+        """
+        raise NotImplementedError()
+
+    def _export_csv(self, params):
+        """
+        Export CSV envoyé en flux, ou exécuté en tâche de fond avec `asynchrone` : la réponse
+        est alors l'état de l'export, dont le fichier se télécharge une fois terminé.
+        """
+        asynchronous = params.pop("asynchrone", False)
+        compress = params.pop("gzip", False)
+        if not asynchronous:
+            headers, rows = self._export_rows(params)
+            return self._csv_response(headers, rows)
+        job = export_spool.submit(
+            self.resource_name, params, compress, partial(self._export_rows, params)
+        )
+        location = url_for("export_status", job_id=job["id"])
+        return ExportsResource._job_data(job), 202, {"Location": location}
+
+    @staticmethod
+    def _csv_response(headers, rows):
+        # Le contexte de la requête (et donc la session SQL) reste ouvert jusqu'à la fin
+        # du flux
+        return Response(
+            stream_with_context(generate_csv_stream(headers, rows)),
+            mimetype="text/csv",
+        )
+
     @staticmethod
     def authorize(method):
         """
@@ -255,13 +717,10 @@ class BaseResource(Resource):
 
 
 class AuthorsResource(BaseResource):
-    def _get(self, params):
-        limit = request.args.get("limit", default=100, type=int)
-        page = request.args.get("page", default=1, type=int)
-        sort = request.args.get("sort", default=None, type=str)
-        order = request.args.get("order", default="asc", type=str)
-        offset = (page - 1) * limit
+    resource_name = "auteurs"
 
+    @response_cache.cached(CATALOGUE_TABLES)
+    def _get(self, params):
         sortable_columns = {
             "id": self.Author.id,
             "id-ref": self.Author.id_ref,
@@ -270,11 +729,8 @@ class AuthorsResource(BaseResource):
             "id-proprio": self.Author.id_proprio,
         }
 
-        query = self.query_author.options(
-            joinedload(self.Author.authored_books)
-            .joinedload(self.AuthorBook.book)
-            .joinedload(self.Book.book_reviews)
-        )
+        author_serializer = self._sparse_serializer(AuthorResponseSchema, params)
+        query = self.query_author
 
         for param, value in params.items():
             if param in self.author_filters_map and param not in [
@@ -283,45 +739,47 @@ class AuthorsResource(BaseResource):
                 "sort",
                 "order",
             ]:
-                if "nom" in param:
-                    author_column = getattr(self.Author, param)
-                    query = query.filter(author_column.contains(value))
+                if param in ("nom", "prenom"):
+                    query = query.filter(self._search_filter(self.Author, param, value))
                 else:
                     column = self.author_filters_map[param]
                     query = query.filter(column == value)
-        if sort in sortable_columns:
-            column_to_sort = sortable_columns[sort]
-            if order == "desc":
-                query = query.order_by(column_to_sort.desc())
-            else:
-                query = query.order_by(column_to_sort.asc())
 
-        total_items = query.count()
-        query = query.limit(limit).offset(offset)
-        authors = query.all()
-        author_schema = AuthorResponseSchema(many=True)
-        author_data = author_schema.dump(authors)
-        return {
-            "auteurs": author_data,
-            "limit": limit,
-            "page": page,
-            "total": total_items,
-        }
+        query = query.options(*load_options(author_serializer.schema))
+        total_items = self._count(query, params)
+        authors, pagination = self._paginate(query, self.Author.id, sortable_columns)
+        author_data = author_serializer.dump(authors, many=True)
+        return self._conditional(
+            {
+                "auteurs": author_data,
+                **pagination,
+                "total": total_items,
+            }
+        )
 
-    def _get_author_by_id(self, id):
+    def _get_author_by_id(self, id, params=None):
         return self._get_item_by_id(
-            id, "Auteur", self.query_author, AuthorResponseSchema
+            id, "Auteur", self.query_author, AuthorResponseSchema, params
         )
 
-    def _get_author_by_proprio_id(self, id_proprio: str):
+    def _get_author_by_proprio_id(self, id_proprio: str, params=None):
         return self._get_item_by_proprio_id(
-            self.Author, self.query_author, AuthorResponseSchema, id_proprio, "Auteur"
+            self.Author,
+            self.query_author,
+            AuthorResponseSchema,
+            id_proprio,
+            "Auteur",
+            params,
         )
 
     @BaseResource.authorize
     def _post(self):
         return self._create_item(self.db, self.Author, "Auteur créé avec succès")
 
+    @BaseResource.authorize
+    def _post_batch(self):
+        return self._import_batch(self.Author)
+
     @BaseResource.authorize
     def _put(self, author_id):
         return self._update_item(author_id, self.db, self.Author, "Auteur")
@@ -336,7 +794,7 @@ class AuthorsResource(BaseResource):
             relations=[self.AuthorBook, self.AuthorReview],
         )
 
-    def _export_csv(self, params):
+    def _export_rows(self, params):
         db = self.db
 
         author_ouvrage_count = (
@@ -396,8 +854,8 @@ class AuthorsResource(BaseResource):
         for param, value in params.items():
             if param in self.author_filters_map:
                 column = self.author_filters_map[param]
-                if "nom" in param:
-                    query = query.filter(column.contains(value))
+                if param in ("nom", "prenom"):
+                    query = query.filter(self._search_filter(self.Author, param, value))
                 else:
                     query = query.filter(column == value)
 
@@ -411,19 +869,15 @@ class AuthorsResource(BaseResource):
             "nb_recensions",
             "nb_rec_ouvrages",
         ]
-        return Response(
-            generate_csv_stream(headers, query.yield_per(500)), mimetype="text/csv"
-        )
+        return headers, query.yield_per(self.export_batch_size)
 
 
 class BooksResource(BaseResource):
-    def _get(self, params):
-        limit = request.args.get("limit", default=100, type=int)
-        page = request.args.get("page", default=1, type=int)
-        sort = request.args.get("sort", default=None, type=str)
-        order = request.args.get("order", default="asc", type=str)
-        offset = (page - 1) * limit
+    resource_name = "ouvrages"
+    import_keys = IMPORT_KEYS["Book"]
 
+    @response_cache.cached(CATALOGUE_TABLES)
+    def _get(self, params):
         sortable_columns = {
             "id": self.Book.id,
             "titre": self.Book.titre,
@@ -433,56 +887,72 @@ class BooksResource(BaseResource):
             "annee_parution": self.Book.annee_parution,
         }
 
-        query = self.query_book.outerjoin(self.Book.book_authors)
-        query = query.outerjoin(self.Author)
+        book_serializer = self._sparse_serializer(BookResponseSchema, params)
+        query = self.query_book
+        query = self._filter_on_authors(
+            query,
+            params,
+            self.book_filters_map,
+            self.Book.book_authors,
+            self.AuthorBook,
+        )
         for param, value in params.items():
             if param in self.book_filters_map and param not in ["limit", "page"]:
                 column = self.book_filters_map[param]
-                if param.startswith("auteur_"):
-                    author_column = getattr(self.Author, param[len("auteur_") :])
-                    query = query.filter(author_column.contains(value))
-                elif "titre" == param or "editeur" == param or "traduit_par" == param:
+                if column.class_ is self.Author:
+                    continue
+                elif param in ("titre", "sous_titre"):
+                    query = query.filter(self._search_filter(self.Book, param, value))
+                elif "editeur" == param or "traduit_par" == param:
                     book_column = getattr(self.Book, param)
                     query = query.filter(book_column.contains(value))
                 else:
                     query = query.filter(column == value)
 
-        if sort in sortable_columns:
-            column_to_sort = sortable_columns[sort]
-            if order == "desc":
-                query = query.order_by(column_to_sort.desc())
-            else:
-                query = query.order_by(column_to_sort.asc())
-        total_items = query.count()
-        query = query.limit(limit).offset(offset)
-        books = query.all()
-        book_schema = BookResponseSchema(many=True)
-        book_data = book_schema.dump(books)
-        return {
-            "ouvrages": book_data,
-            "limit": limit,
-            "page": page,
-            "total": total_items,
-        }
+        query = query.options(*load_options(book_serializer.schema))
+        total_items = self._count(query, params)
+        books, pagination = self._paginate(query, self.Book.id, sortable_columns)
+        book_data = book_serializer.dump(books, many=True)
+        return self._conditional(
+            {
+                "ouvrages": book_data,
+                **pagination,
+                "total": total_items,
+            }
+        )
 
-    def _get_book_by_id(self, id):
-        return self._get_item_by_id(id, "Ouvrage", self.query_book, BookResponseSchema)
+    def _get_book_by_id(self, id, params=None):
+        return self._get_item_by_id(
+            id, "Ouvrage", self.query_book, BookResponseSchema, params
+        )
 
-    def _get_book_by_id_proprio(self, id_proprio: str):
+    def _get_book_by_id_proprio(self, id_proprio: str, params=None):
         return self._get_item_by_proprio_id(
-            self.Book, self.query_book, BookResponseSchema, id_proprio, "Ouvrage"
+            self.Book,
+            self.query_book,
+            BookResponseSchema,
+            id_proprio,
+            "Ouvrage",
+            params,
         )
 
-    def _get_book_by_ean(self, ean: str):
-        book = self.query_book.filter(self.Book.ean == ean).first()
+    @response_cache.cached(CATALOGUE_TABLES, detail=True)
+    def _get_book_by_ean(self, ean: str, params=None):
+        book_serializer = self._sparse_serializer(BookResponseSchema, params)
+        query = self.query_book.filter(self.Book.ean == ean)
+        book = query.options(*load_options(book_serializer.schema)).first()
         if book:
-            return BookResponseSchema().dump(book), 200
+            return self._conditional(book_serializer.dump(book))
         return {"message": "Ouvrage introuvable"}, 404
 
     @BaseResource.authorize
     def _post(self):
         return self._create_item(self.db, self.Book, "Ouvrage créé avec succès")
 
+    @BaseResource.authorize
+    def _post_batch(self):
+        return self._import_batch(self.Book)
+
     @BaseResource.authorize
     def _put(self, book_id):
         return self._update_item(book_id, self.db, self.Book, "Ouvrage")
@@ -497,98 +967,60 @@ class BooksResource(BaseResource):
             relations=[self.AuthorBook, self.BookReview],
         )
 
-    def _export_csv(self, params):
-        db = self.db
-
+    def _export_rows(self, params):
         excluded_columns = {"cree_le", "modifie_le"}
-        book_columns = [
-            getattr(self.Book, col.name)
+        columns = [
+            col.name
             for col in self.Book.__table__.columns
             if col.name not in excluded_columns
         ]
-
-        review_count_subquery = (
-            db.session.query(
-                self.BookReview.id_ouvrage,
-                func.count(self.BookReview.id).label("nb_recensions"),
-            )
-            .group_by(self.BookReview.id_ouvrage)
-            .subquery()
+        query = self.db.session.query(*(getattr(self.Book, name) for name in columns))
+        query = self._filter_on_authors(
+            query,
+            params,
+            self.book_filters_map,
+            self.Book.book_authors,
+            self.AuthorBook,
         )
-
-        query = (
-            db.session.query(
-                *book_columns,
-                func.coalesce(review_count_subquery.c.nb_recensions, 0).label(
-                    "nb_recensions"
-                ),
-            )
-            .outerjoin(
-                review_count_subquery,
-                review_count_subquery.c.id_ouvrage == self.Book.id,
-            )
-            .outerjoin(self.Book.book_authors)
-            .outerjoin(self.Author)
-        ).distinct(self.Book.id)
-
         for param, value in params.items():
             if param in self.book_filters_map:
                 column = self.book_filters_map[param]
-                if param.startswith("auteur_"):
-                    author_column = getattr(self.Author, param[len("auteur_") :])
-                    query = query.filter(author_column.contains(value))
-                elif param in ["titre", "editeur", "traduit_par"]:
+                if column.class_ is self.Author:
+                    continue
+                elif param in ("titre", "sous_titre"):
+                    query = query.filter(self._search_filter(self.Book, param, value))
+                elif param in ["editeur", "traduit_par"]:
                     query = query.filter(column.contains(value))
                 else:
                     query = query.filter(column == value)
 
-        books = list(query.yield_per(500))
-        book_ids = [book.id for book in books]
-
-        authors_map = (
-            db.session.query(
-                self.AuthorBook.id_ouvrage,
-                self.Author.nom,
-                self.Author.prenom,
-            )
-            .join(self.Author, self.Author.id == self.AuthorBook.id_auteur)
-            .filter(self.AuthorBook.id_ouvrage.in_(book_ids))
-            .all()
-        )
-
-        authors_by_book = defaultdict(list)
-        for id_ouvrage, nom, prenom in authors_map:
-            authors_by_book[id_ouvrage].append(f"{nom},{prenom}")
-
-        headers = [
-            col.name
-            for col in self.Book.__table__.columns
-            if col.name not in excluded_columns
-        ]
-        headers += ["auteurs(nom,prenom)", "nb_recensions"]
-
-        rows = []
-        for book in books:
-            row = [
-                getattr(book, field)
-                for field in headers
-                if field not in ["auteurs(nom,prenom)", "nb_recensions"]
-            ]
-            row.append(";".join(authors_by_book.get(book.id, [])))
-            row.append(book.nb_recensions)
-            rows.append(row)
+        def rows():
+            for books in self._iter_windows(query, self.Book.id):
+                book_ids = [book.id for book in books]
+                authors_by_book = self._authors_by(self.AuthorBook.id_ouvrage, book_ids)
+                review_counts = dict(
+                    self.db.session.query(
+                        self.BookReview.id_ouvrage, func.count(self.BookReview.id)
+                    )
+                    .filter(self.BookReview.id_ouvrage.in_(book_ids))
+                    .group_by(self.BookReview.id_ouvrage)
+                )
+                for book in books:
+                    yield [
+                        *book,
+                        ";".join(authors_by_book.get(book.id, [])),
+                        review_counts.get(book.id, 0),
+                    ]
 
-        return Response(generate_csv_stream(headers, rows), mimetype="text/csv")
+        headers = columns + ["auteurs(nom,prenom)", "nb_recensions"]
+        return headers, rows()
 
 
 class ReviewsResource(BaseResource):
-    def _get(self, params):
-        limit = request.args.get("limit", default=100, type=int)
-        page = request.args.get("page", default=1, type=int)
-        sort = request.args.get("sort", default=None, type=str)
-        order = request.args.get("order", default="asc", type=str)
-        offset = (page - 1) * limit
+    resource_name = "recensions"
 
+    @response_cache.cached(CATALOGUE_TABLES)
+    def _get(self, params):
         sortable_columns = {
             "id": self.Review.id,
             "titre": self.Review.titre,
@@ -600,14 +1032,22 @@ class ReviewsResource(BaseResource):
             "date_parution": self.Review.date_parution,
         }
 
-        query = self.query_review.outerjoin(self.Review.review_authors)
-        query = query.outerjoin(self.Author)
+        review_serializer = self._sparse_serializer(ReviewReponseSchema, params)
+        query = self.query_review
+        query = self._filter_on_authors(
+            query,
+            params,
+            self.review_filters_map,
+            self.Review.review_authors,
+            self.AuthorReview,
+        )
         for param, value in params.items():
             if param in self.review_filters_map:
                 column = self.review_filters_map[param]
-                if param.startswith("auteur_"):
-                    author_column = getattr(self.Author, param[len("auteur_") :])
-                    query = query.filter(author_column.contains(value))
+                if column.class_ is self.Author:
+                    continue
+                elif param in ("titre", "titre_revue"):
+                    query = query.filter(self._search_filter(self.Review, param, value))
                 elif "titre" in param:
                     review_column = getattr(self.Review, param)
                     query = query.filter(review_column.contains(value))
@@ -624,38 +1064,41 @@ class ReviewsResource(BaseResource):
                         )
                 else:
                     query = query.filter(column == value)
-            if sort in sortable_columns:
-                column_to_sort = sortable_columns[sort]
-                if order == "desc":
-                    query = query.order_by(column_to_sort.desc())
-                else:
-                    query = query.order_by(column_to_sort.asc())
-        total_items = query.count()
-        query = query.limit(limit).offset(offset)
-        reviews = query.all()
-        review_schema = ReviewReponseSchema(many=True)
-        review_data = review_schema.dump(reviews)
-        return {
-            "recensions": review_data,
-            "limit": limit,
-            "page": page,
-            "total": total_items,
-        }
+        query = query.options(*load_options(review_serializer.schema))
+        total_items = self._count(query, params)
+        reviews, pagination = self._paginate(query, self.Review.id, sortable_columns)
+        review_data = review_serializer.dump(reviews, many=True)
+        return self._conditional(
+            {
+                "recensions": review_data,
+                **pagination,
+                "total": total_items,
+            }
+        )
 
-    def _get_review_by_id(self, id):
+    def _get_review_by_id(self, id, params=None):
         return self._get_item_by_id(
-            id, "Recension", self.query_review, ReviewReponseSchema
+            id, "Recension", self.query_review, ReviewReponseSchema, params
         )
 
-    def _get_review_by_id_proprio(self, id_proprio: str):
+    def _get_review_by_id_proprio(self, id_proprio: str, params=None):
         return self._get_item_by_proprio_id(
-            self.Review, self.query_review, ReviewReponseSchema, id_proprio, "Recension"
+            self.Review,
+            self.query_review,
+            ReviewReponseSchema,
+            id_proprio,
+            "Recension",
+            params,
         )
 
     @BaseResource.authorize
     def _post(self):
         return self._create_item(self.db, self.Review, "Recension créée avec succès")
 
+    @BaseResource.authorize
+    def _post_batch(self):
+        return self._import_batch(self.Review)
+
     @BaseResource.authorize
     def _put(self, review_id):
         return self._update_item(review_id, self.db, self.Review, "Recension")
@@ -670,30 +1113,28 @@ class ReviewsResource(BaseResource):
             relations=[self.AuthorReview, self.BookReview],
         )
 
-    def _export_csv(self, params):
-        db = self.db
-
+    def _export_rows(self, params):
         excluded_columns = {"cree_le", "modifie_le"}
-        review_columns = [
-            getattr(self.Review, col.name)
+        columns = [
+            col.name
             for col in self.Review.__table__.columns
             if col.name not in excluded_columns
         ]
-
-        query = (
-            db.session.query(*review_columns)
-            .outerjoin(self.Review.review_authors)
-            .outerjoin(self.Author)
-            .outerjoin(self.Review.review_books)
-            .outerjoin(self.Book)
+        query = self.db.session.query(*(getattr(self.Review, name) for name in columns))
+        query = self._filter_on_authors(
+            query,
+            params,
+            self.review_filters_map,
+            self.Review.review_authors,
+            self.AuthorReview,
         )
-
         for param, value in params.items():
             if param in self.review_filters_map:
                 column = self.review_filters_map[param]
-                if param.startswith("auteur_"):
-                    author_column = getattr(self.Author, param[len("auteur_") :])
-                    query = query.filter(author_column.contains(value))
+                if column.class_ is self.Author:
+                    continue
+                elif param in ("titre", "titre_revue"):
+                    query = query.filter(self._search_filter(self.Review, param, value))
                 elif "titre" in param:
                     review_column = getattr(self.Review, param)
                     query = query.filter(review_column.contains(value))
@@ -709,84 +1150,56 @@ class ReviewsResource(BaseResource):
                 else:
                     query = query.filter(column == value)
 
-        recensions = list(query.distinct().yield_per(500))
-        review_ids = [r.id for r in recensions]
-
-        authors_map = (
-            db.session.query(
-                self.AuthorReview.id_recension, self.Author.nom, self.Author.prenom
-            )
-            .join(self.Author)
-            .filter(self.AuthorReview.id_recension.in_(review_ids))
-            .all()
-        )
-
-        authors_by_review = defaultdict(list)
-        for rec_id, nom, prenom in authors_map:
-            authors_by_review[rec_id].append(f"{nom},{prenom}")
-
-        books_links = (
-            db.session.query(
-                self.BookReview.id_recension,
-                self.Book.id,
-                self.Book.titre,
-                self.Book.annee_parution,
-                self.Book.editeur,
-            )
-            .join(self.Book)
-            .filter(self.BookReview.id_recension.in_(review_ids))
-            .all()
-        )
-
-        ouvrages_by_review = defaultdict(list)
-        book_ids = set()
-        for rec_id, book_id, titre, annee, editeur in books_links:
-            ouvrages_by_review[rec_id].append((book_id, titre, annee, editeur))
-            book_ids.add(book_id)
-
-        book_authors_map = (
-            db.session.query(
-                self.AuthorBook.id_ouvrage, self.Author.nom, self.Author.prenom
-            )
-            .join(self.Author)
-            .filter(self.AuthorBook.id_ouvrage.in_(book_ids))
-            .all()
-        )
-
-        authors_by_book = defaultdict(list)
-        for book_id, nom, prenom in book_authors_map:
-            authors_by_book[book_id].append(f"{nom},{prenom}")
+        def rows():
+            for reviews in self._iter_windows(query, self.Review.id):
+                review_ids = [review.id for review in reviews]
+                authors_by_review = self._authors_by(
+                    self.AuthorReview.id_recension, review_ids
+                )
 
-        headers = [
-            col.name
-            for col in self.Review.__table__.columns
-            if col.name not in excluded_columns
-        ]
-        headers += ["auteurs(nom,prenom)", "ouvrages"]
-
-        rows = []
-        for review in recensions:
-            row = [
-                getattr(review, field)
-                for field in headers
-                if field not in ["auteurs(nom,prenom)", "ouvrages"]
-            ]
-            row.append(";".join(authors_by_review.get(review.id, [])))
-
-            ouvrages = []
-            for book_id, titre, annee, editeur in ouvrages_by_review.get(review.id, []):
-                auteurs = authors_by_book.get(book_id, [])
-                meta = f"{titre} ({annee}, {editeur})"
-                if auteurs:
-                    meta += f" - {'; '.join(auteurs)}"
-                ouvrages.append(meta)
-            row.append(" | ".join(ouvrages))
-            rows.append(row)
-
-        return Response(generate_csv_stream(headers, rows), mimetype="text/csv")
+                books_links = (
+                    self.db.session.query(
+                        self.BookReview.id_recension,
+                        self.Book.id,
+                        self.Book.titre,
+                        self.Book.annee_parution,
+                        self.Book.editeur,
+                    )
+                    .join(self.Book)
+                    .filter(self.BookReview.id_recension.in_(review_ids))
+                    .order_by(self.BookReview.id)
+                )
+                books_by_review = defaultdict(list)
+                book_ids = set()
+                for review_id, book_id, titre, annee, editeur in books_links:
+                    books_by_review[review_id].append((book_id, titre, annee, editeur))
+                    book_ids.add(book_id)
+                authors_by_book = self._authors_by(self.AuthorBook.id_ouvrage, book_ids)
+
+                for review in reviews:
+                    ouvrages = []
+                    for book_id, titre, annee, editeur in books_by_review.get(
+                        review.id, []
+                    ):
+                        meta = f"{titre} ({annee}, {editeur})"
+                        auteurs = authors_by_book.get(book_id, [])
+                        if auteurs:
+                            meta += f" - {'; '.join(auteurs)}"
+                        ouvrages.append(meta)
+                    yield [
+                        *review,
+                        ";".join(authors_by_review.get(review.id, [])),
+                        " | ".join(ouvrages),
+                    ]
+
+        headers = columns + ["auteurs(nom,prenom)", "ouvrages"]
+        return headers, rows()
 
 
 class RelationResource(BaseResource):
+    #: Nombre de valeurs par requête IN et de lignes par INSERT des traitements par lot
+    batch_size = 1000
+
     def _get_relation_model_from_url(self, url):
         if "auteurs-ouvrages" in url:
             return self.AuthorBook
@@ -796,13 +1209,8 @@ class RelationResource(BaseResource):
             return self.BookReview
         return None
 
-    def _create_relation_from_params(self, params):
-        if len(params) != 2:
-            return {
-                "message": "Deux champs doivent être fournis pour établir une relation"
-            }, 422
-
-        relations_map = {
+    def _relations_map(self):
+        return {
             ("id_auteur", "id_ouvrage"): {
                 "entity1": "author",
                 "entity2": "book",
@@ -823,7 +1231,13 @@ class RelationResource(BaseResource):
             },
         }
 
-        for (key1, key2), relation_info in relations_map.items():
+    def _create_relation_from_params(self, params):
+        if len(params) != 2:
+            return {
+                "message": "Deux champs doivent être fournis pour établir une relation"
+            }, 422
+
+        for (key1, key2), relation_info in self._relations_map().items():
             if key1 in params and key2 in params:
                 entity1_id = int(params[key1])
                 entity2_id = int(params[key2])
@@ -856,6 +1270,7 @@ class RelationResource(BaseResource):
                 )
                 self.db.add(relation)
                 self.db.commit()
+                self._invalidate_counts()
                 return {"message": relation_info["message"], "id": relation.id}, 201
 
         return {"message": "Données insuffisantes pour établir une relation"}, 422
@@ -866,8 +1281,126 @@ class RelationResource(BaseResource):
             is not None
         )
 
-    def _add_relation_from_dict(self, data: dict):
-        return self._create_relation_from_params(data)
+    def _create_relations(self, entries):
+        """
+        Crée les relations `entries` (dictionnaires acceptés par `_create_relation_from_params`)
+        dans une seule transaction et renvoie le résultat de chacune, identique à celui d'une
+        création une à une (201, 404, 409, 422 ou 400 avec l'erreur).
+        Les id des entités sont vérifiés par une requête IN par type d'entité, les relations
+        existantes par une requête par type de relation, et les nouvelles relations insérées
+        par lots de `batch_size`.
+        """
+        relations_map = self._relations_map()
+        models = {"author": self.Author, "book": self.Book, "review": self.Review}
+        results = [None] * len(entries)
+        pending = []
+        wanted_ids = defaultdict(set)
+        for index, entry in enumerate(entries):
+            try:
+                if len(entry) != 2:
+                    result = {
+                        "message": "Deux champs doivent être fournis pour établir une relation"
+                    }
+                    results[index] = {"input": entry, "status": 422, "result": result}
+                    continue
+                keys = next(
+                    (keys for keys in relations_map if set(keys) <= set(entry)), None
+                )
+                if keys is None:
+                    result = {
+                        "message": "Données insuffisantes pour établir une relation"
+                    }
+                    results[index] = {"input": entry, "status": 422, "result": result}
+                    continue
+                ids = (int(entry[keys[0]]), int(entry[keys[1]]))
+            except Exception as e:
+                results[index] = {"input": entry, "status": 400, "error": str(e)}
+                continue
+            relation_info = relations_map[keys]
+            wanted_ids[relation_info["entity1"]].add(ids[0])
+            wanted_ids[relation_info["entity2"]].add(ids[1])
+            pending.append((index, keys, ids))
+
+        found_ids = defaultdict(set)
+        for entity, ids in wanted_ids.items():
+            model = models[entity]
+            for chunk in chunkinze(sorted(ids), self.batch_size):
+                found_ids[entity].update(
+                    self.db.session.execute(
+                        select(model.id).where(model.id.in_(chunk))
+                    ).scalars()
+                )
+
+        def relation_columns(keys):
+            relation_class = relations_map[keys]["relation_class"]
+            return [getattr(relation_class, key) for key in keys]
+
+        def select_pairs(keys, pairs, *columns):
+            keys_columns = relation_columns(keys)
+            for chunk in chunkinze(sorted(pairs), self.batch_size):
+                yield from self.db.session.execute(
+                    select(*keys_columns, *columns).where(
+                        tuple_(*keys_columns).in_(chunk)
+                    )
+                )
+
+        candidates = defaultdict(set)
+        for index, keys, ids in pending:
+            relation_info = relations_map[keys]
+            if (
+                ids[0] in found_ids[relation_info["entity1"]]
+                and ids[1] in found_ids[relation_info["entity2"]]
+            ):
+                candidates[keys].add(ids)
+        existing = {
+            keys: {tuple(row) for row in select_pairs(keys, pairs)}
+            for keys, pairs in candidates.items()
+        }
+
+        # Dans l'ordre du lot : un doublon du lot est refusé comme relation existante
+        created = defaultdict(dict)
+        for index, keys, ids in pending:
+            relation_info = relations_map[keys]
+            entry = entries[index]
+            if ids in created[keys] or ids in existing.get(keys, ()):
+                result = {"message": "Cette relation entre ces deux objets existe déjà"}
+                results[index] = {"input": entry, "status": 409, "result": result}
+            elif ids in candidates[keys]:
+                created[keys][ids] = index
+            else:
+                result = {
+                    "message": f"{relation_info['entity1']} ou {relation_info['entity2']} introuvable"
+                }
+                results[index] = {"input": entry, "status": 404, "result": result}
+
+        try:
+            for keys, new_pairs in created.items():
+                relation_class = relations_map[keys]["relation_class"]
+                for chunk in chunkinze(list(new_pairs), self.batch_size):
+                    self.db.session.execute(
+                        insert(relation_class), [dict(zip(keys, ids)) for ids in chunk]
+                    )
+                for *ids, relation_id in select_pairs(
+                    keys, new_pairs, relation_class.id
+                ):
+                    index = new_pairs.get(tuple(ids))
+                    if index is not None:
+                        result = {
+                            "message": relations_map[keys]["message"],
+                            "id": relation_id,
+                        }
+                        results[index] = {
+                            "input": entries[index],
+                            "status": 201,
+                            "result": result,
+                        }
+            self.db.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+        if created:
+            self._invalidate_counts()
+        return results
 
     def _relation_data(self, query, model, response_schema, id=None):
         limit = request.args.get("limit", default=100, type=int)
@@ -886,8 +1419,7 @@ class RelationResource(BaseResource):
         relations = query.all()
         if not relations:
             return {"message": f"Relation introuvable"}, 404
-        relation_schema = response_schema
-        relation_data = relation_schema.dump(relations)
+        relation_data = serializer(response_schema).dump(relations, many=True)
         return relation_data
 
     def _delete_relation_by_id(self, relation_id, model):
@@ -895,9 +1427,48 @@ class RelationResource(BaseResource):
         if relation:
             self.db.delete(relation)
             self.db.commit()
+            self._invalidate_counts()
             return True
         return False
 
+    def _delete_relations(self, relation_ids, model):
+        """
+        Supprime les relations `relation_ids` de `model` dans une seule transaction : les id
+        existants sont lus puis supprimés par lots de `batch_size` (SELECT et DELETE ... IN).
+        Renvoie le nombre de relations supprimées et les id introuvables, dans l'ordre de
+        `relation_ids` (un id répété n'est supprimé qu'une fois, comme une à une).
+        """
+        found = set()
+        for chunk in chunkinze(list(dict.fromkeys(relation_ids)), self.batch_size):
+            found.update(
+                self.db.session.execute(
+                    select(model.id).where(model.id.in_(chunk))
+                ).scalars()
+            )
+        # Les id de la requête peuvent être des chaînes ("12")
+        remaining = {str(id) for id in found}
+        not_found = []
+        for relation_id in relation_ids:
+            key = str(relation_id)
+            if key in remaining:
+                remaining.remove(key)
+            else:
+                not_found.append(relation_id)
+        try:
+            for chunk in chunkinze(sorted(found), self.batch_size):
+                self.db.session.execute(
+                    delete(model)
+                    .where(model.id.in_(chunk))
+                    .execution_options(synchronize_session=False)
+                )
+            self.db.commit()
+        except Exception:
+            self.db.session.rollback()
+            raise
+        if found:
+            self._invalidate_counts()
+        return len(found), not_found
+
     ####################################################################################################
     #   Méthode relation
     ####################################################################################################
@@ -907,21 +1478,21 @@ class RelationResource(BaseResource):
             return self._relation_data(
                 self.query_author_book,
                 self.AuthorBook,
-                AuthorBookResponseSchema(many=True),
+                AuthorBookResponseSchema,
                 id,
             )
         if "auteurs-recensions" in url:
             return self._relation_data(
                 self.query_author_review,
                 self.AuthorReview,
-                AuthorReviewResponseSchema(many=True),
+                AuthorReviewResponseSchema,
                 id,
             )
         if "ouvrages-recensions" in url:
             return self._relation_data(
                 self.query_book_review,
                 self.BookReview,
-                BookReviewResponseSchema(many=True),
+                BookReviewResponseSchema,
                 id,
             )
         else:
@@ -944,13 +1515,7 @@ class RelationResource(BaseResource):
                     "Le corps de la requête doit être une liste de relations"
                 )
 
-            results = []
-            for entry in relations:
-                try:
-                    result, status = self._add_relation_from_dict(entry)
-                    results.append({"input": entry, "status": status, "result": result})
-                except Exception as e:
-                    results.append({"input": entry, "status": 400, "error": str(e)})
+            results = self._create_relations(relations)
 
             success_count = len([r for r in results if r["status"] == 201])
             if success_count == len(results):
@@ -992,6 +1557,7 @@ class RelationResource(BaseResource):
             if review_id is not None:
                 relation.id_recension = int(review_id)
             self.db.commit()
+            self._invalidate_counts()
             return {
                 "message": f"Relation {relation_model.__name__} mise à jour avec succès",
                 "id": relation_id,
@@ -1031,12 +1597,7 @@ class RelationResource(BaseResource):
             if not model:
                 return {"message": "Type de relation non reconnu dans l'URL"}, 400
 
-            deleted, not_found = 0, []
-            for relation_id in ids:
-                if not self._delete_relation_by_id(relation_id, model):
-                    not_found.append(relation_id)
-                else:
-                    deleted += 1
+            deleted, not_found = self._delete_relations(ids, model)
 
             return {
                 "message": f"{deleted} relations supprimées",
@@ -1051,6 +1612,9 @@ class RelationResource(BaseResource):
 
 
 class EditorsResource(BaseResource):
+    resource_name = "editeurs"
+
+    @response_cache.cached(("editeur",))
     def _get(self, params):
         limit = params.get("limit", 100)
         page = params.get("page", 1)
@@ -1061,19 +1625,20 @@ class EditorsResource(BaseResource):
         if nom := params.get("nom"):
             query = query.filter(self.Editor.nom.ilike(f"%{nom}%"))
 
+        editor_serializer = serializer(EditorResponseSchema)
         query = query.order_by(self.Editor.nom.asc())
-
-        total = query.count()
+        total = self._count(query, params)
         results = query.limit(limit).offset(offset).all()
 
-        editor_schema = EditorResponseSchema(many=True)
-        return {
-            "editeurs": editor_schema.dump(results),
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "pages": ceil(total / limit),
-        }
+        return self._conditional(
+            {
+                "editeurs": editor_serializer.dump(results, many=True),
+                "page": page,
+                "limit": limit,
+                "total": total,
+                "pages": ceil(total / limit) if total is not None else None,
+            }
+        )
 
     @BaseResource.authorize
     def _post(self):
@@ -1081,6 +1646,7 @@ class EditorsResource(BaseResource):
         new_editor = self.Editor(**params)
         self.db.add(new_editor)
         self.db.commit()
+        self._invalidate_counts()
         new_editeur_id = new_editor.id
         new_editeur_nom = new_editor.nom
 
@@ -1092,6 +1658,9 @@ class EditorsResource(BaseResource):
 
 
 class JournalResource(BaseResource):
+    resource_name = "revues"
+
+    @response_cache.cached(("revue",))
     def _get(self, params):
         limit = params.get("limit", 100)
         page = params.get("page", 1)
@@ -1102,19 +1671,20 @@ class JournalResource(BaseResource):
         if titre := params.get("titre"):
             query = query.filter(self.Journal.titre.ilike(f"%{titre}%"))
 
+        journal_serializer = serializer(JournalResponseSchema)
         query = query.order_by(self.Journal.titre.asc())
-
-        total = query.count()
+        total = self._count(query, params)
         results = query.limit(limit).offset(offset).all()
 
-        journal_schema = JournalResponseSchema(many=True)
-        return {
-            "revues": journal_schema.dump(results),
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "pages": ceil(total / limit),
-        }
+        return self._conditional(
+            {
+                "revues": journal_serializer.dump(results, many=True),
+                "page": page,
+                "limit": limit,
+                "total": total,
+                "pages": ceil(total / limit) if total is not None else None,
+            }
+        )
 
     @BaseResource.authorize
     def _post(self):
@@ -1122,6 +1692,7 @@ class JournalResource(BaseResource):
         new_journal = self.Journal(**params)
         self.db.add(new_journal)
         self.db.commit()
+        self._invalidate_counts()
         new_journal_id = new_journal.id
         new_journal_titre = new_journal.titre
 
@@ -1130,3 +1701,57 @@ class JournalResource(BaseResource):
             "id": new_journal_id,
             "titre": new_journal_titre,
         }, 201
+
+
+class SearchResource(BaseResource):
+    #: Nombre maximal de résultats d'une recherche
+    max_limit = 100
+
+    def _get(self, params):
+        limit = min(params.get("limit") or 20, self.max_limit)
+        types = None
+        if params.get("type"):
+            types = set(params["type"].split(","))
+            unknown = types - set(SEARCH_ENTITIES)
+            if unknown:
+                raise BadRequest(
+                    f"Type(s) inconnu(s) : {', '.join(sorted(unknown))}. "
+                    f"Types possibles : {', '.join(SEARCH_ENTITIES)}"
+                )
+        results = catalogue_search.search(params["q"], limit=limit, types=types)
+        return {"resultats": results, "total": len(results)}
+
+
+class ExportsResource(BaseResource):
+    @staticmethod
+    def _job_data(job):
+        data = {**job, "fichier": None}
+        if job["statut"] == ExportSpool.DONE:
+            data["fichier"] = url_for("export_file", job_id=job["id"])
+        return data
+
+    def _get_status(self, job_id):
+        job = export_spool.status(job_id)
+        if job is None:
+            return {"message": "Export introuvable"}, 404
+        return self._job_data(job)
+
+    def _get_file(self, job_id):
+        job = export_spool.status(job_id)
+        if job is None:
+            return {"message": "Export introuvable"}, 404
+        if job["statut"] != ExportSpool.DONE:
+            return {
+                "message": "L'export n'est pas terminé",
+                "statut": job["statut"],
+            }, 409
+        extension = "csv.gz" if job["compression"] else "csv"
+        # conditional : gestion de Range / If-Range (reprise d'un téléchargement) et des
+        # ETag ; X-Sendfile est utilisé si USE_X_SENDFILE est activé
+        return send_file(
+            export_spool.file_path(job),
+            mimetype="application/gzip" if job["compression"] else "text/csv",
+            as_attachment=True,
+            download_name=f"{job['ressource']}.{extension}",
+            conditional=True,
+        )
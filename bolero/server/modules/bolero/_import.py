@@ -0,0 +1,447 @@
+#!/usr/bin/env python
+"""
+Imports par lot du catalogue.
+
+Les lignes des auteurs, ouvrages et recensions sont écrites par INSERT ... ON DUPLICATE KEY
+UPDATE multi-lignes (`upsert_rows`), pour les routes /batch comme pour la commande
+`flask db import`, qui charge des fichiers NDJSON ou CSV (éventuellement compressés en gzip)
+d'entités et de relations (`CatalogueImporter`).
+"""
+# Import from stdlib
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+import csv
+import gzip
+import io
+import json
+import multiprocessing
+import time
+
+# Imports from external libraries
+from marshmallow import ValidationError
+from path import Path
+from sqlalchemy import insert, select, tuple_
+
+# Import from local code
+from bolero.models import databases
+from bolero.models.bolero import SEARCH_FIELDS
+from core.services.tools_belt import chunkinze, humps
+from ._cache import response_cache
+from ._search import ENTITIES as SEARCH_ENTITIES, record_rows
+
+
+#: Colonnes identifiant une entité importée, par ordre de priorité
+IMPORT_KEYS = {
+    "Author": ("id_proprio",),
+    "Book": ("id_proprio", "ean"),
+    "Review": ("id_proprio",),
+}
+
+#: Types de fichiers de `flask db import` (début du nom du fichier), dans l'ordre d'import :
+#: les relations référencent des entités éventuellement importées avec elles
+FILE_TYPES = {
+    "auteurs": "Author",
+    "ouvrages": "Book",
+    "recensions": "Review",
+    "auteurs-ouvrages": "AuthorBook",
+    "auteurs-recensions": "AuthorReview",
+    "ouvrages-recensions": "BookReview",
+}
+
+#: Colonnes des relations et entités qu'elles référencent
+RELATION_COLUMNS = {
+    "id_auteur": ("auteur", "Author"),
+    "id_ouvrage": ("ouvrage", "Book"),
+    "id_recension": ("recension", "Review"),
+}
+
+
+####################################################################################################
+#   Validation et écriture
+####################################################################################################
+def import_columns(model):
+    """Les colonnes de `model` qu'une ligne importée peut renseigner."""
+    return set(model.__table__.columns.keys()) - {"id", "cree_le", "modifie_le"}
+
+
+def validate_row(validation_schema, columns, keys, row):
+    """
+    Valide une ligne à importer (clés déjà en snake_case) et renvoie (clé, valeurs, erreurs) :
+    la clé est le couple (colonne, valeur) de la première colonne de `keys` renseignée.
+    """
+    errors = {name: ["Champ inconnu."] for name in set(row) - columns}
+    values = {}
+    try:
+        values = validation_schema.load(row)
+    except ValidationError as error:
+        errors.update(error.messages)
+    if errors:
+        return None, None, errors
+    key = next(((name, values[name]) for name in keys if values.get(name)), None)
+    if key is None:
+        return (
+            None,
+            None,
+            {"_schema": [f"Un des champs {', '.join(keys)} est obligatoire."]},
+        )
+    return key, values, {}
+
+
+def upsert_rows(session, model, keys, merged):
+    """
+    Crée ou met à jour les lignes `merged` de `model` ({clé: valeurs}, voir `validate_row`) par
+    INSERT ... ON DUPLICATE KEY UPDATE multi-lignes (`SQLQuery.upsert`), sans commit.
+    Les clés existantes sont d'abord recherchées (une requête IN par colonne de `keys`) : une
+    ligne existante est mise à jour par son id, ean n'étant pas une clé unique. Les clés de
+    recherche (cle_recherche, index de recherche) des lignes écrites sont mises à jour, l'upsert
+    ne déclenchant pas les évènements de l'ORM.
+    Renvoie {clé: (id, créée)}.
+    """
+    existing = {}
+    for name in keys:
+        column = getattr(model, name)
+        wanted = [value for key_name, value in merged if key_name == name]
+        if wanted:
+            query = select(column, model.id).where(column.in_(wanted))
+            for value, id in session.execute(query.order_by(model.id)):
+                existing.setdefault((name, value), id)
+
+    # Une requête par jeu de colonnes, l'INSERT multi-lignes demandant les mêmes colonnes
+    groups = {}
+    for key, values in merged.items():
+        if key in existing:
+            values = {"id": existing[key], **values}
+        groups.setdefault(tuple(sorted(values)), []).append(values)
+    query = getattr(databases.bolero.queries, model.__name__)
+    for group in groups.values():
+        session.execute(query.upsert(group))
+
+    entity = model.__tablename__
+    names = {
+        "id",
+        *keys,
+        *SEARCH_FIELDS[model.__name__],
+        *SEARCH_ENTITIES[entity]["fields"],
+        *SEARCH_ENTITIES[entity]["payload"],
+    }
+    written = {}
+    for name in keys:
+        column = getattr(model, name)
+        wanted = [value for key_name, value in merged if key_name == name]
+        if not wanted:
+            continue
+        query = select(*(getattr(model, field) for field in names)).where(
+            column.in_(wanted)
+        )
+        # Sans clé unique (ean), la ligne créée est la plus récente
+        for target in session.execute(query.order_by(model.id)):
+            key = (name, getattr(target, name))
+            if existing.get(key, target.id) == target.id:
+                written[key] = target
+    databases.bolero.models.SearchKey.refresh(session, model, written.values())
+    record_rows(session, entity, written.values())
+    return {key: (target.id, key not in existing) for key, target in written.items()}
+
+
+####################################################################################################
+#   Lecture des fichiers
+####################################################################################################
+def file_type(path):
+    """Le type d'un fichier d'import d'après son nom ("auteurs.ndjson.gz" : "auteurs")."""
+    name = Path(path).name.split(".")[0]
+    if name not in FILE_TYPES:
+        raise ValueError(f"{path} : le nom doit commencer par {', '.join(FILE_TYPES)}")
+    return name
+
+
+def read_records(path):
+    """
+    Les enregistrements d'un fichier .ndjson, .jsonl ou .csv, éventuellement compressé (.gz),
+    lu au fil de l'eau : les lignes JSON non décodées, ou les lignes CSV (sans les cellules
+    vides).
+    """
+    path = Path(path)
+    opener = gzip.open if path.name.endswith(".gz") else open
+    with opener(path, "rb") as stream:
+        if path.name.removesuffix(".gz").endswith(".csv"):
+            text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+            for row in csv.DictReader(text):
+                yield {name: value for name, value in row.items() if value}
+        else:
+            for line in stream:
+                if line.strip():
+                    yield line
+
+
+@lru_cache(maxsize=None)
+def _validation(model_name):
+    model = getattr(databases.bolero.models, model_name)
+    return model.marshmallow(), import_columns(model)
+
+
+def prepare_records(task):
+    """
+    Décode et valide un lot d'enregistrements (`read_records`) d'un fichier de `model_name` ;
+    exécutée dans le pool de processus de l'import s'il y en a un.
+    Renvoie pour chacun (clé, valeurs, erreurs) (voir `validate_row`) ; pour une relation, la
+    clé est None et les valeurs sont l'enregistrement décodé.
+    """
+    model_name, records = task
+    prepared = []
+    for record in records:
+        if isinstance(record, bytes):
+            try:
+                record = json.loads(record)
+            except ValueError as error:
+                prepared.append((None, None, {"_json": [str(error)]}))
+                continue
+        if not isinstance(record, dict):
+            prepared.append((None, None, {"_json": ["Un objet JSON est attendu."]}))
+            continue
+        record = humps.snakize(record)
+        if model_name in IMPORT_KEYS:
+            validation_schema, columns = _validation(model_name)
+            prepared.append(
+                validate_row(
+                    validation_schema, columns, IMPORT_KEYS[model_name], record
+                )
+            )
+        else:
+            prepared.append((None, record, {}))
+    return prepared
+
+
+####################################################################################################
+#   Import de fichiers
+####################################################################################################
+class CatalogueImporter:
+    """
+    Import de fichiers d'entités et de relations par lots de `batch_size` enregistrements, chaque
+    lot dans sa propre transaction.
+
+    Les relations référencent leurs entités par id (`id_auteur`...) ou par clé : `id_proprio_auteur`,
+    `id_proprio_ouvrage`, `ean_ouvrage`, `id_proprio_recension`. Les clés sont résolues par des
+    tables de correspondance en mémoire, chargées une fois par type d'entité et tenues à jour
+    par les entités importées ensuite. Une relation déjà existante est ignorée.
+
+    Après chaque lot validé, le nombre d'enregistrements traités est écrit dans un fichier de
+    reprise (`<fichier>.checkpoint`) : relancer l'import d'un fichier interrompu reprend après le
+    dernier lot validé. Le fichier de reprise est supprimé à la fin de l'import.
+    """
+
+    #: Nombre d'erreurs détaillées par fichier
+    max_errors = 10
+    #: Intervalle entre deux affichages de la progression, en secondes
+    progress_interval = 5
+
+    def __init__(self, session, batch_size=1000, workers=0, resume=True, echo=print):
+        self.session = session
+        self.batch_size = batch_size
+        self.workers = workers
+        self.resume = resume
+        self.echo = echo
+        self._maps = {}
+
+    ################################################################################################
+    #   Fichiers
+    ################################################################################################
+    def run(self, paths):
+        """Importe les fichiers `paths` (les entités avant les relations)."""
+        order = list(FILE_TYPES)
+        paths = sorted(paths, key=lambda path: order.index(file_type(path)))
+        pool = None
+        if self.workers:
+            # fork : les processus héritent des modèles déjà chargés
+            pool = multiprocessing.get_context("fork").Pool(self.workers)
+        try:
+            stats = [self.import_file(path, pool) for path in paths]
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        # Pour les autres processus qui partagent le cache des réponses
+        response_cache.clear()
+        return stats
+
+    def import_file(self, path, pool=None):
+        path = Path(path)
+        model_name = FILE_TYPES[file_type(path)]
+        checkpoint = Path(f"{path}.checkpoint")
+        done = self._read_checkpoint(path, checkpoint)
+        if done:
+            self.echo(f"{path.name} : reprise après {done} enregistrements")
+
+        stats = {"fichier": path.name, "crees": 0, "mis_a_jour": 0, "ignores": 0}
+        errors = []
+        records = islice(read_records(path), done, None)
+        chunks = iter(lambda: list(islice(records, self.batch_size)), [])
+        started = last_report = time.monotonic()
+        processed = 0
+        for prepared in self._prepare(model_name, chunks, pool):
+            if model_name in IMPORT_KEYS:
+                chunk_stats, chunk_errors = self._import_entities(model_name, prepared)
+            else:
+                chunk_stats, chunk_errors = self._import_relations(model_name, prepared)
+            try:
+                self.session.commit()
+            except Exception:
+                self.session.rollback()
+                raise
+            for name, count in chunk_stats.items():
+                stats[name] += count
+            errors.extend(
+                (done + processed + offset + 1, error) for offset, error in chunk_errors
+            )
+            processed += len(prepared)
+            self._write_checkpoint(path, checkpoint, done + processed)
+            if time.monotonic() - last_report >= self.progress_interval:
+                last_report = time.monotonic()
+                rate = processed / (last_report - started)
+                self.echo(
+                    f"{path.name} : {done + processed} enregistrements ({rate:.0f}/s)"
+                )
+
+        elapsed = time.monotonic() - started
+        stats.update(
+            enregistrements=processed,
+            erreurs=len(errors),
+            par_seconde=round(processed / elapsed) if elapsed else processed,
+        )
+        self.echo(
+            f"{path.name} : {stats['crees']} créés, {stats['mis_a_jour']} mis à jour, "
+            f"{stats['ignores']} ignorés, {stats['erreurs']} erreurs "
+            f"({processed} enregistrements, {stats['par_seconde']}/s)"
+        )
+        for number, error in errors[: self.max_errors]:
+            self.echo(f"    enregistrement {number} : {error}")
+        checkpoint.remove_p()
+        return stats
+
+    def _prepare(self, model_name, chunks, pool):
+        """
+        Les lots décodés et validés, dans l'ordre. Avec un pool, au plus deux lots par processus
+        sont en cours, pour ne pas lire tout le fichier d'avance.
+        """
+        if pool is None:
+            for chunk in chunks:
+                yield prepare_records((model_name, chunk))
+            return
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(prepare_records, ((model_name, chunk),)))
+            if len(pending) >= 2 * self.workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+    def _read_checkpoint(self, path, checkpoint):
+        if not self.resume or not checkpoint.exists():
+            return 0
+        state = json.loads(checkpoint.read_text())
+        # Un fichier modifié depuis est importé depuis le début
+        if state.get("size") != path.size:
+            return 0
+        return state["records"]
+
+    @staticmethod
+    def _write_checkpoint(path, checkpoint, records):
+        checkpoint.write_text(json.dumps({"size": path.size, "records": records}))
+
+    ################################################################################################
+    #   Lots
+    ################################################################################################
+    def _import_entities(self, model_name, prepared):
+        model = getattr(databases.bolero.models, model_name)
+        errors = []
+        merged = {}
+        for offset, (key, values, row_errors) in enumerate(prepared):
+            if row_errors:
+                errors.append((offset, row_errors))
+            else:
+                merged.setdefault(key, {}).update(values)
+        stats = {"crees": 0, "mis_a_jour": 0}
+        if not merged:
+            return stats, errors
+        written = upsert_rows(self.session, model, IMPORT_KEYS[model_name], merged)
+        for (name, value), (id, created) in written.items():
+            stats["crees" if created else "mis_a_jour"] += 1
+            if (model_name, name) in self._maps:
+                self._maps[(model_name, name)][value] = id
+        return stats, errors
+
+    def _map(self, model_name, name):
+        """La table de correspondance {valeur de la clé `name`: id} des entités `model_name`."""
+        if (model_name, name) not in self._maps:
+            model = getattr(databases.bolero.models, model_name)
+            column = getattr(model, name)
+            query = select(column, model.id).where(column.isnot(None))
+            # Le plus petit id en cas de doublon, comme `upsert_rows`
+            rows = self.session.execute(
+                query.order_by(model.id.desc()).execution_options(stream_results=True)
+            )
+            self._maps[(model_name, name)] = dict(rows.all())
+        return self._maps[(model_name, name)]
+
+    def _resolve(self, record, column):
+        """L'id de l'entité référencée par `record` pour la colonne de relation `column`."""
+        entity, model_name = RELATION_COLUMNS[column]
+        if record.get(column) not in (None, ""):
+            return int(record[column])
+        for name in IMPORT_KEYS[model_name]:
+            value = record.get(f"{name}_{entity}")
+            if value not in (None, ""):
+                return self._map(model_name, name).get(str(value))
+        raise ValueError(f"{entity} non renseigné")
+
+    def _import_relations(self, model_name, prepared):
+        model = getattr(databases.bolero.models, model_name)
+        columns = [name for name in RELATION_COLUMNS if name in model.__table__.columns]
+        errors = []
+        pairs = {}
+        for offset, (_, record, row_errors) in enumerate(prepared):
+            if row_errors:
+                errors.append((offset, row_errors))
+                continue
+            try:
+                ids = tuple(self._resolve(record, column) for column in columns)
+            except ValueError as error:
+                errors.append((offset, str(error)))
+                continue
+            pairs.setdefault(ids, offset)
+
+        # Les id donnés directement sont vérifiés, ceux des tables de correspondance existent
+        for position, column in enumerate(columns):
+            entity, entity_model_name = RELATION_COLUMNS[column]
+            entity_model = getattr(databases.bolero.models, entity_model_name)
+            wanted = {ids[position] for ids in pairs if ids[position] is not None}
+            found = set()
+            for chunk in chunkinze(sorted(wanted), self.batch_size):
+                found.update(
+                    self.session.execute(
+                        select(entity_model.id).where(entity_model.id.in_(chunk))
+                    ).scalars()
+                )
+            for ids in list(pairs):
+                if ids[position] not in found:
+                    errors.append((pairs.pop(ids), f"{entity} introuvable"))
+
+        existing = set()
+        relation_columns = [getattr(model, column) for column in columns]
+        for chunk in chunkinze(sorted(pairs), self.batch_size):
+            existing.update(
+                tuple(row)
+                for row in self.session.execute(
+                    select(*relation_columns).where(
+                        tuple_(*relation_columns).in_(chunk)
+                    )
+                )
+            )
+        new_pairs = [ids for ids in pairs if ids not in existing]
+        if new_pairs:
+            self.session.execute(
+                insert(model), [dict(zip(columns, ids)) for ids in new_pairs]
+            )
+        errors.sort(key=lambda error: error[0])
+        ignored = len(prepared) - len(errors) - len(new_pairs)
+        return {"crees": len(new_pairs), "ignores": ignored}, errors
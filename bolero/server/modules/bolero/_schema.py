@@ -3,13 +3,18 @@
 DOC
 """
 # Import from stdlib
+from functools import lru_cache
 
 # Imports from external libraries
 from marshmallow_sqlalchemy import SQLAlchemyAutoSchema
 from marshmallow import fields, post_dump
+from marshmallow.fields import Nested
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
 
 # Import from local code
 from bolero.models import databases
+from core.services.serializers import CompiledSerializer
 
 
 class BaseSchema(SQLAlchemyAutoSchema):
@@ -27,6 +32,10 @@ class AuthorResponseSchema(BaseSchema):
 
     class Meta(BaseSchema.Meta):
         model = databases.bolero.models.Author
+        # Relations parcourues par add_nb_recensions, invisibles depuis les champs
+        extra_loads = {
+            "nb_recensions_sur_ouvrages": (("authored_books", "book", "book_reviews"),),
+        }
         fields = (
             "id",
             "id_ref",
@@ -35,6 +44,7 @@ class AuthorResponseSchema(BaseSchema):
             "prenom",
             "authored_books",
             "authored_reviews",
+            "nb_recensions_sur_ouvrages",
             "cree_le",
             "modifie_le",
         )
@@ -56,6 +66,8 @@ class AuthorResponseSchema(BaseSchema):
 
     @post_dump(pass_original=True)
     def add_nb_recensions(self, data, original, **kwargs):
+        if "nb_recensions_sur_ouvrages" not in self.dump_fields:
+            return data
         count = 0
         for ab in getattr(original, "authored_books", []):
             book = getattr(ab, "book", None)
@@ -329,3 +341,129 @@ class JournalResponseSchema(SQLAlchemyAutoSchema):
         "id",
         "titre",
     )
+
+
+####################################################################################################
+#   Chargement des relations
+####################################################################################################
+def _relationship_paths(schema, model):
+    """
+    Liste les chemins de relations (tuples de noms d'attributs) que le schéma va parcourir lors
+    d'un dump, en suivant les champs Nested et l'option Meta.extra_loads (chemins chargés pour
+    un champ calculé, s'il est sérialisé).
+    """
+    relationships = inspect(model).relationships
+    paths = []
+    for name, extra_paths in getattr(schema.Meta, "extra_loads", {}).items():
+        if name in schema.dump_fields:
+            paths.extend(tuple(path) for path in extra_paths)
+    for name, field in schema.dump_fields.items():
+        if not isinstance(field, fields.Nested):
+            continue
+        attribute = field.attribute or name
+        if attribute not in relationships:
+            continue
+        target = relationships[attribute].mapper.class_
+        subpaths = _relationship_paths(field.schema, target)
+        if not subpaths:
+            paths.append((attribute,))
+        paths.extend((attribute,) + subpath for subpath in subpaths)
+    return paths
+
+
+def load_options(schema):
+    """
+    Options de chargement SQLAlchemy correspondant à ce que le schéma va réellement sérialiser.
+    Les collections sont chargées en lot (SELECT ... IN), les relations simples par jointure,
+    ce qui donne un nombre de requêtes constant quel que soit le nombre de lignes.
+    """
+    options = []
+    for path in _relationship_paths(schema, schema.opts.model):
+        model = schema.opts.model
+        option = None
+        for attribute in path:
+            relationship = inspect(model).relationships[attribute]
+            column = getattr(model, attribute)
+            # Collections chargées par lot, relations simples par jointure
+            loader = selectinload if relationship.uselist else joinedload
+            if option is not None:
+                loader = getattr(option, loader.__name__)
+            option = loader(column)
+            model = relationship.mapper.class_
+        options.append(option)
+    return options
+
+
+####################################################################################################
+#   Sérialiseurs précompilés
+####################################################################################################
+@lru_cache(maxsize=256)
+def serializer(schema_class, only=None):
+    """
+    Le sérialiseur précompilé de `schema_class` (réduit aux champs `only`, voir
+    `sparse_fields`), construit une seule fois par processus.
+    `serializer(...).schema` est l'instance du schéma, à utiliser pour `load_options`.
+    """
+    return CompiledSerializer(schema_class(only=only))
+
+
+def _split_names(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def sparse_fields(schema_class, fields=None, expand=None):
+    """
+    Le `only` de `schema_class` correspondant aux paramètres fields= et expand= (clés de la
+    réponse séparées par des virgules), None pour une réponse complète :
+        * fields : les champs renvoyés ; sans expand, seules les relations citées sont incluses ;
+        * expand : les relations incluses (vide : aucune), quel que soit fields.
+    Les relations exclues ne sont pas chargées (voir `load_options`).
+    Lève ValueError si un nom ne correspond à aucun champ.
+    """
+    if fields is None and expand is None:
+        return None
+    names = {}
+    relations = set()
+    dump_fields = serializer(schema_class).schema.dump_fields
+    for name, field in dump_fields.items():
+        names[name] = name
+        if field.data_key is not None:
+            names[field.data_key] = name
+        if isinstance(field, Nested):
+            relations.add(name)
+
+    def resolve(keys):
+        unknown = [key for key in keys if key not in names]
+        if unknown:
+            raise ValueError(f"Champs inconnus : {', '.join(unknown)}")
+        return {names[key] for key in keys}
+
+    if fields is None:
+        only = set(names.values()) - relations
+    else:
+        only = resolve(_split_names(fields))
+    if expand is not None:
+        expanded = resolve(_split_names(expand))
+        if expanded - relations:
+            raise ValueError(
+                f"Relations inconnues : {', '.join(sorted(expanded - relations))}"
+            )
+        only = (only - relations) | expanded
+    # Dans l'ordre du schéma, pour garder l'ordre des clés de la réponse complète
+    return tuple(name for name in dump_fields if name in only)
+
+
+#: Schémas compilés au démarrage. Les schémas des relations (AuthorBookResponseSchema...)
+#: ne sont instanciables qu'avec un `only` (id_relation et id utilisent la même colonne) :
+#: ils sont compilés à la demande, comme champs Nested des schémas ci-dessous.
+RESPONSE_SCHEMAS = (
+    AuthorResponseSchema,
+    BookResponseSchema,
+    ReviewReponseSchema,
+    EditorResponseSchema,
+    JournalResponseSchema,
+)
+
+# Compilation au démarrage
+for _schema_class in RESPONSE_SCHEMAS:
+    serializer(_schema_class)
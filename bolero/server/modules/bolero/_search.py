@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+"""
+Recherche plein texte sur le catalogue (auteurs, ouvrages, recensions), sans passer par MySQL.
+
+L'index est construit une fois à partir du bind bolero, puis tenu à jour par les évènements
+after_insert / after_update / after_delete des modèles. Les modifications ne sont appliquées
+qu'au commit de la session (et oubliées en cas de rollback).
+
+L'index est propre à chaque processus : les écritures faites par un autre processus ne sont
+visibles qu'après la reconstruction périodique (SEARCH.rebuild-interval).
+"""
+# Import from stdlib
+import threading
+import time
+
+# Imports from external libraries
+from flask import current_app
+from sqlalchemy import inspect, select
+from sqlalchemy.event import listen
+from sqlalchemy.orm import Session, object_session
+
+# Import from local code
+from bolero.models import databases
+from core.services.search import InvertedIndex
+
+
+#: Par type d'entité : le modèle, les colonnes indexées et les colonnes renvoyées
+ENTITIES = {
+    "auteur": {
+        "model": "Author",
+        "fields": ("nom", "prenom"),
+        "payload": ("id", "nom", "prenom", "id_ref"),
+    },
+    "ouvrage": {
+        "model": "Book",
+        "fields": ("titre", "sous_titre", "editeur", "traduit_par"),
+        "payload": ("id", "titre", "sous_titre", "annee_parution", "editeur"),
+    },
+    "recension": {
+        "model": "Review",
+        "fields": ("titre", "sous_titre", "titre_revue", "traduit_par"),
+        "payload": ("id", "titre", "titre_revue", "annee"),
+    },
+}
+
+#: Poids des colonnes dans le classement
+WEIGHTS = {"nom": 2, "titre": 3, "sous_titre": 2}
+
+_SESSION_KEY = "catalogue_search"
+
+
+class CatalogueSearch:
+    def __init__(self):
+        self.k1 = 1.2
+        self.b = 0.75
+        self.rebuild_interval = None
+        self._index = None
+        self._building = None
+        self._built_at = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        config = app.config["SEARCH"]
+        self.k1 = config.k1
+        self.b = config.b
+        self.rebuild_interval = config.rebuild_interval
+        if config.build_on_startup:
+            self.rebuild_in_background(app.logger)
+
+    ################################################################################################
+    #   Construction
+    ################################################################################################
+    def _new_index(self):
+        return InvertedIndex(k1=self.k1, b=self.b, weights=WEIGHTS)
+
+    def build(self):
+        """
+        Construit un nouvel index à partir de la base puis remplace l'index courant.
+        """
+        index = self._new_index()
+        # Les modifications validées pendant la construction sont aussi appliquées au
+        # nouvel index (voir `apply`)
+        self._building = index
+        try:
+            with databases.bolero.engine.connect() as connection:
+                for entity, spec in ENTITIES.items():
+                    model = getattr(databases.bolero.models, spec["model"])
+                    columns = {*spec["fields"], *spec["payload"]}
+                    query = select(*(getattr(model, name) for name in columns))
+                    rows = connection.execution_options(stream_results=True).execute(
+                        query
+                    )
+                    for row in rows.mappings():
+                        self._add(index, entity, row)
+        finally:
+            self._building = None
+        self._index = index
+        self._built_at = time.monotonic()
+        return index
+
+    def rebuild_in_background(self, logger):
+        if not self._lock.acquire(blocking=False):
+            return
+
+        def run():
+            try:
+                self.build()
+            except Exception:
+                logger.exception("Construction de l'index de recherche impossible")
+            finally:
+                self._lock.release()
+
+        threading.Thread(target=run, name="catalogue-search", daemon=True).start()
+
+    @property
+    def index(self):
+        """
+        L'index courant, construit à la première utilisation s'il n'existe pas encore.
+        """
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self.build()
+        return self._index
+
+    def _is_stale(self):
+        if self.rebuild_interval is None or self._built_at is None:
+            return False
+        return time.monotonic() - self._built_at > self.rebuild_interval
+
+    ################################################################################################
+    #   Mises à jour
+    ################################################################################################
+    @staticmethod
+    def _add(index, entity, row):
+        spec = ENTITIES[entity]
+        index.add(
+            (entity, row["id"]),
+            {name: row[name] for name in spec["fields"]},
+            {name: row[name] for name in spec["payload"]},
+        )
+
+    def apply(self, changes):
+        """
+        `changes` associe une clé (entité, id) à la ligne à indexer, ou à None pour une
+        suppression.
+        """
+        for index in (self._index, self._building):
+            if index is None:
+                continue
+            for key, row in changes.items():
+                if row is None:
+                    index.remove(key)
+                else:
+                    self._add(index, key[0], row)
+
+    ################################################################################################
+    #   Recherche
+    ################################################################################################
+    def search(self, query, limit=20, types=None):
+        index = self.index
+        if self._is_stale():
+            # L'index courant reste utilisé pendant la reconstruction
+            self.rebuild_in_background(current_app.logger)
+        accept = None
+        if types:
+            accept = lambda key: key[0] in types
+        return [
+            {"type": key[0], "score": round(score, 4), **payload}
+            for key, score, payload in index.search(query, limit=limit, accept=accept)
+        ]
+
+
+catalogue_search = CatalogueSearch()
+
+
+####################################################################################################
+#   Évènements SQLAlchemy
+####################################################################################################
+def _pending(target):
+    session = object_session(target)
+    return session.info.setdefault(_SESSION_KEY, {})
+
+
+def _row(spec, target):
+    return {name: getattr(target, name) for name in {*spec["fields"], *spec["payload"]}}
+
+
+def record_rows(session, entity, rows):
+    """
+    Indexe au commit de `session` les lignes `rows` (avec les colonnes de ENTITIES) écrites sans
+    passer par l'ORM, donc sans ses évènements.
+    """
+    spec = ENTITIES[entity]
+    pending = session.info.setdefault(_SESSION_KEY, {})
+    for row in rows:
+        pending[(entity, row.id)] = _row(spec, row)
+
+
+def _listen_entity(entity, spec):
+    model = getattr(databases.bolero.models, spec["model"])
+    watched = {*spec["fields"], *spec["payload"]}
+
+    def after_insert(mapper, connection, target):
+        _pending(target)[(entity, target.id)] = _row(spec, target)
+
+    def after_update(mapper, connection, target):
+        state = inspect(target)
+        if any(state.attrs[name].history.has_changes() for name in watched):
+            _pending(target)[(entity, target.id)] = _row(spec, target)
+
+    def after_delete(mapper, connection, target):
+        _pending(target)[(entity, target.id)] = None
+
+    listen(model, "after_insert", after_insert)
+    listen(model, "after_update", after_update)
+    listen(model, "after_delete", after_delete)
+
+
+def _after_commit(session):
+    changes = session.info.pop(_SESSION_KEY, None)
+    if changes:
+        catalogue_search.apply(changes)
+
+
+def _after_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
+
+
+for _entity, _spec in ENTITIES.items():
+    _listen_entity(_entity, _spec)
+listen(Session, "after_commit", _after_commit)
+listen(Session, "after_rollback", _after_rollback)
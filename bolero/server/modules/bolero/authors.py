@@ -11,6 +11,8 @@ Module de gestion des auteurs.
 from bolero.server.modules.bolero._common import AuthorsResource
 from core.server.views import req, fields
 from core.server.documentation.models import (
+    export_job_model,
+    import_batch_response,
     ns_authors,
     create_response,
     author_model,
@@ -20,6 +22,7 @@ from core.server.documentation.parsers import (
     author_post_parser,
     author_put_parser,
     author_export_parser,
+    sparse_fields_parser,
 )
 
 ####################################################################################################
@@ -39,6 +42,8 @@ class Authors(AuthorsResource):
             "**Remarques :**\n"
             "- Tous les paramètres sont facultatifs.\n"
             "- Le paramètre `limit` définit le nombre maximal de résultats.\n"
+            "- `fields` et `expand` réduisent la réponse et les relations chargées : "
+            "`?fields=id,nom,prenom&expand=auteur_ouvrages`.\n"
             "- Si un auteur n’a aucune relation, il apparaîtra avec des listes vides.\n"
             "- En cas de non résultats, la requête renvoie une liste vide."
         ),
@@ -53,6 +58,9 @@ class Authors(AuthorsResource):
             "page": fields.Integer(required=False),
             "sort": fields.String(required=False),
             "order": fields.String(required=False),
+            "cursor": fields.String(required=False),
+            "fields": fields.String(required=False),
+            "expand": fields.String(required=False),
             "id_proprio": fields.String(required=False),
         },
         source="args",
@@ -94,9 +102,17 @@ class AuthorByIdProprio(AuthorsResource):
             "Récupère les détails d’un auteur à partir de son identifiant propriétaire unique dans la base Boléro.\n\n"
         ),
     )
-    def get(self, id_proprio):
+    @ns_authors.expect(sparse_fields_parser())
+    @req(
+        {
+            "fields": fields.String(required=False),
+            "expand": fields.String(required=False),
+        },
+        source="args",
+    )
+    def get(self, params, id_proprio):
         """Récupère les détails d’un auteur à partir de son identifiant propriétaire unique."""
-        return self._get_author_by_proprio_id(id_proprio)
+        return self._get_author_by_proprio_id(id_proprio, params)
 
 
 @ns_authors.route("/auteurs/<int:id>")
@@ -109,9 +125,17 @@ class Author(AuthorsResource):
             "Récupère les détails d’un auteur à partir de son identifiant unique dans la base Boléro.\n\n"
         ),
     )
-    def get(self, id):
+    @ns_authors.expect(sparse_fields_parser())
+    @req(
+        {
+            "fields": fields.String(required=False),
+            "expand": fields.String(required=False),
+        },
+        source="args",
+    )
+    def get(self, params, id):
         """Récupère les détails d’un auteur à partir de son identifiant unique."""
-        return self._get_author_by_id(id)
+        return self._get_author_by_id(id, params)
 
     @ns_authors.response(
         200,
@@ -151,6 +175,7 @@ class Author(AuthorsResource):
 class AuthorsExport(AuthorsResource):
     @ns_authors.expect(author_export_parser())
     @ns_authors.produces(["text/csv"])
+    @ns_authors.response(202, "Export asynchrone mis en file", export_job_model)
     @ns_authors.response(200, "Fichier CSV généré avec succès (Content-Type: text/csv)")
     @ns_authors.doc(
         description=(
@@ -159,7 +184,11 @@ class AuthorsExport(AuthorsResource):
             "`GET /auteurs/export?nom=Durand`\n\n"
             "**Remarques :**\n"
             "- Tous les filtres de recherche classiques sont disponibles.\n"
-            "- La réponse est un fichier `.csv` directement téléchargeable."
+            "- La réponse est un fichier `.csv` directement téléchargeable.\n"
+            "- Avec `asynchrone=true`, l'export est exécuté en tâche de fond : la réponse (202) "
+            "donne l'état de l'export, à suivre sur `/exports/<id>`, puis le fichier se "
+            "télécharge sur `/exports/<id>/fichier` (reprise possible avec l'en-tête `Range`). "
+            "`gzip=true` compresse le fichier. Deux exports identiques partagent le même fichier."
         )
     )
     @req(
@@ -169,9 +198,38 @@ class AuthorsExport(AuthorsResource):
             "nom": fields.String(required=False),
             "prenom": fields.String(required=False),
             "id_proprio": fields.String(required=False),
+            "asynchrone": fields.Boolean(required=False),
+            "gzip": fields.Boolean(required=False),
         },
         source="args",
     )
     def get(self, params):
         """Exporte les auteurs filtrés au format CSV."""
         return self._export_csv(params)
+
+
+@ns_authors.route("/auteurs/batch")
+class AuthorsBatch(AuthorsResource):
+    @ns_authors.response(
+        200, "Lignes créées ou mises à jour", import_batch_response(ns_authors)
+    )
+    @ns_authors.response(207, "Certaines lignes n'ont pas pu être importées")
+    @ns_authors.response(400, "Corps de la requête invalide")
+    @ns_authors.doc(
+        description=(
+            "Crée ou met à jour des auteurs par lot (upsert).\n\n"
+            "**Exemple d'utilisation :**\n"
+            '`POST /auteurs/batch` avec un tableau JSON `[{"id_proprio": "AUT-1", "nom": "Durand", "prenom": "Marie"}]`, '
+            "ou du NDJSON "
+            "(`Content-Type: application/x-ndjson`, un objet JSON par ligne).\n\n"
+            "**Remarques :**\n"
+            "- Une ligne est identifiée par `id_proprio` : une ligne existante est mise à jour avec "
+            "les champs fournis, sinon elle est créée.\n"
+            "- Le lot est importé dans une seule transaction.\n"
+            "- La réponse donne le résultat de chaque ligne (`index`) : 201 créée, 200 mise à "
+            "jour, 422 invalide (`errors`), 400 illisible."
+        )
+    )
+    def post(self):
+        """Crée ou met à jour des auteurs par lot."""
+        return self._post_batch()
@@ -11,6 +11,8 @@ Module de gestion des ouvrages.
 from bolero.server.modules.bolero._common import BooksResource
 from core.server.views import req, fields
 from core.server.documentation.models import (
+    export_job_model,
+    import_batch_response,
     ns_books,
     book_model,
     create_response,
@@ -20,6 +22,7 @@ from core.server.documentation.parsers import (
     book_post_parser,
     book_put_parser,
     book_export_parser,
+    sparse_fields_parser,
 )
 
 ####################################################################################################
@@ -40,6 +43,8 @@ class Books(BooksResource):
             "**Remarques :**\n"
             "- Tous les paramètres sont facultatifs.\n"
             "- Le paramètre `limit` définit le nombre maximal de résultats.\n"
+            "- `fields` et `expand` réduisent la réponse et les relations chargées : "
+            "`?fields=id,titre&expand=ouvrage_auteurs`.\n"
             "- Si un ouvrage n’a aucune relation, il apparaîtra avec des listes vides."
         )
     )
@@ -60,6 +65,9 @@ class Books(BooksResource):
             "page": fields.Integer(required=False),
             "sort": fields.String(required=False),
             "order": fields.String(required=False),
+            "cursor": fields.String(required=False),
+            "fields": fields.String(required=False),
+            "expand": fields.String(required=False),
             "id_proprio": fields.String(required=False),
             "traduit_par": fields.String(required=False),
             "langue": fields.String(required=False),
@@ -101,9 +109,17 @@ class BookByIdProprio(BooksResource):
             "Récupère les détails d’un ouvrage à partir de son identifiant unique dans la base Boléro.\n\n"
         ),
     )
-    def get(self, id_proprio):
+    @ns_books.expect(sparse_fields_parser())
+    @req(
+        {
+            "fields": fields.String(required=False),
+            "expand": fields.String(required=False),
+        },
+        source="args",
+    )
+    def get(self, params, id_proprio):
         """Récupère les détails d’un ouvrage à partir de son identifiant propriétaire unique."""
-        return self._get_book_by_id_proprio(id_proprio)
+        return self._get_book_by_id_proprio(id_proprio, params)
 
 
 @ns_books.route("/ouvrages/by-ean/<string:ean>")
@@ -116,9 +132,17 @@ class BookByIdProprio(BooksResource):
             "Récupère les détails d’un ouvrage à partir de son EAN dans la base Boléro.\n\n"
         ),
     )
-    def get(self, ean):
+    @ns_books.expect(sparse_fields_parser())
+    @req(
+        {
+            "fields": fields.String(required=False),
+            "expand": fields.String(required=False),
+        },
+        source="args",
+    )
+    def get(self, params, ean):
         """Récupère les détails d’un ouvrage à partir de son EAN."""
-        return self._get_book_by_ean(ean)
+        return self._get_book_by_ean(ean, params)
 
 
 @ns_books.route("/ouvrages/<int:id>")
@@ -131,9 +155,17 @@ class Book(BooksResource):
             "Récupère les détails d’un ouvrage à partir de son identifiant unique dans la base Boléro.\n\n"
         ),
     )
-    def get(self, id):
+    @ns_books.expect(sparse_fields_parser())
+    @req(
+        {
+            "fields": fields.String(required=False),
+            "expand": fields.String(required=False),
+        },
+        source="args",
+    )
+    def get(self, params, id):
         """Récupère les détails d’un ouvrage à partir de son identifiant unique."""
-        return self._get_book_by_id(id)
+        return self._get_book_by_id(id, params)
 
     @ns_books.response(200, "Ouvrage mis à jour avec succès", create_response(ns_books))
     @ns_books.response(404, "Ouvrage non trouvé")
@@ -165,6 +197,7 @@ class Book(BooksResource):
 class BooksExport(BooksResource):
     @ns_books.expect(book_export_parser())
     @ns_books.produces(["text/csv"])
+    @ns_books.response(202, "Export asynchrone mis en file", export_job_model)
     @ns_books.response(200, "Fichier CSV généré avec succès (Content-Type: text/csv)")
     @ns_books.doc(
         description=(
@@ -180,7 +213,11 @@ class BooksExport(BooksResource):
             "- Les champs texte sont automatiquement encadrés de guillemets.\n"
             "- Plusieurs auteurs sont séparés par `;` dans une seule cellule.\n"
             "- Tous les paramètres de recherche classiques sont disponibles, y compris ceux liés aux auteurs.\n"
-            "- Le fichier CSV est directement téléchargeable via le navigateur ou un outil de requêtage."
+            "- Le fichier CSV est directement téléchargeable via le navigateur ou un outil de requêtage.\n"
+            "- Avec `asynchrone=true`, l'export est exécuté en tâche de fond : la réponse (202) "
+            "donne l'état de l'export, à suivre sur `/exports/<id>`, puis le fichier se "
+            "télécharge sur `/exports/<id>/fichier` (reprise possible avec l'en-tête `Range`). "
+            "`gzip=true` compresse le fichier. Deux exports identiques partagent le même fichier."
         )
     )
     @req(
@@ -203,9 +240,38 @@ class BooksExport(BooksResource):
             "id_proprio": fields.String(required=False),
             "traduit_par": fields.String(required=False),
             "langue": fields.String(required=False),
+            "asynchrone": fields.Boolean(required=False),
+            "gzip": fields.Boolean(required=False),
         },
         source="args",
     )
     def get(self, params):
         """Exporte les ouvrages filtrés au format CSV."""
         return self._export_csv(params)
+
+
+@ns_books.route("/ouvrages/batch")
+class BooksBatch(BooksResource):
+    @ns_books.response(
+        200, "Lignes créées ou mises à jour", import_batch_response(ns_books)
+    )
+    @ns_books.response(207, "Certaines lignes n'ont pas pu être importées")
+    @ns_books.response(400, "Corps de la requête invalide")
+    @ns_books.doc(
+        description=(
+            "Crée ou met à jour des ouvrages par lot (upsert).\n\n"
+            "**Exemple d'utilisation :**\n"
+            '`POST /ouvrages/batch` avec un tableau JSON `[{"id_proprio": "OUV-1", "titre": "...", "ean": "9780000000001", ...}]`, '
+            "ou du NDJSON "
+            "(`Content-Type: application/x-ndjson`, un objet JSON par ligne).\n\n"
+            "**Remarques :**\n"
+            "- Une ligne est identifiée par `id_proprio` ou, à défaut, `ean` : une ligne existante est mise à jour avec "
+            "les champs fournis, sinon elle est créée.\n"
+            "- Le lot est importé dans une seule transaction.\n"
+            "- La réponse donne le résultat de chaque ligne (`index`) : 201 créée, 200 mise à "
+            "jour, 422 invalide (`errors`), 400 illisible."
+        )
+    )
+    def post(self):
+        """Crée ou met à jour des ouvrages par lot."""
+        return self._post_batch()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+"""
+Module de suivi des exports CSV exécutés en tâche de fond.
+"""
+
+# Import from local code
+from bolero.server.modules.bolero._common import ExportsResource
+from core.server.documentation.models import ns_exports, export_job_model
+
+####################################################################################################
+# Routes
+####################################################################################################
+
+
+@ns_exports.route("/exports/<string:job_id>", endpoint="export_status")
+class ExportStatus(ExportsResource):
+    @ns_exports.response(200, "État de l'export", export_job_model)
+    @ns_exports.response(404, "Export introuvable ou expiré")
+    @ns_exports.doc(
+        description=(
+            "Renvoie l'état d'un export demandé avec `asynchrone=true`.\n\n"
+            "**Exemple d'utilisation :**\n"
+            "`GET /exports/3f2a...`\n\n"
+            "**Remarques :**\n"
+            "- `statut` vaut `en_attente`, `en_cours`, `termine` ou `erreur`.\n"
+            "- Une fois l'export terminé, `fichier` donne l'URL de téléchargement."
+        )
+    )
+    def get(self, job_id):
+        """Récupère l'état d'un export."""
+        return self._get_status(job_id)
+
+
+@ns_exports.route("/exports/<string:job_id>/fichier", endpoint="export_file")
+class ExportFile(ExportsResource):
+    @ns_exports.produces(["text/csv", "application/gzip"])
+    @ns_exports.response(200, "Fichier de l'export")
+    @ns_exports.response(206, "Partie du fichier demandée avec l'en-tête Range")
+    @ns_exports.response(404, "Export introuvable ou expiré")
+    @ns_exports.response(409, "L'export n'est pas terminé")
+    @ns_exports.doc(
+        description=(
+            "Télécharge le fichier d'un export terminé.\n\n"
+            "**Remarques :**\n"
+            "- Un téléchargement interrompu peut reprendre avec l'en-tête `Range`.\n"
+            "- Le fichier est compressé (`.csv.gz`) si l'export a été demandé avec `gzip=true`."
+        )
+    )
+    def get(self, job_id):
+        """Télécharge le fichier d'un export."""
+        return self._get_file(job_id)
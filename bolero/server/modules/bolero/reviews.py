@@ -11,6 +11,8 @@ Module de gestion des recensions.
 from bolero.server.modules.bolero._common import ReviewsResource
 from core.server.views import req, fields
 from core.server.documentation.models import (
+    export_job_model,
+    import_batch_response,
     ns_reviews,
     review_model,
     create_response,
@@ -20,6 +22,7 @@ from core.server.documentation.parsers import (
     review_post_parser,
     review_put_parser,
     review_export_parser,
+    sparse_fields_parser,
 )
 
 ####################################################################################################
@@ -42,6 +45,8 @@ class Reviews(ReviewsResource):
             "**Remarques :**\n"
             "- Tous les paramètres sont facultatifs.\n"
             "- Le paramètre `limit` définit le nombre maximal de résultats.\n"
+            "- `fields` et `expand` réduisent la réponse et les relations chargées : "
+            "`?fields=id,titre&expand=`.\n"
             "- Si une recension n’a aucune relation, elle apparaîtra avec des listes vides."
         )
     )
@@ -64,6 +69,9 @@ class Reviews(ReviewsResource):
             "page": fields.Integer(required=False),
             "sort": fields.String(required=False),
             "order": fields.String(required=False),
+            "cursor": fields.String(required=False),
+            "fields": fields.String(required=False),
+            "expand": fields.String(required=False),
             "id_proprio": fields.String(required=False),
             "traducteur": fields.String(required=False),
             "langue": fields.String(required=False),
@@ -109,9 +117,17 @@ class ReviewByIdProprio(ReviewsResource):
             "Récupère les détails d’une recension à partir de son identifiant propriétaire unique dans la base Boléro."
         )
     )
-    def get(self, id_proprio):
+    @ns_reviews.expect(sparse_fields_parser())
+    @req(
+        {
+            "fields": fields.String(required=False),
+            "expand": fields.String(required=False),
+        },
+        source="args",
+    )
+    def get(self, params, id_proprio):
         """Récupère les détails d’une recension à partir de son identifiant propriétaire unique."""
-        return self._get_review_by_id_proprio(id_proprio)
+        return self._get_review_by_id_proprio(id_proprio, params)
 
 
 @ns_reviews.route("/recensions/<int:id>")
@@ -126,9 +142,17 @@ class Review(ReviewsResource):
             "Récupère les détails d’une recension à partir de son identifiant unique dans la base Boléro."
         )
     )
-    def get(self, id):
+    @ns_reviews.expect(sparse_fields_parser())
+    @req(
+        {
+            "fields": fields.String(required=False),
+            "expand": fields.String(required=False),
+        },
+        source="args",
+    )
+    def get(self, params, id):
         """Récupère les détails d’une recension à partir de son identifiant unique."""
-        return self._get_review_by_id(id)
+        return self._get_review_by_id(id, params)
 
     @ns_reviews.response(
         200, "Recension mise à jour avec succès", create_response(ns_reviews)
@@ -164,6 +188,7 @@ class Review(ReviewsResource):
 class ReviewsExport(ReviewsResource):
     @ns_reviews.expect(review_export_parser())
     @ns_reviews.produces(["text/csv"])
+    @ns_reviews.response(202, "Export asynchrone mis en file", export_job_model)
     @ns_reviews.response(200, "Fichier CSV généré avec succès (Content-Type: text/csv)")
     @ns_reviews.doc(
         description=(
@@ -179,7 +204,11 @@ class ReviewsExport(ReviewsResource):
             "- Le fichier est retourné au format CSV, avec `;` comme séparateur.\n"
             "- Les champs texte sont encadrés de guillemets pour éviter les erreurs de format.\n"
             "- Plusieurs auteurs ou ouvrages sont séparés par `;` ou `|` selon le contexte.\n"
-            "- Le paramètre `date_parution` accepte le format `YYYY-MM-DD` mais ne filtre que par année."
+            "- Le paramètre `date_parution` accepte le format `YYYY-MM-DD` mais ne filtre que par année.\n"
+            "- Avec `asynchrone=true`, l'export est exécuté en tâche de fond : la réponse (202) "
+            "donne l'état de l'export, à suivre sur `/exports/<id>`, puis le fichier se "
+            "télécharge sur `/exports/<id>/fichier` (reprise possible avec l'en-tête `Range`). "
+            "`gzip=true` compresse le fichier. Deux exports identiques partagent le même fichier."
         )
     )
     @req(
@@ -204,9 +233,38 @@ class ReviewsExport(ReviewsResource):
             "id_proprio": fields.String(required=False),
             "traducteur": fields.String(required=False),
             "langue": fields.String(required=False),
+            "asynchrone": fields.Boolean(required=False),
+            "gzip": fields.Boolean(required=False),
         },
         source="args",
     )
     def get(self, params):
         """Exporte les rencensions filtrées au format CSV."""
         return self._export_csv(params)
+
+
+@ns_reviews.route("/recensions/batch")
+class ReviewsBatch(ReviewsResource):
+    @ns_reviews.response(
+        200, "Lignes créées ou mises à jour", import_batch_response(ns_reviews)
+    )
+    @ns_reviews.response(207, "Certaines lignes n'ont pas pu être importées")
+    @ns_reviews.response(400, "Corps de la requête invalide")
+    @ns_reviews.doc(
+        description=(
+            "Crée ou met à jour des recensions par lot (upsert).\n\n"
+            "**Exemple d'utilisation :**\n"
+            '`POST /recensions/batch` avec un tableau JSON `[{"id_proprio": "REC-1", "titre": "...", ...}]`, '
+            "ou du NDJSON "
+            "(`Content-Type: application/x-ndjson`, un objet JSON par ligne).\n\n"
+            "**Remarques :**\n"
+            "- Une ligne est identifiée par `id_proprio` : une ligne existante est mise à jour avec "
+            "les champs fournis, sinon elle est créée.\n"
+            "- Le lot est importé dans une seule transaction.\n"
+            "- La réponse donne le résultat de chaque ligne (`index`) : 201 créée, 200 mise à "
+            "jour, 422 invalide (`errors`), 400 illisible."
+        )
+    )
+    def post(self):
+        """Crée ou met à jour des recensions par lot."""
+        return self._post_batch()
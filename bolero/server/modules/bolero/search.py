@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""
+Module de recherche plein texte sur le catalogue.
+"""
+
+# Import from local code
+from bolero.server.modules.bolero._common import SearchResource
+from core.server.views import req, fields
+from core.server.documentation.models import ns_search, search_response_model
+from core.server.documentation.parsers import search_get_parser
+
+####################################################################################################
+# Routes
+####################################################################################################
+
+
+@ns_search.route("/recherche")
+class Search(SearchResource):
+    @ns_search.expect(search_get_parser())
+    @ns_search.response(200, "Résultats de la recherche", search_response_model)
+    @ns_search.response(400, "Paramètre 'type' invalide")
+    @ns_search.doc(
+        description=(
+            "Recherche plein texte sur les auteurs, ouvrages et recensions, classée par "
+            "pertinence (BM25).\n\n"
+            "**Exemple d'utilisation :**\n"
+            "`GET /recherche?q=hugo miserab&type=ouvrage,recension&limit=10`\n\n"
+            "**Remarques :**\n"
+            "- La recherche ne tient compte ni de la casse ni des accents.\n"
+            "- Le dernier mot peut être incomplet (`miserab` trouve `Misérables`).\n"
+            "- Sont indexés : nom et prénom des auteurs ; titre, sous-titre, éditeur et "
+            "traducteur des ouvrages ; titre, sous-titre, revue et traducteur des recensions.\n"
+            "- L'index est en mémoire : une écriture faite par un autre processus de l'api "
+            "n'apparaît qu'après la reconstruction périodique de l'index."
+        )
+    )
+    @req(
+        {
+            "q": fields.String(required=True),
+            "type": fields.String(required=False),
+            "limit": fields.Integer(required=False),
+        },
+        source="args",
+    )
+    def get(self, params):
+        """Recherche plein texte dans le catalogue Boléro."""
+        return self._get(params)
@@ -37,6 +37,9 @@ class DatabaseNamespace(SimpleNamespace):
     def disconnect(self):
         return self.__recursive_call("disconnect")
 
+    def teardown(self):
+        return self.__recursive_call("teardown")
+
 
 def _setup_database(bind: str, config: Union[str, dict], base_setup_module: str) -> SQLClient:
     kwargs = dict(config)
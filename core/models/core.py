@@ -10,7 +10,7 @@ from box import Box, BoxList
 from marshmallow import Schema, INCLUDE
 from marshmallow_sqlalchemy import fields_for_model
 from sqlalchemy import MetaData, inspect, Table, select, exc, DateTime
-from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.dialects import mysql, sqlite
 from sqlalchemy.engine import make_url
 from sqlalchemy.event import listens_for
 from sqlalchemy.ext.automap import automap_base
@@ -81,13 +81,30 @@ class SQLQuery(_SQLQuery):
         """
         Permet de générer des requêtes INSERT ON DUPLICATE KEY
         Les requêtes doivent ensuite être exécutés dans un engine
+        `values` peut être une liste de lignes (INSERT multi-lignes, toutes avec les mêmes colonnes) :
+        par défaut, chaque ligne en doublon est alors mise à jour avec ses propres valeurs.
+        Avec sqlite (bases locales, benchmarks), la requête équivalente est un INSERT ... ON CONFLICT DO UPDATE.
         """
+        is_sqlite = self.session.get_bind().dialect.name == "sqlite"
+        dialect = sqlite if is_sqlite else mysql
+        statement = dialect.insert(self.model_class).values(values)
         if values_on_duplicate is None:
-            values_on_duplicate = values
-        return insert(self.model_class).values(values).on_duplicate_key_update(values_on_duplicate)
+            if isinstance(values, dict):
+                values_on_duplicate = values
+            else:
+                inserted = statement.excluded if is_sqlite else statement.inserted
+                values_on_duplicate = {name: inserted[name] for name in values[0]}
+        if is_sqlite:
+            return statement.on_conflict_do_update(set_=values_on_duplicate)
+        return statement.on_duplicate_key_update(values_on_duplicate)
 
 
 class SQLClient(_SQLClient):
+    #: Ce qui est fait en fin de requête :
+    #:   * remove : la session est rendue, les connexions restent dans le pool de l'engine
+    #:   * dispose : la session est rendue et le pool est vidé (une nouvelle connexion par requête)
+    SESSION_LIFECYCLES = ("remove", "dispose")
+
     def __init__(self, *args, **kwargs):
         self._models = Box()
         self._queries = Box()
@@ -97,14 +114,27 @@ class SQLClient(_SQLClient):
         self._bind_key = kwargs.pop("bind_key", None)
         self._module_key = kwargs.pop("module_key", None)
         self._format_tablename = kwargs.pop("table_case", "same")
+        self._session_lifecycle = kwargs.pop("session_lifecycle", "remove")
+        if self._session_lifecycle not in self.SESSION_LIFECYCLES:
+            accepted = " ou ".join(self.SESSION_LIFECYCLES)
+            raise ValueError(
+                f"session_lifecycle doit valoir {accepted}, "
+                f"reçu {self._session_lifecycle!r}"
+            )
+        # Les pools utilisés par sqlite n'acceptent pas les options de dimensionnement
+        if make_url(kwargs["database_uri"]).get_backend_name() == "sqlite":
+            for option in ("pool_size", "max_overflow", "pool_timeout"):
+                kwargs.pop(option, None)
         # On définit un modèle de base par défaut
         if "model_class" not in kwargs:
             kwargs["model_class"] = self._make_model_class(kwargs["database_uri"])
         # Définition d'une classe custom par défaut pour les requêtes
         kwargs.setdefault("query_class", SQLQuery)
         super().__init__(*args, **kwargs)
-        # On ping à chaque fois qu'on crée une nouvelle session
-        listens_for(self.engine, "engine_connect")(self.ping_connection)
+        # On ping à chaque fois qu'on crée une nouvelle session, sauf si le pool s'en charge
+        # déjà lors de l'emprunt d'une connexion (pool_pre_ping)
+        if not self.settings.pool_pre_ping:
+            listens_for(self.engine, "engine_connect")(self.ping_connection)
         self._post_init_client()
 
     def _post_init_client(self):
@@ -118,7 +148,9 @@ class SQLClient(_SQLClient):
         Retourne un modèle de base avec des mixins supplémentaires
         """
         db_uri = make_url(db_uri)
-        metadata = MetaData(schema=db_uri.database)
+        # Pour sqlite, `database` est le chemin du fichier et non un schéma
+        schema = db_uri.database if db_uri.get_backend_name() != "sqlite" else None
+        metadata = MetaData(schema=schema)
         Model = type("Model", (ModelReprMixin, ModelBase), {"_bind_key": self.bind_key, "_bind_client": self})
         Model = as_declarative(metadata=metadata)(Model)
         return Model
@@ -140,6 +172,16 @@ class SQLClient(_SQLClient):
         finally:
             connection.should_close_with_result = save_should_close_with_result
 
+    def teardown(self):
+        """
+        À appeler en fin de requête, suivant le mode `session_lifecycle`
+        """
+        if self._session_lifecycle == "dispose":
+            self.disconnect()
+            self.close_all()
+            return
+        self.remove()
+
     def save(self, models, *args, **kwargs):
         """
         Surcharge pour gérer les instances de la bibliothèque Box
@@ -47,7 +47,7 @@ class TimestampMixin:
 @listens_for(TimestampMixin, "instrument_class", propagate=True)
 def instrument_timestamp_class(mapper, _):
     """
-    Permet d'ajouter un trigger sur les colonnes d'horodatages
+    Permet d'ajouter un trigger sur les colonnes d'horodatages (MySQL uniquement)
     """
     if mapper.local_table is None:
         return
@@ -69,7 +69,7 @@ def instrument_timestamp_class(mapper, _):
                 "before_insert_trigger": f"before_insert_{mapper.local_table.name}",
                 "before_update_trigger": f"before_update_{mapper.local_table.name}",
             },
-        ),
+        ).execute_if(dialect="mysql"),
     )
 
 
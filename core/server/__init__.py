@@ -22,15 +22,14 @@ import click
 
 # Import from local code
 from .error import app_handle_error, JSONHTTPException
+from .instrumentation import request_instrumentation
+from .metrics import metrics
+from .profiling import SamplingProfilerMiddleware
 from .json_encoder import JSONProvider
 from .views import Api, Schema
 from core.server.api import BoleroAPI
 
 
-# Monkey patching pour flask_restful qui utilise la bibliothèque python pour JSON
-# Y a certainement moyen de faire autrement, je m'en occuperais plus tard
-
-
 __all__ = [
     "abort",
     "CoreServer",
@@ -118,6 +117,7 @@ class CoreServer:
         # Mise en place extensions
         app.extensions["core"] = self
         FlaskDynaconf(app, dynaconf_instance=self.dynaconf_instance)
+        app.json.use_backend(app.config.JSON_BACKEND)
         CORS(app, resources={r"*": {"origins": "*"}})
 
         # Création de l'instance API RESTX avec Swagger intégré
@@ -133,8 +133,26 @@ class CoreServer:
         if app.config.get("APP_PROXY_FIX"):
             app.wsgi_app = ProxyFix(app.wsgi_app)
 
-        # Proxy de profile pour mesurer les performances
-        if app.config.get("APP_PROXY_PROFILE"):
+        # Mesures par requête (SQL, sérialisation, encodage) et en-tête Server-Timing
+        request_instrumentation.init_app(app)
+        # Métriques au format Prometheus (/metrics)
+        metrics.init_app(app)
+
+        # Proxy de profile pour mesurer les performances : échantillonnage des piles
+        # (utilisable en production) ou cProfile de chaque requête
+        profile = app.config.get("APP_PROXY_PROFILE")
+        if profile == "sampling":
+            config = app.config["PROFILING"]
+            app.wsgi_app = SamplingProfilerMiddleware(
+                app.wsgi_app,
+                directory=config.directory,
+                interval=config.interval,
+                sample_rate=config.sample_rate,
+                slow_threshold=config.slow_threshold,
+                flush_interval=config.flush_interval,
+                max_bytes=config.max_bytes,
+            )
+        elif profile:
             app.wsgi_app = ProfilerMiddleware(app.wsgi_app, profile_dir="./_profile")
 
     def init_modules(self, app, modules: list, base_setup_module: str = None):
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Requêtes conditionnelles : validateur ETag des réponses et réponse 304 quand celui du client
+(If-None-Match) est toujours valable.
+
+L'ETag est une empreinte du contenu de la réponse, calculée une fois ce contenu sérialisé : il
+change à chaque écriture visible dans la réponse, sans requête supplémentaire. modifie_le ne s'y
+prête pas : il n'est rempli que par les triggers MySQL, à la seconde près. Les en-têtes de
+requête qui choisissent la représentation (Vary) font partie de l'empreinte : deux
+représentations d'une même ressource n'ont jamais le même ETag.
+"""
+# Import from stdlib
+import hashlib
+
+# Imports from external libraries
+from flask import current_app, request
+from werkzeug.http import unquote_etag
+
+# Import from local code
+
+
+def validators(data, vary=()):
+    """
+    En-têtes ETag (fort) et Vary de la réponse `data` : une empreinte de son encodage JSON par
+    la bibliothèque d'encodage de l'application et des valeurs des en-têtes de requête `vary`.
+    """
+    json = current_app.json
+    digest = hashlib.sha1(json.backend.encode("ascii"))
+    for header in vary:
+        digest.update(f"\n{header}: {request.headers.get(header, '')}".encode("utf-8"))
+    digest.update(b"\n")
+    digest.update(json.dumps_bytes(data, sort_keys=False))
+    headers = {"ETag": f'"{digest.hexdigest()}"'}
+    if vary:
+        headers["Vary"] = ", ".join(vary)
+    return headers
+
+
+def not_modified(headers):
+    """
+    Réponse 304 si l'ETag de `headers` satisfait le If-None-Match de la requête en cours, None
+    sinon.
+    """
+    etag = headers.get("ETag")
+    if etag is None or not request.if_none_match:
+        return None
+    if not request.if_none_match.contains_weak(unquote_etag(etag)[0]):
+        return None
+    return current_app.response_class(status=304, headers=headers)
@@ -21,6 +21,29 @@ def create_response(ns):
     return ns.model("CreateResponse", {"message": fields.String, "id": fields.Integer})
 
 
+def import_batch_response(ns):
+    result = ns.model(
+        "ImportBatchResult",
+        {
+            "index": fields.Integer(description="Position de la ligne dans le lot"),
+            "status": fields.Integer(
+                description="201 créée, 200 mise à jour, 422 invalide, 400 illisible"
+            ),
+            "id": fields.Integer(description="ID de la ligne créée ou mise à jour"),
+            "id_proprio": fields.String(description="Clé de la ligne"),
+            "ean": fields.String(
+                description="Clé de la ligne (ouvrages sans id_proprio)"
+            ),
+            "errors": fields.Raw(description="Erreurs de validation, par champ"),
+            "error": fields.String(description="Ligne NDJSON illisible"),
+        },
+    )
+    return ns.model(
+        "ImportBatchResponse",
+        {"message": fields.String, "results": fields.List(fields.Nested(result))},
+    )
+
+
 def create_model_relation_auteur(ns_name, name):
     return ns_name.model(
         name,
@@ -78,6 +101,36 @@ def create_model_relation_recension(ns_name, name):
     )
 
 
+####################################################################################################
+# Model & Namespace Exports
+####################################################################################################
+
+ns_exports = Namespace(
+    "Exports",
+    description="Ce module suit les exports CSV exécutés en tâche de fond.",
+    path="/bolero",
+)
+
+export_job_model = ns_exports.model(
+    "export",
+    {
+        "id": fields.String(description="Identifiant de l'export"),
+        "ressource": fields.String(description="auteurs, ouvrages ou recensions"),
+        "filtres": fields.Raw(description="Filtres de l'export"),
+        "compression": fields.String(description="gzip ou null"),
+        "statut": fields.String(
+            description="en_attente, en_cours, termine ou erreur", example="termine"
+        ),
+        "taille": fields.Integer(description="Taille du fichier en octets"),
+        "erreur": fields.String(description="Message d'erreur si l'export a échoué"),
+        "cree_le": fields.DateTime(description="Date de la demande"),
+        "termine_le": fields.DateTime(description="Date de fin de l'export"),
+        "fichier": fields.String(
+            description="URL du fichier une fois l'export terminé"
+        ),
+    },
+)
+
 ####################################################################################################
 # Model & Namespace Éditeurs
 ####################################################################################################
@@ -267,6 +320,44 @@ review_model = ns_reviews.model(
     },
 )
 
+####################################################################################################
+# Model & Namespace Recherche
+####################################################################################################
+
+ns_search = Namespace(
+    "Recherche",
+    description=(
+        "Ce module permet une recherche plein texte sur les auteurs, ouvrages et recensions."
+    ),
+    path="/bolero",
+)
+
+search_result_model = ns_search.model(
+    "resultat-recherche",
+    {
+        "type": fields.String(description="auteur, ouvrage ou recension"),
+        "id": fields.Integer(description="ID de l'entité"),
+        "score": fields.Float(description="Pertinence du résultat (BM25)"),
+        "nom": fields.String(description="Nom de l'auteur"),
+        "prenom": fields.String(description="Prénom de l'auteur"),
+        "id_ref": fields.String(description="ID Ref de l'auteur"),
+        "titre": fields.String(description="Titre de l'ouvrage ou de la recension"),
+        "sous_titre": fields.String(description="Sous-titre de l'ouvrage"),
+        "annee_parution": fields.String(description="Année de parution de l'ouvrage"),
+        "editeur": fields.String(description="Éditeur de l'ouvrage"),
+        "titre_revue": fields.String(description="Titre de la revue"),
+        "annee": fields.String(description="Année de la revue"),
+    },
+)
+
+search_response_model = ns_search.model(
+    "recherche",
+    {
+        "resultats": fields.List(fields.Nested(search_result_model)),
+        "total": fields.Integer(description="Nombre de résultats renvoyés"),
+    },
+)
+
 ####################################################################################################
 # Model & Namespace Relations
 ####################################################################################################
@@ -27,6 +27,48 @@ def build_parser(fields, location="args", required_fields=None):
     return parser
 
 
+def add_export_arguments(parser):
+    parser.add_argument(
+        "asynchrone",
+        type=bool,
+        help="Exécute l'export en tâche de fond et renvoie son état",
+        location="args",
+    )
+    parser.add_argument(
+        "gzip",
+        type=bool,
+        help="Compresse le fichier d'un export asynchrone",
+        location="args",
+    )
+    return parser
+
+
+def add_sparse_arguments(parser):
+    parser.add_argument(
+        "fields",
+        type=str,
+        help=(
+            "Champs renvoyés, séparés par des virgules (ex. `id,titre,ouvrage_auteurs`). "
+            "Sans `expand`, seules les relations citées sont incluses"
+        ),
+        location="args",
+    )
+    parser.add_argument(
+        "expand",
+        type=str,
+        help=(
+            "Relations incluses, séparées par des virgules (vide : aucune). "
+            "Les relations exclues ne sont pas chargées"
+        ),
+        location="args",
+    )
+    return parser
+
+
+def sparse_fields_parser():
+    return add_sparse_arguments(reqparse.RequestParser())
+
+
 ####################################################################################################
 # Parser Éditeurs
 ####################################################################################################
@@ -88,8 +130,14 @@ def journal_post_parser():
 ####################################################################################################
 def common_author_fields(location="args", include_id=True, required_fields=None):
     fields = {
-        "nom": {"type": str, "help": "Nom de l'auteur"},
-        "prenom": {"type": str, "help": "Prénom de l'auteur"},
+        "nom": {
+            "type": str,
+            "help": "Nom de l'auteur (début de mots, sans casse ni accents)",
+        },
+        "prenom": {
+            "type": str,
+            "help": "Prénom de l'auteur (début de mots, sans casse ni accents)",
+        },
         "id_ref": {"type": str, "help": "ID ref de l'auteur"},
         "id_proprio": {"type": str, "help": "ID du propriétaire"},
     }
@@ -105,7 +153,13 @@ def author_get_parser():
         "limit", type=int, help="Nombre de résultats par page", location="args"
     )
     parser.add_argument("page", type=int, help="Numéro de la page", location="args")
-    return parser
+    parser.add_argument(
+        "cursor",
+        type=str,
+        help="Curseur renvoyé par la page précédente (next_cursor), remplace `page`",
+        location="args",
+    )
+    return add_sparse_arguments(parser)
 
 
 def author_post_parser():
@@ -119,7 +173,7 @@ def author_put_parser():
 
 
 def author_export_parser():
-    return common_author_fields(location="args", include_id=True)
+    return add_export_arguments(common_author_fields(location="args", include_id=True))
 
 
 ####################################################################################################
@@ -127,8 +181,14 @@ def author_export_parser():
 ####################################################################################################
 def common_book_fields(location="args", include_id=True, include_author_filters=False):
     fields = {
-        "titre": {"type": str, "help": "Titre de l'ouvrage"},
-        "sous_titre": {"type": str, "help": "Sous-titre de l'ouvrage"},
+        "titre": {
+            "type": str,
+            "help": "Titre de l'ouvrage (début de mots, sans casse ni accents)",
+        },
+        "sous_titre": {
+            "type": str,
+            "help": "Sous-titre de l'ouvrage (début de mots, sans casse ni accents)",
+        },
         "volume": {"type": str, "help": "Volume"},
         "annee_parution": {"type": str, "help": "Année de parution"},
         "editeur": {"type": str, "help": "Éditeur"},
@@ -149,8 +209,14 @@ def common_book_fields(location="args", include_id=True, include_author_filters=
     if include_author_filters:
         fields.update(
             {
-                "auteur_nom": {"type": str, "help": "Nom de l'auteur"},
-                "auteur_prenom": {"type": str, "help": "Prénom de l'auteur"},
+                "auteur_nom": {
+                    "type": str,
+                    "help": "Nom de l'auteur (début de mots, sans casse ni accents)",
+                },
+                "auteur_prenom": {
+                    "type": str,
+                    "help": "Prénom de l'auteur (début de mots, sans casse ni accents)",
+                },
                 "id_auteur": {"type": int, "help": "ID de l'auteur"},
             }
         )
@@ -168,7 +234,13 @@ def book_get_parser():
         "limit", type=int, help="Nombre de résultats par page", location="args"
     )
     parser.add_argument("page", type=int, help="Numéro de la page", location="args")
-    return parser
+    parser.add_argument(
+        "cursor",
+        type=str,
+        help="Curseur renvoyé par la page précédente (next_cursor), remplace `page`",
+        location="args",
+    )
+    return add_sparse_arguments(parser)
 
 
 def book_post_parser():
@@ -186,7 +258,7 @@ def book_export_parser():
     fields = common_book_fields(
         location="args", include_id=True, include_author_filters=True
     )
-    return build_parser(fields, location="args")
+    return add_export_arguments(build_parser(fields, location="args"))
 
 
 ####################################################################################################
@@ -196,7 +268,10 @@ def common_review_fields(
     location="args", include_id=True, include_author_filters=False
 ):
     fields = {
-        "titre": {"type": str, "help": "Titre de la recension"},
+        "titre": {
+            "type": str,
+            "help": "Titre de la recension (début de mots, sans casse ni accents)",
+        },
         "sous_titre": {"type": str, "help": "Sous-titre de la recension"},
         "traduit_par": {"type": str, "help": "Traducteur"},
         "langue": {
@@ -204,7 +279,10 @@ def common_review_fields(
             "help": "Langue originale du texte intégral (code ISO 639-1, par ex. 'fr', 'en')",
         },
         "portail": {"type": str, "help": "Portail"},
-        "titre_revue": {"type": str, "help": "Titre de la revue"},
+        "titre_revue": {
+            "type": str,
+            "help": "Titre de la revue (début de mots, sans casse ni accents)",
+        },
         "annee": {"type": str, "help": "Année de parution"},
         "volume": {"type": str, "help": "Volume"},
         "numero": {"type": str, "help": "Numéro"},
@@ -219,8 +297,14 @@ def common_review_fields(
     if include_author_filters:
         fields.update(
             {
-                "auteur_nom": {"type": str, "help": "Nom de l'auteur"},
-                "auteur_prenom": {"type": str, "help": "Prénom de l'auteur"},
+                "auteur_nom": {
+                    "type": str,
+                    "help": "Nom de l'auteur (début de mots, sans casse ni accents)",
+                },
+                "auteur_prenom": {
+                    "type": str,
+                    "help": "Prénom de l'auteur (début de mots, sans casse ni accents)",
+                },
                 "id_auteur": {"type": int, "help": "ID de l'auteur"},
             }
         )
@@ -236,7 +320,13 @@ def review_get_parser():
         "limit", type=int, help="Nombre de résultats par page", location="args"
     )
     parser.add_argument("page", type=int, help="Numéro de la page", location="args")
-    return parser
+    parser.add_argument(
+        "cursor",
+        type=str,
+        help="Curseur renvoyé par la page précédente (next_cursor), remplace `page`",
+        location="args",
+    )
+    return add_sparse_arguments(parser)
 
 
 def review_post_parser():
@@ -253,6 +343,30 @@ def review_put_parser():
 def review_export_parser():
     fields = common_review_fields("args", include_id=True, include_author_filters=True)
     parser = build_parser(fields, location="args")
+    return add_export_arguments(parser)
+
+
+####################################################################################################
+# Parser Recherche
+####################################################################################################
+def search_get_parser():
+    parser = reqparse.RequestParser()
+    parser.add_argument(
+        "q",
+        type=str,
+        required=True,
+        help="Mots recherchés (sans casse ni accents, le dernier mot peut être incomplet)",
+        location="args",
+    )
+    parser.add_argument(
+        "type",
+        type=str,
+        help="Types de résultats séparés par des virgules : auteur, ouvrage, recension",
+        location="args",
+    )
+    parser.add_argument(
+        "limit", type=int, help="Nombre de résultats (100 au maximum)", location="args"
+    )
     return parser
 
 
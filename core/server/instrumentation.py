@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""
+Instrumentation légère de chaque requête, activable en production :
+    * nombre et durée cumulée des requêtes SQL (évènements des engines SQLAlchemy) ;
+    * durées de sérialisation et d'encodage JSON ;
+    * signalement dans les logs des requêtes SQL identiques répétées (N+1 probable) ;
+    * en-tête Server-Timing (db, serialize, encode, app) lisible dans les outils de
+      développement des navigateurs.
+"""
+# Import from stdlib
+from time import perf_counter
+
+# Imports from external libraries
+from flask import g, request
+from sqlalchemy.engine import Engine
+from sqlalchemy.event import listen
+
+# Import from local code
+from core.services import timings
+
+
+#: Étapes de l'en-tête Server-Timing, dans l'ordre
+SERVER_TIMING_STEPS = ("db", "serialize", "encode")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Le début est porté par le contexte d'exécution et non par la connexion : une requête
+    # en erreur n'a pas d'after_cursor_execute, et rien ne reste alors en attente
+    if context is not None and timings.current() is not None:
+        context.instrumentation_started = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    current = timings.current()
+    started = getattr(context, "instrumentation_started", None)
+    if current is None or started is None:
+        return
+    current.add("db", perf_counter() - started)
+    current.statements[statement] += 1
+
+
+class RequestInstrumentation:
+    def __init__(self):
+        self.server_timing = True
+        self.n_plus_one_threshold = 10
+        self._logger = None
+
+    def init_app(self, app):
+        config = app.config["INSTRUMENTATION"]
+        if not config.enabled:
+            return
+        self.server_timing = config.server_timing
+        self.n_plus_one_threshold = config.n_plus_one_threshold
+        self._logger = app.logger
+        # Tous les engines, y compris ceux créés après l'application
+        listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._stop)
+
+    def _start(self):
+        g.timings_token = timings.start()
+
+    def _stop(self, error=None):
+        token = g.pop("timings_token", None)
+        if token is not None:
+            timings.stop(token)
+
+    def _finish(self, response):
+        current = timings.current()
+        if current is None:
+            return response
+        self._report_repeated(current)
+        if self.server_timing:
+            response.headers["Server-Timing"] = self.server_timing_header(current)
+        return response
+
+    def _report_repeated(self, current):
+        for statement, count in current.statements.most_common():
+            if count < self.n_plus_one_threshold:
+                break
+            self._logger.warning(
+                "N+1 probable sur %s %s : %d exécutions de %s",
+                request.method,
+                request.path,
+                count,
+                " ".join(statement.split())[:300],
+            )
+
+    @staticmethod
+    def server_timing_header(current):
+        metrics = []
+        for name in SERVER_TIMING_STEPS:
+            if name not in current.durations:
+                continue
+            metric = f"{name};dur={current.durations[name] * 1000:.1f}"
+            if name == "db":
+                metric += f';desc="{current.counts[name]} SQL"'
+            metrics.append(metric)
+        metrics.append(f"app;dur={current.elapsed() * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+request_instrumentation = RequestInstrumentation()
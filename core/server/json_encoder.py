@@ -3,14 +3,23 @@
 DOC
 """
 # Import from stdlib
+from collections.abc import Mapping
+import json
 
 # Imports from external libraries
-from flask import request, jsonify, make_response
+from flask import request, current_app
 from flask.json.provider import DefaultJSONProvider
+from marshmallow.utils import is_collection
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Import from local code
 from core.services.tools_belt import humps
 from core.services.jsonlib import default
+from core.services.timings import timing
 
 
 ###############################################################################
@@ -19,19 +28,134 @@ from core.services.jsonlib import default
 class JSONProvider(DefaultJSONProvider):
     """
     Encodeur vers JSON
+
+    Deux bibliothèques d'encodage sont possibles (JSON_BACKEND) :
+        * json : la bibliothèque standard ;
+        * orjson : beaucoup plus rapide, utilisée par défaut si elle est installée. La sortie est
+          en UTF-8 (sans échappement des caractères non ASCII) et sans espaces superflus.
     """
 
     default = staticmethod(default)
+    backend = "orjson" if orjson is not None else "json"
+
+    def use_backend(self, name):
+        """
+        Choisit la bibliothèque d'encodage : "json", "orjson" ou "auto" (orjson si installée).
+        """
+        if name == "auto":
+            name = "orjson" if orjson is not None else "json"
+        if name not in ("json", "orjson"):
+            raise ValueError(f"Unknown JSON backend: {name}")
+        if name == "orjson" and orjson is None:
+            raise ValueError("The orjson JSON backend is not installed")
+        self.backend = name
+
+    def dumps_bytes(self, obj, indent=None, sort_keys=None, **kwargs) -> bytes:
+        """
+        Encode `obj` en JSON UTF-8.
+        Avec orjson, seules les options `indent` et `sort_keys` sont prises en compte.
+        """
+        if sort_keys is None:
+            sort_keys = self.sort_keys
+        if self.backend == "orjson":
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            if sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            return orjson.dumps(obj, default=self.default, option=option)
+        kwargs.setdefault("default", self.default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        return json.dumps(obj, indent=indent, sort_keys=sort_keys, **kwargs).encode(
+            "utf-8"
+        )
+
+    def dumps(self, obj, **kwargs) -> str:
+        if self.backend == "orjson":
+            return self.dumps_bytes(obj, **kwargs).decode("utf-8")
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = None
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            indent = 2
+        return self._app.response_class(
+            self.dumps_bytes(obj, indent=indent) + b"\n", mimetype=self.mimetype
+        )
+
+
+def output_json(data, code, headers=None):
+    """
+    Représentation JSON des réponses Flask-RESTX, encodée par le JSONProvider de l'application
+    au lieu de la bibliothèque json standard.
+    """
+    settings = dict(current_app.config.get("RESTX_JSON", {}))
+    if current_app.debug:
+        settings.setdefault("indent", 4)
+    settings.setdefault("sort_keys", False)
+    with timing("encode"):
+        dumped = current_app.json.dumps_bytes(data, **settings) + b"\n"
+    response = current_app.response_class(
+        dumped, status=code, mimetype=current_app.json.mimetype
+    )
+    response.headers.extend(headers or {})
+    return response
 
 
 ####################################################################################################
 # Normalisation des réponses
 ####################################################################################################
+class KeyConvention:
+    """
+    Conversion des clés d'une réponse vers une convention de nommage.
+    Le vocabulaire des clés est réduit : chaque clé n'est convertie qu'une fois puis gardée en
+    mémoire (dans la limite de `max_keys`), au lieu de repasser par les regex d'inflection.
+    """
+
+    max_keys = 4096
+
+    def __init__(self, fn=None):
+        self.fn = fn
+        self._keys = {}
+
+    def key(self, key):
+        try:
+            return self._keys[key]
+        except KeyError:
+            converted = self.fn(key)
+            if len(self._keys) < self.max_keys:
+                self._keys[key] = converted
+            return converted
+
+    def __call__(self, data):
+        if self.fn is None:
+            return data
+        key = self.key
+
+        def convert(value):
+            kind = type(value)
+            if kind is dict:
+                return {key(k): convert(v) for k, v in value.items()}
+            if kind is list:
+                return [convert(item) for item in value]
+            if kind in (str, int, float, bool) or value is None:
+                return value
+            # Même comportement que transform_collection pour les autres types
+            if is_collection(value):
+                return value.__class__(convert(item) for item in value)
+            if isinstance(value, Mapping):
+                return {key(k): convert(v) for k, v in value.items()}
+            return value
+
+        return convert(data)
+
+
 mapping_attributes_convention = {
-    "camel-case": humps.camelize,
-    "snake-case": humps.snakize,
-    "dash-case": humps.dasherize,
-    "without-convention": lambda d: d,
+    "camel-case": KeyConvention(humps.camelize),
+    "snake-case": KeyConvention(humps.snakize),
+    "dash-case": KeyConvention(humps.dasherize),
+    "without-convention": KeyConvention(),
 }
 
 
@@ -55,7 +179,7 @@ def normalize_json_response(data, code, headers=None):
         )
         data = fn_convention(data)
     # Transformation de la réponse en JSON
-    response = make_response(jsonify(data), code)
+    response = current_app.json.response(data)
     # Ajouts d'informations supplémentaires dans la réponse
     response.headers["Content-Type"] = "application/json"
     response.headers["Attribute-Convention"] = attribute_convention
@@ -0,0 +1,416 @@
+#!/usr/bin/env python
+"""
+Métriques de l'api, exposées au format texte de Prometheus (METRICS.path, /metrics par défaut).
+
+Chaque processus agrège ses mesures en mémoire. Avec plusieurs processus (workers gunicorn),
+chacun écrit régulièrement (METRICS.flush-interval) un instantané de ses valeurs dans un dossier
+partagé (METRICS.multiprocess-dir), et /metrics additionne les instantanés de tous les
+processus. Les compteurs et histogrammes des processus arrêtés restent comptés, les jauges ne
+le sont que pour les processus vivants.
+
+Sous gunicorn (gunicorn.conf.py), le maître vide le dossier à son démarrage, et reporte les
+compteurs et histogrammes de chaque worker arrêté dans un instantané commun (ARCHIVE) avant de
+supprimer le sien : le dossier ne grossit pas au fil des redémarrages de workers.
+"""
+# Import from stdlib
+from bisect import bisect_left
+from time import perf_counter
+import atexit
+import json
+import math
+import os
+import threading
+import time
+
+# Imports from external libraries
+from flask import Response, g, request
+from path import Path
+from sqlalchemy.event import listen
+
+# Import from local code
+from core.services import timings
+
+
+#: Bornes des histogrammes de durées, en secondes
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+#: Bornes des histogrammes de tailles, en octets
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+#: Nom de l'instantané des processus arrêtés (sans les jauges)
+ARCHIVE = "arretes"
+
+
+class Metric:
+    type = None
+
+    def __init__(self, registry, name, documentation, labels=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def snapshot(self):
+        """Les valeurs du processus : [[valeurs des labels, valeur], ...]."""
+        with self.registry.lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def describe(self):
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labels": list(self.labels),
+        }
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, value=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+
+class Gauge(Metric):
+    """
+    Jauge dont les valeurs sont relevées par `collect` ({valeurs des labels: valeur}) au
+    moment de l'instantané.
+    """
+
+    type = "gauge"
+
+    def __init__(self, registry, name, documentation, labels=(), collect=None):
+        super().__init__(registry, name, documentation, labels)
+        self.collectors = [collect] if collect else []
+
+    def snapshot(self):
+        values = {}
+        for collect in self.collectors:
+            values.update(collect())
+        return [[list(key), value] for key, value in values.items()]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, registry, name, documentation, labels=(), buckets=None):
+        super().__init__(registry, name, documentation, labels)
+        self.buckets = tuple(buckets or DURATION_BUCKETS)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            # Effectif de chaque intervalle (dont +Inf), somme et nombre d'observations
+            values = self._values.get(key)
+            if values is None:
+                values = self._values[key] = [0] * (len(self.buckets) + 3)
+            values[bisect_left(self.buckets, value)] += 1
+            values[-2] += value
+            values[-1] += 1
+
+    def snapshot(self):
+        with self.registry.lock:
+            return [[list(key), list(value)] for key, value in self._values.items()]
+
+    def describe(self):
+        return {**super().describe(), "buckets": list(self.buckets)}
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.enabled = False
+        self.namespace = "api"
+        self.directory = None
+        self.flush_interval = 5
+        self.lock = threading.Lock()
+        self._metrics = {}
+        self._last_flush = 0
+        self._engines = {}
+        self._define_metrics()
+
+    ################################################################################################
+    #   Déclaration
+    ################################################################################################
+    def _register(self, metric_class, name, *args, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = metric_class(self, name, *args, **kwargs)
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter, name, documentation, labels)
+
+    def gauge(self, name, documentation, labels=(), collect=None):
+        return self._register(Gauge, name, documentation, labels, collect)
+
+    def histogram(self, name, documentation, labels=(), buckets=None):
+        return self._register(Histogram, name, documentation, labels, buckets)
+
+    def _define_metrics(self):
+        labels = ("method", "endpoint")
+        self.requests = self.counter(
+            "http_requests_total", "Requêtes HTTP traitées", (*labels, "status")
+        )
+        self.latency = self.histogram(
+            "http_request_duration_seconds", "Durée de traitement des requêtes", labels
+        )
+        self.response_size = self.histogram(
+            "http_response_size_bytes",
+            "Taille des réponses",
+            labels,
+            buckets=SIZE_BUCKETS,
+        )
+        self.sql_queries = self.counter(
+            "sql_queries_total", "Requêtes SQL exécutées pendant les requêtes", labels
+        )
+        self.sql_duration = self.counter(
+            "sql_duration_seconds_total", "Durée cumulée des requêtes SQL", labels
+        )
+        self.pool_wait = self.histogram(
+            "db_pool_checkout_wait_seconds",
+            "Attente d'une connexion du pool",
+            ("bind",),
+        )
+        self.pool_connections = self.gauge(
+            "db_pool_connections",
+            "Connexions des pools par état",
+            ("bind", "state"),
+            collect=self._collect_pools,
+        )
+
+    ################################################################################################
+    #   Application
+    ################################################################################################
+    def configure(self, config, name="api"):
+        """Lit la configuration METRICS (`name` : préfixe par défaut des métriques)."""
+        self.enabled = config.enabled
+        self.namespace = config.namespace or name
+        self.flush_interval = config.flush_interval
+        if self.enabled and config.multiprocess_dir:
+            self.directory = Path(config.multiprocess_dir)
+
+    def init_app(self, app):
+        config = app.config["METRICS"]
+        self.configure(config, app.name)
+        if not self.enabled:
+            return
+        if self.directory:
+            self.directory.makedirs_p()
+            atexit.register(self.flush)
+        app.before_request(self._start)
+        app.after_request(self._record)
+        app.add_url_rule(config.path, "metrics", self.view)
+
+    def _start(self):
+        g.metrics_started = perf_counter()
+
+    def _record(self, response):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return response
+        labels = {
+            "method": request.method,
+            # La règle de la route et non le chemin, pour borner le nombre de séries
+            "endpoint": request.url_rule.rule if request.url_rule else "inconnue",
+        }
+        self.requests.inc(status=response.status_code, **labels)
+        self.latency.observe(perf_counter() - started, **labels)
+        if response.content_length is not None:
+            self.response_size.observe(response.content_length, **labels)
+        current = timings.current()
+        if current is not None and current.counts["db"]:
+            self.sql_queries.inc(current.counts["db"], **labels)
+            self.sql_duration.inc(current.durations["db"], **labels)
+        if self.directory and time.monotonic() - self._last_flush > self.flush_interval:
+            self.flush()
+        return response
+
+    def view(self):
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+    ################################################################################################
+    #   Pools de connexions
+    ################################################################################################
+    def watch_engine(self, engine, bind):
+        """Mesure l'attente des connexions du pool de `engine` et relève son état."""
+        self._engines[bind] = engine
+        self._watch_pool(engine.pool, bind)
+        # Le pool est remplacé à chaque `dispose`
+        listen(
+            engine,
+            "engine_disposed",
+            lambda engine: self._watch_pool(engine.pool, bind),
+        )
+
+    def _watch_pool(self, pool, bind):
+        connect = pool.connect
+
+        def timed_connect(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return connect(*args, **kwargs)
+            finally:
+                self.pool_wait.observe(perf_counter() - started, bind=bind)
+
+        pool.connect = timed_connect
+
+    def _collect_pools(self):
+        values = {}
+        for bind, engine in self._engines.items():
+            pool = engine.pool
+            # Les pools sans file d'attente (sqlite) n'ont pas ces compteurs
+            for state, method in (
+                ("taille", "size"),
+                ("empruntees", "checkedout"),
+                ("debordement", "overflow"),
+            ):
+                # SingletonThreadPool (sqlite) a un attribut `size` qui n'est pas un compteur
+                if callable(getattr(pool, method, None)):
+                    values[(bind, state)] = getattr(pool, method)()
+        return values
+
+    ################################################################################################
+    #   Instantanés et exposition
+    ################################################################################################
+    def snapshot(self):
+        return {
+            name: {**metric.describe(), "values": metric.snapshot()}
+            for name, metric in self._metrics.items()
+        }
+
+    def flush(self):
+        """Écrit l'instantané du processus dans le dossier partagé."""
+        if not self.directory:
+            return
+        self._last_flush = time.monotonic()
+        path = self.directory / f"{os.getpid()}.json"
+        tmp_path = path + ".tmp"
+        tmp_path.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp_path, path)
+
+    def clear(self):
+        """Vide le dossier partagé : à appeler avant le démarrage des processus."""
+        if not self.directory:
+            return
+        self.directory.makedirs_p()
+        for path in self.directory.files():
+            path.remove_p()
+
+    def remove_process(self, pid):
+        """
+        Retire l'instantané du processus `pid`, arrêté : ses compteurs et histogrammes sont
+        reportés dans l'instantané ARCHIVE, ses jauges sont abandonnées.
+        """
+        if not self.directory:
+            return
+        path = self.directory / f"{pid}.json"
+        try:
+            snapshot = json.loads(path.read_text())
+        except FileNotFoundError:
+            return
+        except ValueError:
+            snapshot = {}
+        archive_path = self.directory / f"{ARCHIVE}.json"
+        merged = {}
+        if archive_path.exists():
+            self._merge(merged, json.loads(archive_path.read_text()))
+        self._merge(merged, snapshot, gauges=False)
+        tmp_path = archive_path + ".tmp"
+        tmp_path.write_text(json.dumps(self._values_as_lists(merged)))
+        os.replace(tmp_path, archive_path)
+        path.remove_p()
+
+    @staticmethod
+    def _is_alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def collect(self):
+        """Les métriques de tous les processus, additionnées."""
+        if not self.directory:
+            return self.snapshot()
+        self.flush()
+        merged = {}
+        for path in self.directory.files("*.json"):
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            alive = path.stem != ARCHIVE and self._is_alive(int(path.stem))
+            self._merge(merged, snapshot, gauges=alive)
+        return self._values_as_lists(merged)
+
+    @staticmethod
+    def _merge(merged, snapshot, gauges=True):
+        """
+        Ajoute les valeurs de `snapshot` à `merged` ({nom: {..., "values": {clé: valeur}}}),
+        sans les jauges si `gauges` est faux.
+        """
+        for name, metric in snapshot.items():
+            if metric["type"] == "gauge" and not gauges:
+                continue
+            target = merged.setdefault(name, {**metric, "values": {}})
+            for key, value in metric["values"]:
+                key = tuple(key)
+                if key not in target["values"]:
+                    target["values"][key] = value
+                elif metric["type"] == "histogram":
+                    target["values"][key] = [
+                        a + b for a, b in zip(target["values"][key], value)
+                    ]
+                else:
+                    target["values"][key] += value
+
+    @staticmethod
+    def _values_as_lists(merged):
+        for metric in merged.values():
+            metric["values"] = [
+                [list(key), value] for key, value in metric["values"].items()
+            ]
+        return merged
+
+    def render(self):
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            name = f"{self.namespace}_{name}"
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for key, value in sorted(metric["values"], key=lambda item: item[0]):
+                labels = list(zip(metric["labels"], key))
+                if metric["type"] != "histogram":
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                cumulative = 0
+                bounds = [*metric["buckets"], math.inf]
+                for bound, count in zip(bounds, value):
+                    cumulative += count
+                    le = [("le", "+Inf" if bound == math.inf else _number(bound))]
+                    lines.append(f"{name}_bucket{_labels(labels + le)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value[-2])}")
+                lines.append(f"{name}_count{_labels(labels)} {value[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+metrics = MetricsRegistry()
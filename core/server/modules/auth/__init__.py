@@ -13,6 +13,7 @@ from dateutil.relativedelta import relativedelta
 from core.server.json_encoder import normalize_json_error
 from core.server.modules.auth.middleware import RewriteJWTTokenLocationMiddleware
 from core.server.modules.auth.resources import ns_auth, LoginResource
+from core.server.modules.auth.user_cache import user_cache
 
 
 # Initialisation de l'extension JWT (à appeler dans setup)
@@ -79,12 +80,14 @@ def setup_resources(api, app, factory_user_model):
         "delta_remember_me": relativedelta(**expirations.remember_me),
     }
     api.add_namespace(ns_auth, path="/auth")
+    user_cache.init_app(app)
 
-    # Récupération de l'utilisateur à partir du token
+    # Récupération de l'utilisateur à partir du token, mis en cache par id et jti
     @jwt.user_lookup_loader
     def user_lookup_loader(jwt_header, jwt_data):
-        UserModel = factory_user_model()
-        return UserModel.get(jwt_data["sub"]["id"])
+        return user_cache.lookup(
+            factory_user_model(), jwt_data["sub"]["id"], jwt_data.get("jti")
+        )
 
     # Injection dans `g.current_user` (utile même hors décorateur `@auth_required`)
     @app.before_request
@@ -101,4 +104,4 @@ def setup_resources(api, app, factory_user_model):
 
 
 # Exportés pour les autres modules
-__all__ = ["setup", "auth_required", "current_user", "jwt"]
+__all__ = ["setup", "auth_required", "current_user", "jwt", "user_cache"]
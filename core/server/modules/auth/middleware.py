@@ -7,13 +7,16 @@ from jwt.algorithms import requires_cryptography
 from werkzeug import Request
 
 from core.services.jsonlib import JSONEncoder
-from core.services.tools_belt import humps
+from core.services.tools_belt import TTLCache, humps
 
 
 class RewriteJWTTokenLocationMiddleware:
     """
     Middleware pour réécrire les tokens JWT passés sous forme brute
     en un token JWT correctement encodé et inséré dans l'environnement WSGI.
+    Les tokens encodés sont réutilisés pendant `ttl` secondes (AUTH.identity-token-cache)
+    au lieu d'être signés à chaque requête : le jti reste le même, ce qui permet aussi au
+    cache des utilisateurs de servir les requêtes suivantes.
     """
 
     def __init__(self, app):
@@ -26,6 +29,8 @@ class RewriteJWTTokenLocationMiddleware:
             raise NotImplementedError("Clé de chiffrement JWT manquante")
 
         self._wsgi_app = app.wsgi_app
+        cache = app.config.auth.identity_token_cache
+        self._tokens = TTLCache(maxsize=cache.maxsize, ttl=cache.ttl)
         self._config = {
             "locations": app.config["JWT_TOKEN_LOCATION"],
             "algorithm": algorithm,
@@ -63,6 +68,13 @@ class RewriteJWTTokenLocationMiddleware:
         return self._wsgi_app(environ, start_response)
 
     def _encode_jwt_token(self, jwt_token):
+        encoded = self._tokens.get(jwt_token)
+        if encoded is None:
+            encoded = self._sign_jwt_token(jwt_token)
+            self._tokens.set(jwt_token, encoded)
+        return encoded
+
+    def _sign_jwt_token(self, jwt_token):
         payload = {
             "fresh": False,
             "iat": datetime.now(timezone.utc),
@@ -0,0 +1,112 @@
+"""
+Cache des utilisateurs chargés à partir des tokens JWT.
+
+Sans cache, chaque requête authentifiée fait un SELECT sur la table des utilisateurs avant tout
+autre travail. Le cache est propre au processus : une entrée est identifiée par l'id de
+l'utilisateur et le `jti` du token, expire au bout de `ttl` secondes et est oubliée dès que la
+ligne de l'utilisateur est modifiée ou supprimée par ce processus. Les modifications faites par
+un autre processus ne sont visibles qu'après expiration.
+
+Les utilisateurs mis en cache sont des copies détachées de toute session, partagées entre les
+requêtes : ils sont à utiliser en lecture seule.
+"""
+
+from sqlalchemy import inspect
+from sqlalchemy.event import listen
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from core.server.metrics import metrics
+from core.services.tools_belt import TTLCache
+
+
+cache_requests = metrics.counter(
+    "cache_requests_total", "Consultations des caches", ("cache", "result")
+)
+
+
+class UserLookupCache:
+    def __init__(self, maxsize=10_000, ttl=60):
+        self.enabled = True
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Version de chaque utilisateur modifié : les entrées d'une version antérieure sont
+        # ignorées, sans parcourir le cache
+        self._versions = {}
+        self._watched = set()
+
+    def init_app(self, app):
+        config = app.config.auth.user_cache
+        self.enabled = config.enabled
+        self._entries = TTLCache(maxsize=config.maxsize, ttl=config.ttl)
+
+    def get(self, user_id, jti):
+        entry = self._entries.get((user_id, jti))
+        if entry is None:
+            return None
+        version, user = entry
+        if version != self._versions.get(user_id, 0):
+            self._entries.pop((user_id, jti))
+            return None
+        return user
+
+    def lookup(self, query, user_id, jti):
+        """
+        L'utilisateur `user_id` du token `jti`, chargé par `query` (requête sur le modèle des
+        utilisateurs) s'il n'est pas en cache.
+        """
+        if not self.enabled:
+            return query.get(user_id)
+        user = self.get(user_id, jti)
+        cache_requests.inc(cache="utilisateurs", result="hit" if user else "miss")
+        if user is not None:
+            return user
+        version = self._versions.get(user_id, 0)
+        user = query.get(user_id)
+        if user is None:
+            return None
+        self._watch(inspect(user).mapper.class_)
+        user = self._detached_copy(user)
+        # Pas d'enregistrement si l'utilisateur a été modifié pendant son chargement
+        if version == self._versions.get(user_id, 0):
+            self._entries.set((user_id, jti), (version, user))
+        return user
+
+    def invalidate(self, user_id):
+        self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def clear(self):
+        self._entries.clear()
+
+    @staticmethod
+    def _detached_copy(user):
+        """Copie des colonnes chargées de `user` (sans le mot de passe, différé)."""
+        state = inspect(user)
+        copy = state.mapper.class_manager.new_instance()
+        for attr in state.mapper.column_attrs:
+            if attr.key in state.dict:
+                set_committed_value(copy, attr.key, state.dict[attr.key])
+        make_transient_to_detached(copy)
+        return copy
+
+    def _watch(self, model):
+        """Invalidation du cache aux modifications des lignes de `model`."""
+        if model in self._watched:
+            return
+        self._watched.add(model)
+
+        def forget(mapper, connection, target):
+            self.invalidate(target.id)
+
+        def forget_bulk(orm_execute_state):
+            # UPDATE / DELETE en masse : les utilisateurs concernés ne sont pas connus
+            if orm_execute_state.is_update or orm_execute_state.is_delete:
+                mapper = orm_execute_state.bind_mapper
+                if mapper is not None and mapper.class_ is model:
+                    self.clear()
+
+        listen(model, "after_update", forget)
+        listen(model, "after_delete", forget)
+        listen(Session, "do_orm_execute", forget_bulk)
+
+
+user_cache = UserLookupCache()
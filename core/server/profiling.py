@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+Profilage par échantillonnage, utilisable en production (APP_PROXY_PROFILE: sampling).
+
+Un thread relève toutes les `interval` secondes la pile d'appels des requêtes en cours
+(`sys._current_frames`), sans ralentir leur exécution comme le fait cProfile. À la fin d'une
+requête, ses piles ne sont conservées que si elle fait partie des requêtes tirées au sort
+(une sur `sample_rate`) ou si elle a duré plus de `slow_threshold` secondes. Pour une réponse
+en flux, seule la préparation de la réponse est mesurée.
+
+Les piles conservées sont agrégées au format « collapsed stacks » (une ligne
+`racine;...;fonction nombre` par pile, la racine étant la méthode et la route de la requête),
+lisible par flamegraph.pl, speedscope ou inferno. Elles sont écrites toutes les
+`flush_interval` secondes dans un nouveau fichier du dossier `directory`, dont les fichiers les
+plus anciens sont supprimés au-delà de `max_bytes`.
+"""
+# Import from stdlib
+from collections import Counter
+from itertools import count
+import atexit
+import os
+import re
+import sys
+import threading
+import time
+
+# Imports from external libraries
+from path import Path
+
+# Import from local code
+
+
+#: Les identifiants numériques des chemins sont regroupés (/ouvrages/3 : /ouvrages/<id>)
+_ids = re.compile(r"/\d+(?=/|$)")
+
+
+class SamplingProfilerMiddleware:
+    def __init__(
+        self,
+        app,
+        directory,
+        interval=0.01,
+        sample_rate=100,
+        slow_threshold=1.0,
+        flush_interval=60,
+        max_bytes=100 * 1024 * 1024,
+    ):
+        self._wsgi_app = app
+        self.directory = Path(directory)
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.directory.makedirs_p()
+        # Requêtes en cours, par thread : [racine, piles relevées]
+        self._active = {}
+        self._stacks = Counter()
+        self._counter = count()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._sampler = None
+        self._pid = None
+
+    def __call__(self, environ, start_response):
+        self._ensure_sampler()
+        thread_id = threading.get_ident()
+        path = _ids.sub("/<id>", environ.get("PATH_INFO", ""))
+        root = f"{environ.get('REQUEST_METHOD')} {path}"
+        record = [root, Counter()]
+        self._active[thread_id] = record
+        started = time.monotonic()
+        try:
+            return self._wsgi_app(environ, start_response)
+        finally:
+            del self._active[thread_id]
+            elapsed = time.monotonic() - started
+            sampled = self.sample_rate and next(self._counter) % self.sample_rate == 0
+            if sampled or (self.slow_threshold and elapsed >= self.slow_threshold):
+                with self._lock:
+                    self._stacks.update(record[1])
+
+    ################################################################################################
+    #   Échantillonnage
+    ################################################################################################
+    def _ensure_sampler(self):
+        # Un thread par processus, y compris après un fork (workers gunicorn)
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stacks.clear()
+            self._sampler = threading.Thread(
+                target=self._sample_forever, name="sampling-profiler", daemon=True
+            )
+            self._sampler.start()
+            atexit.register(self.flush)
+
+    def _sample_forever(self):
+        sampler_id = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, record in list(self._active.items()):
+                    frame = frames.get(thread_id)
+                    if frame is None or thread_id == sampler_id:
+                        continue
+                    record[1][self._collapse(record[0], frame)] += 1
+            del frames
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    @staticmethod
+    def _collapse(root, frame):
+        names = []
+        # Les appels du serveur WSGI, au-dessus de ce middleware, sont ignorés
+        while frame is not None and frame.f_code is not _call_code:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        names.append(root)
+        return ";".join(reversed(names)).replace(" ", "_")
+
+    ################################################################################################
+    #   Fichiers
+    ################################################################################################
+    def flush(self):
+        """Écrit les piles agrégées depuis la dernière écriture dans un nouveau fichier."""
+        self._last_flush = time.monotonic()
+        with self._lock:
+            stacks, self._stacks = self._stacks, Counter()
+        if not stacks:
+            return
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.collapsed"
+        lines = (f"{stack} {samples}\n" for stack, samples in stacks.most_common())
+        (self.directory / name).write_text("".join(lines))
+        self._rotate()
+
+    def _rotate(self):
+        files = sorted(self.directory.files("*.collapsed"), key=lambda path: path.mtime)
+        total = sum(path.size for path in files)
+        while files and total > self.max_bytes:
+            oldest = files.pop(0)
+            total -= oldest.size
+            oldest.remove_p()
+
+
+_call_code = SamplingProfilerMiddleware.__call__.__code__
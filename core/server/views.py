@@ -23,7 +23,7 @@ from werkzeug.wrappers.response import Response as WerkeugResponse
 
 # Import from local code
 from core.services.tools_belt import humps
-from core.server.json_encoder import normalize_json_response
+from core.server.json_encoder import normalize_json_response, output_json
 from core.server.error import app_handle_error
 
 
@@ -172,6 +172,8 @@ class Api(_BaseApi):
         super().__init__(
             app, version=version, title=title, description=description, *args, **kwargs
         )
+        # Les réponses passent par le JSONProvider de l'application
+        self.representations["application/json"] = output_json
 
     def handle_error(self, e):
         """
@@ -0,0 +1,301 @@
+#!/usr/bin/env python
+"""
+Exports CSV exécutés en tâche de fond.
+
+Les fichiers et l'état des exports sont écrits dans un dossier (EXPORT.spool-dir), qui est
+la seule source de vérité : n'importe quel processus de l'api peut renvoyer l'état d'un export
+ou son fichier. Un export est identifié par une empreinte de la ressource, des filtres et de la
+compression : deux demandes identiques partagent le même fichier tant qu'il n'a pas expiré.
+
+Le fichier d'état d'un export en attente ou en cours est touché régulièrement par le processus
+qui l'exécute (EXPORT.heartbeat) : sans battement depuis `stale_after` secondes, ce processus
+est considéré comme arrêté et l'export peut être relancé. Un export terminé expire `ttl`
+secondes après la fin de son exécution.
+"""
+# Import from stdlib
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+# Imports from external libraries
+from path import Path
+import arrow
+
+# Import from local code
+from core.server.metrics import DURATION_BUCKETS, SIZE_BUCKETS, metrics
+from core.services.tools_belt import generate_csv_stream
+
+
+exports_total = metrics.counter("exports_total", "Exports terminés", ("status",))
+export_rows = metrics.counter("export_rows_total", "Lignes exportées")
+export_size = metrics.histogram(
+    "export_size_bytes",
+    "Taille des fichiers d'export",
+    buckets=(*SIZE_BUCKETS, 67108864, 268435456, 1073741824),
+)
+export_duration = metrics.histogram(
+    "export_duration_seconds",
+    "Durée des exports",
+    buckets=(*DURATION_BUCKETS, 30, 60, 300, 900),
+)
+
+
+class ExportSpool:
+    PENDING = "en_attente"
+    RUNNING = "en_cours"
+    DONE = "termine"
+    FAILED = "erreur"
+
+    _valid_id = re.compile(r"^[0-9a-f]{40}$")
+
+    def __init__(self, app=None):
+        self.app = None
+        self.directory = None
+        self.workers = 2
+        self.ttl = 3600
+        self.heartbeat = 10
+        self._executor = None
+        self._heartbeat_thread = None
+        #: Exports en attente ou en cours dans ce processus
+        self._owned = set()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config["EXPORT"]
+        self.app = app
+        self.directory = Path(config.spool_dir)
+        self.workers = config.workers
+        self.ttl = config.ttl
+        self.heartbeat = config.heartbeat
+
+    @property
+    def stale_after(self):
+        return 6 * self.heartbeat
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="export"
+                )
+            return self._executor
+
+    ################################################################################################
+    #   Fichiers
+    ################################################################################################
+    @staticmethod
+    def job_id(name, params, compress):
+        key = json.dumps([name, sorted(params.items()), compress], default=str)
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _status_path(self, job_id):
+        return self.directory / f"{job_id}.json"
+
+    def file_path(self, job):
+        suffix = ".csv.gz" if job["compression"] else ".csv"
+        return self.directory / f"{job['id']}{suffix}"
+
+    def _tmp_path(self, path):
+        return path + f".{os.getpid()}.{threading.get_ident()}.tmp"
+
+    def _write_status(self, job):
+        path = self._status_path(job["id"])
+        tmp_path = self._tmp_path(path)
+        tmp_path.write_text(json.dumps(job, default=str))
+        os.replace(tmp_path, path)
+
+    def _create_status(self, job):
+        """
+        Crée le fichier d'état de `job`, complet dès qu'il est visible. Renvoie False si un
+        autre processus l'a créé entre-temps.
+        """
+        path = self._status_path(job["id"])
+        tmp_path = self._tmp_path(path)
+        tmp_path.write_text(json.dumps(job, default=str))
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            return False
+        finally:
+            tmp_path.remove_p()
+        return True
+
+    @staticmethod
+    def _read_status(path):
+        """L'état lu dans `path` et le stat du fichier lu ; (None, None) s'il n'existe pas."""
+        try:
+            with open(path) as file:
+                stat = os.fstat(file.fileno())
+                content = file.read()
+        except FileNotFoundError:
+            return None, None
+        try:
+            return json.loads(content), stat
+        except ValueError:
+            return None, stat
+
+    def _remove_status(self, path, stat):
+        """
+        Supprime le fichier d'état `path` s'il s'agit toujours du fichier décrit par `stat` :
+        un état recréé entre-temps par un autre processus est conservé.
+        """
+        removed = path + f".{os.getpid()}.{threading.get_ident()}.del"
+        try:
+            os.rename(path, removed)
+        except FileNotFoundError:
+            return
+        if os.stat(removed).st_ino != stat.st_ino:
+            try:
+                os.link(removed, path)
+            except FileExistsError:
+                pass
+        os.remove(removed)
+
+    def _is_expired(self, job, stat):
+        """
+        Un export terminé expire `ttl` secondes après sa fin ; un export en attente ou en
+        cours, `stale_after` secondes après le dernier battement de son processus.
+        """
+        age = time.time() - stat.st_mtime
+        if job is None or job["statut"] in (self.PENDING, self.RUNNING):
+            return age > self.stale_after
+        return age > self.ttl
+
+    def status(self, job_id):
+        """
+        L'état de l'export `job_id`, None s'il n'existe pas (ou plus).
+        """
+        if not self._valid_id.match(job_id or ""):
+            return None
+        job, stat = self._read_status(self._status_path(job_id))
+        if job is None or self._is_expired(job, stat):
+            return None
+        return job
+
+    def purge(self):
+        """
+        Supprime les exports expirés, puis les fichiers (exports, fichiers partiels ou
+        temporaires) qui ne correspondent plus à aucun export.
+        """
+        if not self.directory.exists():
+            return
+        kept = set()
+        for path in self.directory.files("*.json"):
+            job, stat = self._read_status(path)
+            if stat is None:
+                continue
+            if self._is_expired(job, stat):
+                self._remove_status(path, stat)
+            else:
+                kept.add(path.name.split(".")[0])
+        for path in self.directory.files():
+            if path.suffix == ".json" or path.name.split(".")[0] in kept:
+                continue
+            try:
+                if time.time() - path.getmtime() > self.stale_after:
+                    path.remove_p()
+            except FileNotFoundError:
+                pass
+
+    def _beat(self):
+        """Touche les fichiers d'état des exports en attente ou en cours dans ce processus."""
+        while True:
+            time.sleep(self.heartbeat)
+            with self._lock:
+                owned = list(self._owned)
+            for job_id in owned:
+                try:
+                    os.utime(self._status_path(job_id))
+                except FileNotFoundError:
+                    pass
+
+    def _own(self, job_id):
+        with self._lock:
+            self._owned.add(job_id)
+            if self._heartbeat_thread is None:
+                self._heartbeat_thread = threading.Thread(
+                    target=self._beat, name="export-heartbeat", daemon=True
+                )
+                self._heartbeat_thread.start()
+
+    ################################################################################################
+    #   Exécution
+    ################################################################################################
+    def submit(self, name, params, compress, produce):
+        """
+        Met en file l'export `name` si un export identique n'est pas déjà disponible ou en cours.
+        `produce` renvoie les en-têtes et les lignes du CSV ; il est appelé dans un thread du
+        pool, dans un contexte applicatif Flask.
+        """
+        self.directory.makedirs_p()
+        self.purge()
+        job_id = self.job_id(name, params, compress)
+        path = self._status_path(job_id)
+        job, stat = self._read_status(path)
+        if job is not None and not self._is_expired(job, stat):
+            if job["statut"] != self.FAILED:
+                return job
+
+        job = {
+            "id": job_id,
+            "ressource": name,
+            "filtres": params,
+            "compression": "gzip" if compress else None,
+            "statut": self.PENDING,
+            "taille": None,
+            "erreur": None,
+            "cree_le": arrow.utcnow().isoformat(),
+            "termine_le": None,
+        }
+        # Création exclusive : si un autre processus vient de réserver cet export, on
+        # renvoie le sien. L'état lu plus haut (en erreur, expiré ou illisible) est d'abord
+        # supprimé, sauf s'il a été remplacé depuis
+        if stat is not None:
+            self._remove_status(path, stat)
+        if not self._create_status(job):
+            return self.status(job_id) or job
+        self._own(job_id)
+        self.executor.submit(self._run, dict(job), produce)
+        return job
+
+    def _run(self, job, produce):
+        job["statut"] = self.RUNNING
+        self._write_status(job)
+        path = self.file_path(job)
+        part_path = path + f".{os.getpid()}.part"
+        started = time.monotonic()
+        exported = 0
+        try:
+            with self.app.app_context():
+                headers, rows = produce()
+                opener = gzip.open if job["compression"] else open
+                with opener(part_path, "wt", encoding="utf-8", newline="") as file:
+                    for chunk in generate_csv_stream(headers, rows):
+                        file.write(chunk)
+                        exported += 1
+            os.replace(part_path, path)
+        except Exception as exception:
+            Path(part_path).remove_p()
+            self.app.logger.exception("Échec de l'export %s", job["id"])
+            job["statut"] = self.FAILED
+            job["erreur"] = str(exception)
+        else:
+            job["statut"] = self.DONE
+            job["taille"] = path.size
+            # La première portion du flux CSV est la ligne d'en-tête
+            export_rows.inc(max(exported - 1, 0))
+            export_size.observe(path.size)
+        exports_total.inc(status=job["statut"])
+        export_duration.observe(time.monotonic() - started)
+        job["termine_le"] = arrow.utcnow().isoformat()
+        self._write_status(job)
+        with self._lock:
+            self._owned.discard(job["id"])
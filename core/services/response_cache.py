@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+"""
+Stockages du cache des réponses.
+
+Chaque réponse est enregistrée avec des étiquettes (les lignes et les tables dont elle dépend)
+et la génération du cache au moment où son calcul a commencé. Invalider une étiquette lui
+attribue une nouvelle génération : une réponse n'est servie que si aucune de ses étiquettes n'a
+été invalidée depuis le début de son calcul. Une écriture validée pendant le calcul d'une réponse
+la rend donc inutilisable, sans verrou entre lectures et écritures.
+
+Deux stockages ont la même interface :
+    * MemoryCacheBackend : en mémoire, propre au processus, LRU borné ;
+    * SqliteCacheBackend : fichier SQLite partagé par les processus d'une même machine.
+"""
+# Import from stdlib
+import json
+import sqlite3
+import threading
+import time
+
+# Imports from external libraries
+from path import Path
+
+# Import from local code
+from core.services.tools_belt import TTLCache
+
+
+class MemoryCacheBackend:
+    #: Au-delà de ce nombre d'étiquettes invalidées, le cache est entièrement vidé
+    max_tags = 100_000
+
+    def __init__(self, maxsize=2048, ttl=300):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions = {}
+        self._generation = 0
+        # Les réponses dont le calcul a commencé avant le dernier `clear` sont ignorées
+        self._floor = 0
+        self._lock = threading.Lock()
+
+    def generation(self):
+        return self._generation
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        generation, tags, value = entry
+        versions = self._versions
+        if generation < self._floor or any(
+            versions.get(tag, 0) > generation for tag in tags
+        ):
+            self._entries.pop(key)
+            return None
+        return value
+
+    def set(self, key, value, tags, generation):
+        tags = tuple(tags)
+        versions = self._versions
+        if generation < self._floor or any(
+            versions.get(tag, 0) > generation for tag in tags
+        ):
+            # Invalidée pendant son calcul
+            return
+        self._entries.set(key, (generation, tags, value))
+
+    def invalidate(self, tags):
+        if len(self._versions) > self.max_tags:
+            self.clear()
+            return
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                self._versions[tag] = self._generation
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._floor = self._generation
+            self._entries.clear()
+            self._versions.clear()
+
+
+class SqliteCacheBackend:
+    """
+    Les réponses sont enregistrées en JSON. La taille est bornée à `maxsize` entrées, les plus
+    anciennes étant supprimées en premier.
+    """
+
+    max_tags = 100_000
+
+    def __init__(self, path, maxsize=2048, ttl=300):
+        self.path = Path(path)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._local = threading.local()
+        self.path.parent.makedirs_p()
+        with self._connection() as connection:
+            connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS entry (
+                    key TEXT PRIMARY KEY,
+                    generation INTEGER NOT NULL,
+                    tags TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires REAL
+                );
+                CREATE TABLE IF NOT EXISTS tag_version (
+                    tag TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    generation INTEGER NOT NULL,
+                    floor INTEGER NOT NULL
+                );
+                INSERT OR IGNORE INTO meta (id, generation, floor) VALUES (1, 0, 0);
+                """
+            )
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def generation(self):
+        row = self._connection().execute("SELECT generation FROM meta").fetchone()
+        return row[0]
+
+    def _invalidated_since(self, connection, tags, generation):
+        if not tags:
+            return False
+        placeholders = ",".join("?" * len(tags))
+        row = connection.execute(
+            f"SELECT MAX(version) FROM tag_version WHERE tag IN ({placeholders})",
+            tags,
+        ).fetchone()
+        return row[0] is not None and row[0] > generation
+
+    def get(self, key):
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT generation, tags, value, expires FROM entry WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        generation, tags, value, expires = row
+        if (expires is not None and expires <= time.time()) or self._invalidated_since(
+            connection, json.loads(tags), generation
+        ):
+            connection.execute("DELETE FROM entry WHERE key = ?", (key,))
+            return None
+        return json.loads(value)
+
+    def set(self, key, value, tags, generation):
+        tags = list(tags)
+        connection = self._connection()
+        expires = None if self.ttl is None else time.time() + self.ttl
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            floor = connection.execute("SELECT floor FROM meta").fetchone()[0]
+            if generation < floor or self._invalidated_since(
+                connection, tags, generation
+            ):
+                return
+            connection.execute(
+                "INSERT OR REPLACE INTO entry (key, generation, tags, value, expires) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, generation, json.dumps(tags), json.dumps(value), expires),
+            )
+            connection.execute(
+                "DELETE FROM entry WHERE rowid IN (SELECT rowid FROM entry "
+                "ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+
+    def invalidate(self, tags):
+        connection = self._connection()
+        count = connection.execute("SELECT COUNT(*) FROM tag_version").fetchone()[0]
+        if count > self.max_tags:
+            self.clear()
+            return
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("UPDATE meta SET generation = generation + 1")
+            connection.executemany(
+                "INSERT OR REPLACE INTO tag_version (tag, version) "
+                "VALUES (?, (SELECT generation FROM meta))",
+                [(tag,) for tag in tags],
+            )
+
+    def clear(self):
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "UPDATE meta SET generation = generation + 1, floor = generation + 1"
+            )
+            connection.execute("DELETE FROM entry")
+            connection.execute("DELETE FROM tag_version")
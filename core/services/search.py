@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""
+Index inversé en mémoire avec un classement BM25.
+
+Les documents sont découpés en mots par `search_tokens` (ICU : sans casse ni accents) et
+l'index est modifiable au fil de l'eau (ajout, remplacement, suppression d'un document).
+"""
+# Import from stdlib
+from bisect import bisect_left, insort
+from collections import Counter
+import heapq
+import math
+import threading
+
+# Imports from external libraries
+
+# Import from local code
+from core.services.tools_belt import search_tokens
+
+
+class InvertedIndex:
+    """
+    Index inversé pondéré par champ.
+
+        >>> index = InvertedIndex(weights={"titre": 2})
+        >>> index.add(("ouvrage", 1), {"titre": "Les Misérables"}, {"id": 1})
+        >>> index.search("miserable")
+        [(('ouvrage', 1), 0.19..., {'id': 1})]
+
+    `k1` et `b` sont les paramètres habituels de BM25. Le dernier mot de la requête est
+    aussi cherché comme préfixe ("miserable" trouve "miserables") pour la saisie au fil de
+    l'eau.
+    """
+
+    #: Un mot complété par préfixe compte moins que le mot exact
+    prefix_discount = 0.5
+
+    def __init__(self, k1=1.2, b=0.75, weights=None):
+        self.k1 = k1
+        self.b = b
+        self.weights = weights or {}
+        # mot -> {clé du document: fréquence pondérée}
+        self._postings = {}
+        # clé du document -> (Counter des mots, longueur pondérée, données)
+        self._documents = {}
+        self._total_length = 0.0
+        # Vocabulaire trié pour la recherche par préfixe
+        self._vocabulary = []
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __contains__(self, key):
+        return key in self._documents
+
+    def add(self, key, fields, payload=None):
+        """
+        Ajoute le document `key` (remplace l'existant). `fields` associe un nom de champ à
+        son texte, `payload` est renvoyé tel quel par `search`.
+        """
+        terms = Counter()
+        for field, text in fields.items():
+            weight = self.weights.get(field, 1)
+            for token in search_tokens(text or ""):
+                terms[token] += weight
+        length = float(sum(terms.values()))
+        with self._lock:
+            self._remove(key)
+            self._documents[key] = (terms, length, payload)
+            self._total_length += length
+            for term, frequency in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    insort(self._vocabulary, term)
+                postings[key] = frequency
+
+    def remove(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        document = self._documents.pop(key, None)
+        if document is None:
+            return
+        terms, length, _ = document
+        self._total_length -= length
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[term]
+                index = bisect_left(self._vocabulary, term)
+                del self._vocabulary[index]
+
+    def _expand(self, prefix, limit=50):
+        """Les mots du vocabulaire commençant par `prefix` (les `limit` plus fréquents)."""
+        index = bisect_left(self._vocabulary, prefix)
+        terms = []
+        while index < len(self._vocabulary):
+            term = self._vocabulary[index]
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+            index += 1
+        if len(terms) > limit:
+            terms = heapq.nlargest(limit, terms, key=lambda t: len(self._postings[t]))
+        return terms
+
+    def search(self, query, limit=20, prefix=True, accept=None):
+        """
+        Renvoie les `limit` meilleurs documents sous la forme (clé, score, données).
+        `accept` permet de filtrer les clés des documents (par exemple sur leur type).
+        """
+        tokens = search_tokens(query)
+        if not tokens:
+            return []
+        with self._lock:
+            count = len(self._documents)
+            if not count:
+                return []
+            average_length = self._total_length / count or 1.0
+            # Chaque mot de la requête est un groupe de mots de l'index (le mot lui-même,
+            # ou tous les mots qu'il préfixe pour le dernier)
+            groups = [[token] for token in tokens[:-1]]
+            groups.append(self._expand(tokens[-1]) if prefix else [tokens[-1]])
+            scores = Counter()
+            for token, group in zip(tokens, groups):
+                group_scores = {}
+                for term in group:
+                    postings = self._postings.get(term)
+                    if not postings:
+                        continue
+                    idf = math.log(
+                        1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)
+                    )
+                    for key, frequency in postings.items():
+                        if accept is not None and not accept(key):
+                            continue
+                        length = self._documents[key][1]
+                        norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                        score = idf * frequency * (self.k1 + 1) / (frequency + norm)
+                        if term != token:
+                            score *= self.prefix_discount
+                        # Un préfixe ne compte qu'une fois par document : le meilleur mot
+                        if score > group_scores.get(key, 0):
+                            group_scores[key] = score
+                for key, score in group_scores.items():
+                    scores[key] += score
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [(key, score, self._documents[key][2]) for key, score in best]
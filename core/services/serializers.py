@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+"""
+Sérialiseurs précompilés pour les schémas marshmallow.
+
+`Schema.dump` refait pour chaque objet et chaque champ le même travail (résolution de
+l'accesseur, de la clé de sortie, appel de `Field.serialize`...). `CompiledSerializer`
+l'effectue une seule fois et réduit le schéma à une table plate
+(clé de sortie, attribut, conversion), parcourue pour chaque objet.
+
+La sortie est identique à celle de `Schema.dump` :
+    * les types courants (Integer, String, Date, DateTime, Nested) sont convertis directement ;
+    * les autres champs passent par `Field.serialize` ;
+    * les post_dump par objet sont appelés ;
+    * un schéma avec des pre_dump, des post_dump pass_many ou un `get_attribute` surchargé
+      n'est pas compilé, et `dump` délègue alors à marshmallow.
+"""
+# Import from stdlib
+
+# Imports from external libraries
+from marshmallow import Schema, fields, missing
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
+
+# Import from local code
+from core.services.timings import timing
+
+
+class CompiledSerializer:
+    #: Permet de revenir au dump marshmallow pour tous les sérialiseurs
+    enabled = True
+
+    def __init__(self, schema: Schema):
+        self.schema = schema
+        self._dump_one = self._compile(schema)
+
+    @property
+    def compiled(self):
+        return self._dump_one is not None
+
+    def dump(self, obj, many=False):
+        with timing("serialize"):
+            if not self.enabled or self._dump_one is None:
+                return self.schema.dump(obj, many=many)
+            if many:
+                return [self._dump_one(item) for item in obj]
+            return self._dump_one(obj)
+
+    def check(self, obj, many=False):
+        """
+        Compare la sortie compilée à celle de marshmallow.
+        Renvoie la liste des différences (chemin, attendu, obtenu), vide si elles sont identiques.
+        """
+        expected = self.schema.dump(obj, many=many)
+        if self._dump_one is None:
+            return []
+        if many:
+            actual = [self._dump_one(item) for item in obj]
+        else:
+            actual = self._dump_one(obj)
+        return list(_differences(expected, actual))
+
+    ################################################################################################
+    #   Compilation
+    ################################################################################################
+    @classmethod
+    def _compile(cls, schema):
+        hooks = schema._hooks
+        if hooks[PRE_DUMP] or any(pass_many for _, pass_many, _ in hooks[POST_DUMP]):
+            return None
+        if type(schema).get_attribute is not Schema.get_attribute:
+            return None
+
+        post_dump = [
+            (getattr(schema, name), kwargs.get("pass_original", False))
+            for name, _, kwargs in hooks[POST_DUMP]
+        ]
+        table = []
+        for name, field in schema.dump_fields.items():
+            key = field.data_key if field.data_key is not None else name
+            attribute = field.attribute or name
+            convert = None
+            if "." not in attribute:
+                convert = cls._converter(field)
+            table.append((key, name, attribute, field, convert))
+        dict_class = schema.dict_class
+        accessor = schema.get_attribute
+
+        def dump_one(obj):
+            data = dict_class()
+            for key, name, attribute, field, convert in table:
+                if convert is None:
+                    value = field.serialize(name, obj, accessor=accessor)
+                else:
+                    value = getattr(obj, attribute, missing)
+                    if value is missing:
+                        # Valeur par défaut éventuelle du champ
+                        value = field.serialize(name, obj, accessor=accessor)
+                    elif value is not None:
+                        value = convert(value)
+                if value is missing:
+                    continue
+                data[key] = value
+            for processor, pass_original in post_dump:
+                if pass_original:
+                    data = processor(data, obj, many=False)
+                else:
+                    data = processor(data, many=False)
+            return data
+
+        return dump_one
+
+    @staticmethod
+    def _converter(field):
+        """
+        La conversion directe d'une valeur non nulle pour `field`, None si le champ doit passer
+        par `Field.serialize`.
+        """
+        kind = type(field)
+        if kind is fields.Integer and not field.as_string:
+            return int
+        if kind is fields.String:
+            return str
+        if kind in (fields.Date, fields.DateTime) and field.format in (None, "iso"):
+            return lambda value: value.isoformat()
+        if kind is fields.Nested:
+            nested = CompiledSerializer(field.schema)
+            if not nested.compiled:
+                return None
+            dump_one = nested._dump_one
+            if field.many or field.schema.many:
+                return lambda value: [dump_one(item) for item in value]
+            return dump_one
+        return None
+
+
+def _differences(expected, actual, path=""):
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in expected.keys() | actual.keys():
+            yield from _differences(
+                expected.get(key, missing), actual.get(key, missing), f"{path}.{key}"
+            )
+    elif isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            yield path, f"{len(expected)} éléments", f"{len(actual)} éléments"
+            return
+        for index, (left, right) in enumerate(zip(expected, actual)):
+            yield from _differences(left, right, f"{path}[{index}]")
+    elif expected != actual or type(expected) is not type(actual):
+        yield path, expected, actual
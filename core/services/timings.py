@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Mesure des étapes d'un traitement (requêtes SQL, sérialisation, encodage...), typiquement une
+requête HTTP.
+
+Les mesures ne sont collectées qu'entre `start` et `stop`, dans le même contexte
+(contextvars) : les threads de tâches de fond ne sont pas comptés dans la requête qui les a
+lancés.
+"""
+# Import from stdlib
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+# Imports from external libraries
+
+# Import from local code
+
+
+class Timings:
+    def __init__(self):
+        self.started = perf_counter()
+        #: Durée cumulée par étape, en secondes
+        self.durations = Counter()
+        #: Nombre de mesures par étape
+        self.counts = Counter()
+        #: Nombre d'exécutions de chaque requête SQL
+        self.statements = Counter()
+
+    def add(self, name, duration):
+        self.durations[name] += duration
+        self.counts[name] += 1
+
+    def elapsed(self):
+        return perf_counter() - self.started
+
+
+_current = ContextVar("timings", default=None)
+
+
+def start():
+    """Commence la collecte ; renvoie le jeton à passer à `stop`."""
+    return _current.set(Timings())
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def current():
+    """Les mesures en cours de collecte, ou None."""
+    return _current.get()
+
+
+@contextmanager
+def timing(name):
+    """Ajoute la durée du bloc à l'étape `name`, si une collecte est en cours."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, perf_counter() - started)
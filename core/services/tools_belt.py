@@ -3,7 +3,7 @@
 DOC
 """
 # Import from stdlib
-from collections import UserDict
+from collections import OrderedDict, UserDict
 from collections.abc import Callable, Mapping
 from functools import partial
 from operator import attrgetter
@@ -13,10 +13,13 @@ import csv
 import io
 import mimetypes
 import re
+import threading
+import time
 
 # Imports from external libraries
 from marshmallow.utils import is_collection
 from path import Path
+import icu
 import inflection
 
 # Import from local code
@@ -245,6 +248,35 @@ class humps:
         return chunkize(data, size)
 
 
+# Translittération en latin puis en ASCII (Ø → o, œ → oe, ß → ss), sans diacritiques, en minuscules
+_fold_transliterator = icu.Transliterator.createInstance(
+    "Any-Latin; NFD; [:Nonspacing Mark:] Remove; NFC; Latin-ASCII; Lower"
+)
+_search_token = re.compile(r"\w+")
+
+
+def fold_text(text: str) -> str:
+    """
+    Forme canonique d'une chaîne pour la recherche : insensible à la casse et aux accents.
+
+        >>> fold_text("Élise Ørsted")
+        'elise orsted'
+    """
+    if not text:
+        return ""
+    return _fold_transliterator.transliterate(text)
+
+
+def search_tokens(text: str) -> list[str]:
+    """
+    Découpe une chaîne normalisée par `fold_text` en mots.
+
+        >>> search_tokens("L'Économie d'Aujourd'hui")
+        ['l', 'economie', 'd', 'aujourd', 'hui']
+    """
+    return _search_token.findall(fold_text(text))
+
+
 def uniq_dicts(collection):
     """
     Supprime les dictionnaires en doublon d'une collection
@@ -277,6 +309,59 @@ class Null:
     pass
 
 
+####################################################################################################
+# Cache mémoire
+####################################################################################################
+class TTLCache:
+    """
+    Cache mémoire propre au processus, borné en nombre d'entrées (les moins récemment utilisées
+    sont évincées) et dont les entrées expirent au bout de `ttl` secondes.
+    Un `ttl` à None signifie que les entrées n'expirent pas.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expire_at, value = self._data[key]
+            except KeyError:
+                return default
+            if expire_at is not None and expire_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=Null):
+        ttl = self.ttl if ttl is Null else ttl
+        expire_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._data[key] = (expire_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            expire_at, value = self._data.pop(key, (None, default))
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key, Null) is not Null
+
+    def __len__(self):
+        return len(self._data)
+
+
 def find_attr(obj, attrnames, default=Null):
     """
     Permet de retrouver un attribut en essayant les différents `attrnames`.
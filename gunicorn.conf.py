@@ -0,0 +1,23 @@
+#!/usr/bin/env python
+"""
+Configuration de gunicorn, lue automatiquement quand il est lancé depuis ce dossier.
+
+Le maître gère le dossier des instantanés de métriques (METRICS.multiprocess-dir) partagé par
+les workers : il le vide à son démarrage, et retire l'instantané de chaque worker arrêté.
+"""
+# Import from stdlib
+
+# Imports from external libraries
+
+# Import from local code
+from config import settings
+from core.server.metrics import metrics
+
+
+def on_starting(server):
+    metrics.configure(settings.METRICS)
+    metrics.clear()
+
+
+def child_exit(server, worker):
+    metrics.remove_process(worker.pid)